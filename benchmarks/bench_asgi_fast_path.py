@@ -0,0 +1,94 @@
+"""
+基准: 原始 ASGI 快速路径节省的每请求开销
+
+本地模式下直接调用 main.asgi_app (不经过网络和 HTTP 解析)，请求一个很小的已缓存页面，
+分别在 FastAPI 路由 (ASGI_FAST_PATH=false) 和快速路径下报告每个请求的耗时
+
+用法: python benchmarks/bench_asgi_fast_path.py [--requests 5000] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import RunMode, app_config  # noqa: E402
+from core import CacheManager  # noqa: E402
+
+TARGET = "http://bench.test"
+BODY = b"<p>hello</p>"
+
+
+async def run(requests: int) -> float:
+    """按当前配置启动应用并发送请求，返回每个请求的平均耗时 (微秒)"""
+    import main
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/index.html",
+        "raw_path": b"/index.html",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench.test"), (b"accept", b"text/html")],
+        "server": ("bench.test", 80),
+        "client": ("127.0.0.1", 50000),
+        "state": {},
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    async with main.lifespan(main.app):
+        # 预热 (载入内存缓存)
+        for _ in range(100):
+            await main.asgi_app(dict(scope), receive, send)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await main.asgi_app(dict(scope), receive, send)
+        elapsed = time.perf_counter() - started
+    return elapsed / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # 请求日志不计入比较
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app_config.mode = RunMode.LOCAL
+        app_config.target_url = TARGET
+        app_config.cache_dir = cache_dir
+        app_config.cache_write_queue_size = 0
+        CacheManager(cache_dir).save_response(
+            f"{TARGET}/index.html", "GET", BODY, {"content-type": "text/html"}
+        )
+
+        print(f"{len(BODY)}-byte cached page, {args.requests} requests per round")
+        print(f"{'path':<10}" + "".join(f"{f'round {i + 1}':>10}" for i in range(args.rounds)))
+        results = {}
+        for name, fast_path in (("fastapi", False), ("fast", True)):
+            app_config.asgi_fast_path = fast_path
+            results[name] = [asyncio.run(run(args.requests)) for _ in range(args.rounds)]
+            print(f"{name:<10}" + "".join(f"{us:>8.1f}us" for us in results[name]))
+        saved = min(results["fastapi"]) - min(results["fast"])
+        print(f"saved per request: {saved:.1f}us ({saved / min(results['fastapi']):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+基准: 写入大文件时小缓存命中的延迟
+
+并发读取小缓存条目 (绕过内存缓存，每次读取磁盘)，同时写入一个大响应体，
+分别在事件循环中直接调用同步接口 (sync) 和通过 I/O 线程池的异步接口 (async) 写入，
+报告读取延迟的 p50 / p99 / max
+
+用法: python benchmarks/bench_async_io.py [--size-mb 200] [--readers 20] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import app_config  # noqa: E402
+from core import CacheManager  # noqa: E402
+
+
+def percentile(samples: list[float], ratio: float) -> float:
+    """计算百分位数"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run(mode: str, size_mb: int, readers: int, seconds: float) -> dict:
+    """在一个临时缓存目录中运行一轮，返回读取延迟统计 (毫秒)"""
+    app_config.cache_write_queue_size = 0
+    app_config.memory_cache_size = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manager = CacheManager(cache_dir)
+        urls = [f"http://bench.test/small/{i}.css" for i in range(100)]
+        for url in urls:
+            manager.save_response(url, "GET", b"body{}" * 100, {"content-type": "text/css"})
+
+        big = b"x" * (size_mb * 1024 * 1024)
+        latencies: list[float] = []
+        deadline = time.monotonic() + seconds
+
+        async def reader(worker: int) -> None:
+            i = worker
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                await manager.aget_response(urls[i % len(urls)])
+                latencies.append((time.perf_counter() - started) * 1000)
+                i += readers
+                await asyncio.sleep(0.001)
+
+        async def writer() -> None:
+            await asyncio.sleep(0.2)
+            while mode != "idle" and time.monotonic() < deadline:
+                if mode == "sync":
+                    manager.save_response("http://bench.test/big.bin", "GET", big)
+                else:
+                    await manager.asave_response("http://bench.test/big.bin", "GET", big)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(writer(), *(reader(i) for i in range(readers)))
+        await manager.aclose()
+
+    return {
+        "requests": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"large write: {args.size_mb} MB, {args.readers} concurrent readers, {args.seconds}s")
+    print(f"{'mode':<8}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode in ("idle", "sync", "async"):
+        result = asyncio.run(run(mode, args.size_mb, args.readers, args.seconds))
+        print(
+            f"{mode:<8}{result['requests']:>10}{result['p50']:>10.2f}"
+            f"{result['p99']:>10.2f}{result['max']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+基准: 编码检测吞吐量
+
+对 GBK、Shift-JIS、UTF-8 和二进制负载分别运行:
+- before: 旧流程 (UTF-8 失败后对整个内容运行 chardet，忽略 Content-Type)
+- after: 当前流程，Content-Type 只有 MIME 类型 (前缀采样检测并按域名缓存结果)
+- declared: 当前流程，Content-Type 声明了 charset
+报告每秒处理的字节数
+
+用法: python benchmarks/bench_encoding.py [--size-kb 256] [--seconds 1]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import chardet
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import EncodingUtil  # noqa: E402
+
+
+def legacy_detect_and_decode(content: bytes) -> str:
+    """旧的编码检测流程"""
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    encoding = chardet.detect(content).get("encoding")
+    if encoding:
+        try:
+            return content.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return content.decode("utf-8", errors="replace")
+
+
+def build_corpus(size: int) -> list[tuple[str, bytes, str, str]]:
+    """生成 (名称, 内容, MIME 类型, 声明的 charset) 列表"""
+
+    def repeat(text: str, encoding: str) -> bytes:
+        unit = text.encode(encoding)
+        return (unit * (size // len(unit) + 1))[:size].rsplit(b"\n", 1)[0]
+
+    binary = bytes((i * 7919 + i // 251) % 256 for i in range(size))
+    return [
+        ("gbk", repeat("缓存代理服务器，支持离线访问和镜像站点。\n", "gbk"), "text/html", "gbk"),
+        (
+            "shift_jis",
+            repeat("キャッシュプロキシサーバーはオフラインで動作します。\n", "shift_jis"),
+            "text/plain",
+            "shift_jis",
+        ),
+        ("utf-8", repeat("héllo wörld — 缓存 キャッシュ ✓\n", "utf-8"), "application/json", "utf-8"),
+        ("binary", binary, "application/octet-stream", ""),
+    ]
+
+
+def throughput(func: Callable[[], Optional[str]], size: int, seconds: float) -> float:
+    """在给定时间内重复调用，返回 MB/s"""
+    func()
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return runs * size / elapsed / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"payload: {args.size_kb} KB, {args.seconds}s per cell, MB/s")
+    print(f"{'payload':<12}{'before':>12}{'after':>12}{'declared':>12}")
+    for name, content, mime, charset in build_corpus(args.size_kb * 1024):
+        declared = f"{mime}; charset={charset}" if charset else mime
+        results = [
+            throughput(lambda: legacy_detect_and_decode(content), len(content), args.seconds),
+            throughput(
+                lambda: EncodingUtil.detect_and_decode(content, mime, "bench.test"),
+                len(content),
+                args.seconds,
+            ),
+            throughput(
+                lambda: EncodingUtil.detect_and_decode(content, declared, "bench.test"),
+                len(content),
+                args.seconds,
+            ),
+        ]
+        print(f"{name:<12}" + "".join(f"{value:>12.1f}" for value in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+基准: 淘汰候选选择与命中记录的耗时
+
+索引中有 N 个条目 (分布在 100 个域名)，随机命中一部分后选出一批淘汰候选:
+- before: 扫描全部条目并用 heapq.nsmallest 排序 (旧实现)
+- after: 从索引维护的淘汰顺序开头取 (CacheIndex.select_victims)
+同时报告每次 touch 的耗时 (维护淘汰顺序的额外开销)
+
+用法: python benchmarks/bench_eviction.py [--entries 100000 1000000] [--batch 1000]
+"""
+
+import argparse
+import heapq
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import CacheEvictionPolicy  # noqa: E402
+from core import CacheIndex  # noqa: E402
+
+
+def legacy_select(index: CacheIndex, policy: CacheEvictionPolicy, limit: int, idle_before: float):
+    """旧实现: 持有锁时收集全部候选再排序"""
+
+    def rank(item):
+        entry = item[1]
+        if policy == CacheEvictionPolicy.LFU:
+            return entry.hits, entry.last_access
+        return (entry.last_access,)
+
+    with index._lock:
+        candidates = [
+            item for item in index._entries.items() if item[1].last_access < idle_before
+        ]
+    return [(key, entry.size) for key, entry in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+def timed(func, repeat: int = 5) -> float:
+    """多次执行取最短耗时 (毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"victim batch: {args.batch}")
+    print(f"{'policy':<8}{'entries':>10}{'before ms':>12}{'after ms':>11}{'touch us':>11}")
+    for policy in CacheEvictionPolicy:
+        for count in args.entries:
+            index = CacheIndex(policy=policy)
+            rng = random.Random(1)
+            keys = [f"/cache/d{i % 100}.test/{i}" for i in range(count)]
+            for key in keys:
+                index.record(key, key.split("/")[2], 1000)
+            sample = rng.choices(keys, k=min(count, 200_000))
+            started = time.perf_counter()
+            for key in sample:
+                index.touch(key)
+            touch_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+            idle_before = time.time() + 1
+            before = timed(lambda: legacy_select(index, policy, args.batch, idle_before))
+            after = timed(lambda: index.select_victims(args.batch, idle_before))
+            assert [key for key, _ in index.select_victims(args.batch, idle_before)] == [
+                key for key, _ in legacy_select(index, policy, args.batch, idle_before)
+            ]
+            print(
+                f"{policy.value:<8}{count:>10}{before:>12.2f}{after:>11.2f}{touch_us:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
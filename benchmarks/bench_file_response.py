@@ -0,0 +1,162 @@
+"""
+基准: 大缓存文件的发送吞吐量和服务进程内存占用 (文件直出 vs 读入内存)
+
+本地模式下单个 worker 通过 uvicorn 提供 100KB / 10MB / 1GB 的已缓存文件，分别在
+文件直出 (FILE_RESPONSE_THRESHOLD=256KB，uvicorn 不提供 zerocopysend 扩展，实际走 os.pread 分块发送)
+和读入内存 (阈值设为无穷大) 时，由独立的压测进程通过 keep-alive 连接下载，
+报告吞吐量 (MB/s) 以及服务进程空闲和峰值 RSS。小于阈值的文件两种设置下都从内存发送，
+读入内存时每个连接同时持有一份完整响应体，1GB 需要数 GB 空闲内存
+
+用法: python benchmarks/bench_file_response.py [--sizes 100K 10M 1G] [--connections 2] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import RunMode, app_config  # noqa: E402
+from core import CacheManager  # noqa: E402
+
+TARGET = "http://bench.test"
+UNITS = {"K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+MODES = {"file": 256 * 1024, "memory": 1 << 62}
+
+
+def parse_size(text: str) -> int:
+    """解析 100K / 10M / 1G 形式的大小"""
+    unit = text[-1].upper()
+    return int(text[:-1]) * UNITS[unit] if unit in UNITS else int(text)
+
+
+def serve(cache_dir: str, port: int, threshold: int) -> None:
+    """在子进程中以指定的文件直出阈值启动本地模式服务"""
+    import uvicorn
+
+    app_config.mode = RunMode.LOCAL
+    app_config.target_url = TARGET
+    app_config.cache_dir = cache_dir
+    app_config.file_response_threshold = threshold
+    logging.disable(logging.WARNING)
+
+    import main
+
+    uvicorn.run(main.asgi_app, host="127.0.0.1", port=port, log_level="error")
+
+
+def wait_for_port(port: int, timeout: float = 30) -> None:
+    """等待服务开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def memory_kb(pid: int, field: str) -> int:
+    """读取进程的 VmRSS / VmHWM (KB)"""
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    return 0
+
+
+def run_client(port: int, path: str, connections: int, seconds: float, received) -> None:
+    """压测进程: 每个连接至少下载一次，直到时间用完，只统计字节数不保留内容"""
+
+    async def connection() -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        total = 0
+        deadline = time.monotonic() + seconds
+        while True:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: bench.test\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200"), head[:40]
+            remaining = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    remaining = int(line.split(b":", 1)[1])
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    raise ConnectionError("connection closed mid-body")
+                remaining -= len(chunk)
+                total += len(chunk)
+            if time.monotonic() >= deadline:
+                break
+        writer.close()
+        return total
+
+    async def main() -> int:
+        return sum(await asyncio.gather(*(connection() for _ in range(connections))))
+
+    received.value = asyncio.run(main())
+
+
+def measure(args: argparse.Namespace, cache_dir: str, path: str, threshold: int):
+    """启动服务并压测，返回 (MB/s, 空闲 RSS MB, 峰值 RSS MB)"""
+    # spawn 启动的服务进程不继承写入缓存时的内存
+    context = multiprocessing.get_context("spawn")
+    server = context.Process(target=serve, args=(cache_dir, args.port, threshold), daemon=True)
+    server.start()
+    try:
+        wait_for_port(args.port)
+        idle = memory_kb(server.pid, "VmRSS")
+        received = context.Value("q", 0)
+        started = time.monotonic()
+        client = context.Process(
+            target=run_client, args=(args.port, path, args.connections, args.seconds, received)
+        )
+        client.start()
+        client.join()
+        elapsed = time.monotonic() - started
+        peak = memory_kb(server.pid, "VmHWM")
+        return received.value / elapsed / 1024 / 1024, idle / 1024, peak / 1024
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["100K", "10M", "1G"])
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=9105)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app_config.cache_write_queue_size = 0
+        manager = CacheManager(cache_dir)
+        for size in args.sizes:
+            manager.save_response(
+                f"{TARGET}/{size}.bin",
+                "GET",
+                os.urandom(parse_size(size)),
+                {"content-type": "application/octet-stream"},
+            )
+
+        print(
+            f"{os.cpu_count()} CPUs, {args.connections} keep-alive connections, "
+            f"{args.seconds}s per run (at least one download per connection)"
+        )
+        print(f"{'size':<7}{'mode':<8}{'MB/s':>9}{'idle RSS':>11}{'peak RSS':>11}")
+        for size in args.sizes:
+            for mode, threshold in MODES.items():
+                rate, idle, peak = measure(args, cache_dir, f"/{size}.bin", threshold)
+                print(f"{size:<7}{mode:<8}{rate:>9.0f}{idle:>9.0f}MB{peak:>9.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
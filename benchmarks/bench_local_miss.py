@@ -0,0 +1,106 @@
+"""
+基准: 本地模式下大量未缓存路径请求 (404) 的吞吐量
+
+缓存目录中已有 N 个条目，通过 LocalHandler 请求从未缓存的路径 (模拟扫描器)，
+分别在以下方式下判断未命中:
+- filesystem: 关闭缓存索引和布隆过滤器，每次按文件系统查找
+- bloom: 关闭缓存索引，启动时扫描构建布隆过滤器
+- index: 持久化缓存索引 (SQLite 载入内存)
+同时报告缓存命中的请求数 (应与条目数相同)
+
+用法: python benchmarks/bench_local_miss.py [--entries 5000] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from starlette.requests import Request  # noqa: E402
+
+from config import app_config  # noqa: E402
+from core import CacheManager, LocalHandler  # noqa: E402
+
+TARGET = "http://bench.test"
+MODES = {
+    "filesystem": {"cache_index": False, "cache_bloom_capacity": 0},
+    "bloom": {"cache_index": False, "cache_bloom_capacity": 1_000_000},
+    "index": {"cache_index": True, "cache_bloom_capacity": 1_000_000},
+}
+
+
+def make_request(path: str) -> Request:
+    """构造 GET 请求"""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/" + path,
+        "query_string": b"",
+        "headers": [],
+        "scheme": "http",
+        "server": ("bench.test", 80),
+        "root_path": "",
+        "http_version": "1.1",
+    }
+    return Request(scope)
+
+
+async def run(cache_dir: str, mode: str, entries: int, requests: int) -> tuple[float, int]:
+    """按模式启动缓存管理器，返回 (未命中请求的每秒请求数, 命中数)"""
+    for name, value in MODES[mode].items():
+        setattr(app_config, name, value)
+    manager = CacheManager(cache_dir)
+    manager.start()
+    lookup = manager.index if manager.index is not None else manager.bloom
+    while lookup is not None and not lookup.ready:
+        await asyncio.sleep(0.01)
+    handler = LocalHandler(manager, TARGET)
+
+    hits = 0
+    for i in range(entries):
+        response = await handler.handle_request(make_request(f"static/{i}.js"), f"static/{i}.js")
+        hits += response.status_code == 200
+
+    started = time.perf_counter()
+    for i in range(requests):
+        path = f"wp-content/plugins/{i}/readme.txt"
+        response = await handler.handle_request(make_request(path), path)
+        assert response.status_code == 404
+    rps = requests / (time.perf_counter() - started)
+    await manager.aclose()
+    return rps, hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # 请求日志不计入比较
+    logging.disable(logging.WARNING)
+    app_config.cache_write_queue_size = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manager = CacheManager(cache_dir)
+        for i in range(args.entries):
+            manager.save_response(
+                f"{TARGET}/static/{i}.js",
+                "GET",
+                b"console.log(1)",
+                {"content-type": "text/javascript"},
+            )
+
+        print(f"{args.entries} cached entries, {args.requests} requests for never-cached paths")
+        print(f"{'mode':<12}{'req/s':>10}{'us/req':>10}{'hits':>8}")
+        for mode in MODES:
+            rps, hits = asyncio.run(run(cache_dir, mode, args.entries, args.requests))
+            print(f"{mode:<12}{rps:>10.0f}{1e6 / rps:>10.1f}{hits:>8}")
+
+
+if __name__ == "__main__":
+    main()
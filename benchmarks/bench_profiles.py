@@ -0,0 +1,156 @@
+"""
+基准: 事件循环、HTTP 解析器和元数据编解码器组合下的缓存命中吞吐量
+
+本地模式下单个 worker 提供一个很小的已缓存页面，对每种组合
+(asyncio / uvloop × h11 / httptools × json / orjson) 启动服务，
+由独立的压测进程通过 keep-alive 连接并发请求，分别在启用和关闭内存热缓存
+(关闭时每次命中都读取磁盘并解析元数据) 时报告每秒请求数。未安装的组件跳过
+
+用法: python benchmarks/bench_profiles.py [--connections 16] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import PerformanceProfile, RunMode, app_config  # noqa: E402
+from core import CacheManager  # noqa: E402
+from utils import JsonUtil  # noqa: E402
+
+TARGET = "http://bench.test"
+LOOPS = ["asyncio", "uvloop"]
+PARSERS = ["h11", "httptools"]
+CODECS = ["json", "orjson"]
+
+
+def installed(name: str) -> bool:
+    """组件是否可用"""
+    if name in ("asyncio", "h11", "json"):
+        return True
+    if name == "orjson":
+        return JsonUtil.available()
+    return importlib.util.find_spec(name) is not None
+
+
+def serve(cache_dir: str, port: int, loop: str, http: str, codec: str, memory: bool) -> None:
+    """在子进程中按指定组合启动本地模式服务"""
+    import uvicorn
+
+    app_config.mode = RunMode.LOCAL
+    app_config.target_url = TARGET
+    app_config.cache_dir = cache_dir
+    app_config.memory_cache_size = app_config.memory_cache_size if memory else 0
+    # 元数据编解码器由缓存管理器按性能配置选择
+    app_config.performance_profile = (
+        PerformanceProfile.FAST if codec == "orjson" else PerformanceProfile.AUTO
+    )
+    logging.disable(logging.WARNING)
+
+    import main
+
+    uvicorn.run(
+        main.asgi_app, host="127.0.0.1", port=port, loop=loop, http=http, log_level="error"
+    )
+
+
+def wait_for_port(port: int, timeout: float = 30) -> None:
+    """等待服务开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def run_client(port: int, connections: int, seconds: float, completed) -> None:
+    """压测进程: 每个连接依次发送请求并读取完整响应"""
+
+    async def connection() -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        count = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            writer.write(b"GET /index.html HTTP/1.1\r\nHost: bench.test\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200"), head[:40]
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            count += 1
+        writer.close()
+        return count
+
+    async def main() -> int:
+        return sum(await asyncio.gather(*(connection() for _ in range(connections))))
+
+    completed.value = asyncio.run(main())
+
+
+def measure(args: argparse.Namespace, cache_dir: str, combination, memory: bool) -> float:
+    """启动指定组合的服务并压测，返回每秒请求数"""
+    server = multiprocessing.Process(
+        target=serve, args=(cache_dir, args.port, *combination, memory), daemon=True
+    )
+    server.start()
+    try:
+        wait_for_port(args.port)
+        completed = multiprocessing.Value("q", 0)
+        started = time.monotonic()
+        client = multiprocessing.Process(
+            target=run_client, args=(args.port, args.connections, args.seconds, completed)
+        )
+        client.start()
+        client.join()
+        return completed.value / (time.monotonic() - started)
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=9104)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app_config.cache_write_queue_size = 0
+        CacheManager(cache_dir).save_response(
+            f"{TARGET}/index.html", "GET", b"<p>hello</p>", {"content-type": "text/html"}
+        )
+
+        print(
+            f"{os.cpu_count()} CPUs, 12-byte cached page, {args.connections} keep-alive "
+            f"connections, {args.seconds}s per run"
+        )
+        print(f"{'loop':<9}{'http':<11}{'codec':<8}{'memory on':>11}{'memory off':>12}")
+        for combination in itertools.product(LOOPS, PARSERS, CODECS):
+            loop, http, codec = combination
+            missing = [name for name in combination if not installed(name)]
+            if missing:
+                print(f"{loop:<9}{http:<11}{codec:<8}  skipped ({', '.join(missing)} not installed)")
+                continue
+            on = measure(args, cache_dir, combination, memory=True)
+            off = measure(args, cache_dir, combination, memory=False)
+            print(f"{loop:<9}{http:<11}{codec:<8}{on:>11.0f}{off:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
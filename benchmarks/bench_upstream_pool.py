@@ -0,0 +1,114 @@
+"""
+基准: 上游连接池大小与吞吐量
+
+本地替身上游运行在独立进程中，每个响应延迟固定时间 (模拟上游处理时间)。
+使用按配置创建的上游客户端 (ProxyHandler._build_client) 并发请求，
+分别设置不同的最大连接数和 keep-alive 连接数，报告每秒请求数和上游收到的新连接数
+
+用法: python benchmarks/bench_upstream_pool.py [--concurrency 100] [--delay-ms 5] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import app_config  # noqa: E402
+from core import ProxyHandler  # noqa: E402
+
+# (最大连接数, keep-alive 连接数)，(100, 20) 为默认配置
+POOLS = [(1, 1), (10, 10), (20, 20), (50, 50), (100, 100), (100, 20), (100, 0)]
+
+
+def run_upstream(port: int, delay: float, connections, ready) -> None:
+    """在子进程中运行 keep-alive 上游，每个响应等待 delay 秒"""
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with connections.get_lock():
+            connections.value += 1
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(delay)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def main() -> None:
+        server = await asyncio.start_server(serve, "127.0.0.1", port, backlog=1024)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def run(target: str, concurrency: int, seconds: float) -> float:
+    """按当前配置创建客户端并发请求，返回每秒完成的请求数"""
+    client = ProxyHandler._build_client()
+    completed = 0
+    started = time.monotonic()
+    deadline = started + seconds
+
+    async def worker() -> None:
+        nonlocal completed
+        while time.monotonic() < deadline:
+            response = await client.get(target)
+            assert response.status_code == 200
+            completed += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # 截止时已发出的请求仍会完成，按实际耗时计算
+    elapsed = time.monotonic() - started
+    await client.aclose()
+    return completed / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=9102)
+    args = parser.parse_args()
+
+    connections = multiprocessing.Value("i", 0)
+    ready = multiprocessing.Event()
+    upstream = multiprocessing.Process(
+        target=run_upstream,
+        args=(args.port, args.delay_ms / 1000, connections, ready),
+        daemon=True,
+    )
+    upstream.start()
+    ready.wait()
+    target = f"http://127.0.0.1:{args.port}/"
+    app_config.request_timeout = 60
+
+    print(
+        f"upstream delay: {args.delay_ms} ms, {args.concurrency} concurrent requests, "
+        f"{args.seconds}s per pool"
+    )
+    print(f"{'max_conn':>10}{'keepalive':>11}{'req/s':>10}{'new conns':>11}")
+    try:
+        for max_connections, keepalive in POOLS:
+            app_config.upstream_max_connections = max_connections
+            app_config.upstream_max_keepalive_connections = keepalive
+            connections.value = 0
+            rps = asyncio.run(run(target, args.concurrency, args.seconds))
+            print(
+                f"{max_connections:>10}{keepalive:>11}{rps:>10.0f}"
+                f"{connections.value:>11}"
+            )
+    finally:
+        upstream.terminate()
+
+
+if __name__ == "__main__":
+    main()
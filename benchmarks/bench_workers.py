@@ -0,0 +1,153 @@
+"""
+基准: 本地模式下 worker 进程数与缓存命中吞吐量
+
+预先写入一批缓存条目，分别以 1..N 个 worker 启动 main.py (本地模式)，
+由独立的压测进程通过 keep-alive 连接并发请求已缓存的路径，报告每秒请求数和相对 1 个 worker 的倍数。
+压测进程与服务共用 CPU，worker 数超过空闲核心数后吞吐量不再增长
+
+用法: python benchmarks/bench_workers.py [--workers 1 2 4] [--entries 1000] [--connections 64] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import app_config  # noqa: E402
+from core import CacheManager  # noqa: E402
+
+TARGET = "http://bench.test"
+
+
+def populate(cache_dir: str, entries: int) -> None:
+    """写入缓存条目 (内容大小不同的 JS 文件)"""
+    app_config.cache_write_queue_size = 0
+    manager = CacheManager(cache_dir)
+    for i in range(entries):
+        manager.save_response(
+            f"{TARGET}/static/{i}.js",
+            "GET",
+            b"console.log(%d);" % i * (1 + i % 64),
+            {"content-type": "application/javascript"},
+        )
+
+
+def wait_for_port(port: int, timeout: float = 30) -> None:
+    """等待服务开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def run_client(port: int, connections: int, entries: int, seconds: float, completed) -> None:
+    """压测进程: 每个连接依次发送请求并读取完整响应"""
+
+    async def connection(seed: int) -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        rng = random.Random(seed)
+        count = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            path = f"/static/{rng.randrange(entries)}.js"
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: bench.test\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200"), head[:40]
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            count += 1
+        writer.close()
+        return count
+
+    async def main() -> int:
+        return sum(await asyncio.gather(*(connection(i) for i in range(connections))))
+
+    total = asyncio.run(main())
+    with completed.get_lock():
+        completed.value += total
+
+
+def measure(args: argparse.Namespace, cache_dir: str, workers: int) -> float:
+    """启动指定 worker 数的服务并压测，返回每秒请求数"""
+    server = subprocess.Popen(
+        [
+            sys.executable, "main.py",
+            "--mode", "local",
+            "--target", TARGET,
+            "--port", str(args.port),
+            "--cache-dir", cache_dir,
+            "--workers", str(workers),
+            "--log-level", "ERROR",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(args.port)
+        # 等待所有 worker 载入缓存索引
+        time.sleep(1 + workers * 0.5)
+        completed = multiprocessing.Value("q", 0)
+        per_client = max(1, args.connections // args.clients)
+        clients = [
+            multiprocessing.Process(
+                target=run_client,
+                args=(args.port, per_client, args.entries, args.seconds, completed),
+            )
+            for _ in range(args.clients)
+        ]
+        started = time.monotonic()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return completed.value / (time.monotonic() - started)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=2, help="压测进程数")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=9103)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        populate(cache_dir, args.entries)
+        print(
+            f"{os.cpu_count()} CPUs, {args.entries} cached entries, "
+            f"{args.connections} keep-alive connections from {args.clients} client processes, "
+            f"{args.seconds}s per run"
+        )
+        print(f"{'workers':>8}{'req/s':>10}{'scale':>8}")
+        baseline = None
+        for workers in args.workers:
+            rps = measure(args, cache_dir, workers)
+            baseline = baseline or rps
+            print(f"{workers:>8}{rps:>10.0f}{rps / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,29 @@ class RunMode(str, Enum):
     HYBRID = "hybrid"  # 半代理模式（优先本地，不存在则代理）
 
 
+class CacheWritePolicy(str, Enum):
+    """缓存写入队列已满时的处理策略"""
+
+    DROP = "drop"  # 丢弃本次写入
+    BLOCK = "block"  # 等待队列空出位置
+    SPILL = "spill"  # 由请求协程直接写入磁盘
+
+
+class CacheEvictionPolicy(str, Enum):
+    """磁盘缓存超出配额时的淘汰策略"""
+
+    LRU = "lru"  # 淘汰最久未访问的条目
+    LFU = "lfu"  # 淘汰访问次数最少的条目 (次数相同时淘汰最久未访问的)
+
+
+class PerformanceProfile(str, Enum):
+    """性能配置: 事件循环、HTTP 解析器和缓存元数据编解码器的选择"""
+
+    AUTO = "auto"  # 由 uvicorn 自动选择事件循环和 HTTP 解析器 (已安装时使用 uvloop / httptools)，元数据使用标准库 json
+    FAST = "fast"  # 使用 uvloop、httptools 和 orjson (未安装的组件回退到标准实现)
+    COMPAT = "compat"  # 只使用标准实现: asyncio、h11 和标准库 json
+
+
 class Config(BaseSettings):
     """应用配置"""
 
@@ -25,18 +48,140 @@ class Config(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
 
+    # 性能配置: auto (uvicorn 自动选择) / fast (uvloop + httptools + orjson) / compat (只用标准实现)
+    performance_profile: PerformanceProfile = PerformanceProfile.AUTO
+
+    # worker 进程数 (大于 1 时预先 fork 多个进程共享监听端口，通过缓存目录下的锁文件和索引协调)
+    workers: int = 1
+
     # 目标服务器配置 (仅反代模式使用)
     target_url: Optional[str] = None
 
     # 缓存目录配置
     cache_dir: str = "./cache"
 
+    # 缓存磁盘 I/O 线程数 (读写缓存文件的线程池大小)
+    cache_io_workers: int = 8
+
+    # 缓存写入后是否 fsync (更强的掉电保护，写入更慢)
+    cache_fsync: bool = False
+
+    # 后台缓存写入队列深度 (0 表示在请求中直接写入)
+    cache_write_queue_size: int = 1000
+
+    # 后台缓存写入任务数 (同一缓存键固定由其中一个任务按顺序写入)
+    cache_write_workers: int = 2
+
+    # 写入队列已满时的策略: drop (丢弃) / block (等待) / spill (直接写入)
+    cache_write_policy: CacheWritePolicy = CacheWritePolicy.BLOCK
+
+    # 半代理模式缓存新鲜度: 响应未声明 Cache-Control/Expires 时的默认新鲜期 (秒，未设置表示永不过期)
+    cache_default_ttl: Optional[int] = None
+
+    # 过期后仍可直接使用并在后台刷新的时间窗口 (秒，响应的 stale-while-revalidate 优先)
+    cache_stale_while_revalidate: int = 24 * 3600
+
+    # 上游请求失败时仍可使用过期缓存的时间窗口 (秒，响应的 stale-if-error 优先)
+    cache_stale_if_error: int = 7 * 24 * 3600
+
+    # 是否维护持久化缓存索引 (缓存目录下的 .index.sqlite)，查找未命中时无需访问文件系统，容量配额依赖索引；
+    # 索引就绪后不在索引中的键直接按未命中处理，只适合所有写入都经过本服务的缓存目录
+    # (手动或由其他程序放入的文件需要删除该文件重启以重建索引后才能命中)，因此默认关闭
+    cache_index: bool = False
+
+    # 未启用缓存索引时，用于快速判断未命中的布隆过滤器预计容纳的缓存键数量 (0 表示禁用)
+    cache_bloom_capacity: int = 1_000_000
+
+    # 相同内容的响应体 (不同 URL、POST 请求、预压缩变体) 通过硬链接共享同一份文件 (缓存目录下的 .blobs)
+    cache_dedup: bool = True
+
+    # 缓存键规范化 (保存和查找都生效，修改后已有缓存可能无法命中):
+    # 按参数名排序查询参数
+    cache_key_sort_params: bool = False
+    # 不参与缓存键的参数名，逗号分隔，支持通配符 (如 "_,utm_*")，同样作用于表单字段和 JSON 顶层键
+    cache_key_ignore_params: str = ""
+    # 规范化 JSON (键排序、去除空白) 和表单 (字段排序) 请求体
+    cache_key_canonical_body: bool = False
+    # 按路径生效的规则文件 (JSON 列表，每条规则含 match 以及 ignore_params / keep_params / sort_params / canonical_body)
+    cache_key_rules: Optional[str] = None
+
+    # 带参数 GET 和 POST 条目按哈希前缀分层的目录深度 (每层 256 个子目录，0 表示不分层，最大 4)；
+    # 分层前的旧布局仍可读取，可用 reshard.py 迁移
+    cache_shard_depth: int = 2
+
+    # 磁盘缓存配额: 全局和单个域名的总字节数、条目数 (0 表示不限制)
+    cache_max_size: int = 0
+    cache_max_entries: int = 0
+    cache_domain_max_size: int = 0
+    cache_domain_max_entries: int = 0
+
+    # 超出配额时的淘汰策略: lru (最久未访问) / lfu (访问次数最少)
+    cache_eviction_policy: CacheEvictionPolicy = CacheEvictionPolicy.LRU
+
+    # 后台淘汰任务的检查间隔 (秒)
+    cache_eviction_interval: float = 30.0
+
+    # 写入缓存时预压缩的编码，逗号分隔 (gzip / br / zstd，br 和 zstd 需要安装 brotli / zstandard，留空表示禁用)
+    precompress_encodings: str = "gzip,br,zstd"
+
+    # 响应体达到该字节数才预压缩
+    precompress_min_size: int = 1024
+
+    # 内存热缓存总字节数 (0 表示禁用)
+    memory_cache_size: int = 64 * 1024 * 1024
+
+    # 单个响应进入内存缓存的最大字节数
+    memory_cache_max_entry_size: int = 1024 * 1024
+
+    # 缓存文件达到该字节数时直接从文件分块读取发送，不读入内存
+    # (uvicorn 不提供 zerocopysend 扩展，实际通过 os.pread 分块发送，不是 sendfile)
+    file_response_threshold: int = 256 * 1024
+
+    # 镜像流量是否走原始 ASGI 快速路径 (不经过 FastAPI 路由和参数解析，自定义路由仍由 FastAPI 处理)
+    asgi_fast_path: bool = True
+
+    # 缓存统计接口路径 (留空表示禁用)
+    stats_path: str = "/_fastmirror/stats"
+
     # 定制化接口目录
     custom_routes_dir: str = "./custom_routes"
 
     # 超时配置
     request_timeout: int = 30
 
+    # 上游连接超时和读取超时 (秒，未设置时使用 request_timeout)
+    upstream_connect_timeout: Optional[float] = None
+    upstream_read_timeout: Optional[float] = None
+
+    # 上游连接池: 最大连接数、保持空闲的 keep-alive 连接数和空闲连接过期时间 (秒)
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry: float = 5.0
+
+    # 是否与上游使用 HTTP/2 (需要安装 h2: pip install httpx[http2])
+    upstream_http2: bool = False
+
+    # 启动时预先建立的上游连接数 (0 表示不预热)
+    upstream_prewarm_connections: int = 0
+
+    # 同时发往上游的最大请求数 (0 表示不限制)，超出时最多 upstream_max_queue 个请求排队等待，
+    # 队列已满或等待超过 upstream_queue_timeout 秒时返回 503
+    upstream_max_concurrency: int = 100
+    upstream_max_queue: int = 1000
+    upstream_queue_timeout: float = 10.0
+
+    # 熔断器: 连续 upstream_breaker_threshold 次连接错误、超时或 502/503/504 后打开 (0 表示不启用)，
+    # 打开期间直接返回 503 (半代理模式下返回已有缓存)，upstream_breaker_cooldown 秒后放行一个探测请求
+    upstream_breaker_threshold: int = 5
+    upstream_breaker_cooldown: float = 30.0
+
+    # 响应 Content-Length 达到该字节数时流式转发并边传边缓存，
+    # 未声明长度的响应缓冲到该字节数仍未读完时切换为流式 (0 表示始终缓冲)
+    stream_threshold: int = 1024 * 1024
+
+    # 半代理模式下带 Range 的请求未命中缓存时，是否在后台获取完整响应写入缓存
+    range_fill_on_miss: bool = False
+
     # 日志级别
     log_level: str = "INFO"
 
@@ -2,15 +2,43 @@
 Core 模块 - 处理器和缓存管理
 """
 
+from .asgi_app import FastPathApp
 from .base_handler import BaseHandler
 from .cache_manager import CacheManager
+from .cache_index import CacheIndex
+from .cache_evictor import CacheEvictor
+from .bloom_filter import BloomFilter
+from .blob_store import BlobStore
+from .key_normalizer import CacheKeyNormalizer
+from .memory_cache import MemoryCache
+from .write_queue import CacheWriteQueue
+from .upstream_guard import (
+    ConcurrencyLimiter,
+    CircuitBreaker,
+    UpstreamRejected,
+    UpstreamOverloaded,
+    CircuitOpenError,
+)
 from .proxy_handler import ProxyHandler
 from .local_handler import LocalHandler
 from .hybrid_handler import HybridHandler
 
 __all__ = [
+    "FastPathApp",
     "BaseHandler",
     "CacheManager",
+    "CacheIndex",
+    "CacheEvictor",
+    "BloomFilter",
+    "BlobStore",
+    "CacheKeyNormalizer",
+    "MemoryCache",
+    "CacheWriteQueue",
+    "ConcurrencyLimiter",
+    "CircuitBreaker",
+    "UpstreamRejected",
+    "UpstreamOverloaded",
+    "CircuitOpenError",
     "ProxyHandler",
     "LocalHandler",
     "HybridHandler",
@@ -0,0 +1,67 @@
+"""
+原始 ASGI 快速路径模块
+镜像流量 (catch-all 路由) 不经过 FastAPI 的路由匹配、参数解析和依赖注入，
+直接交给启动时按运行模式选定的处理器；其他路由和生命周期事件仍由 FastAPI 处理
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match
+from starlette.types import Receive, Scope, Send
+
+from utils import constants
+
+ASGIHandler = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class FastPathApp:
+    """包装 FastAPI 应用的 ASGI 入口"""
+
+    def __init__(self, app: FastAPI):
+        """
+        初始化入口
+
+        Args:
+            app: FastAPI 应用
+        """
+        self.app = app
+        # 镜像流量的处理器，设置前 (以及禁用快速路径时) 所有请求都交给 FastAPI
+        self.handler: Optional[ASGIHandler] = None
+        # catch-all 之外的路由 (自定义路由、统计接口、文档)，匹配时交给 FastAPI
+        self._routes: List[BaseRoute] = []
+
+    def set_handler(self, handler: Optional[ASGIHandler], catch_all: Callable[..., Any]) -> None:
+        """
+        设置镜像流量的处理器 (启动时调用一次，此后路由表不再变化)
+
+        Args:
+            handler: 当前运行模式处理器的 ASGI 入口 (None 表示全部交给 FastAPI)
+            catch_all: catch-all 路由的端点函数，快速路径接管该路由
+        """
+        self._routes = [
+            route
+            for route in self.app.router.routes
+            if getattr(route, "endpoint", None) is not catch_all
+        ]
+        self.handler = handler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        handler = self.handler
+        if (
+            handler is None
+            or scope["type"] != "http"
+            or scope["method"] not in constants.MIRROR_METHODS
+            or self._matches_route(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+        await handler(scope, receive, send)
+
+    def _matches_route(self, scope: Scope) -> bool:
+        """请求是否完整匹配 catch-all 之外的路由 (路径相同但方法不同时仍由 catch-all 处理)"""
+        for route in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return True
+        return False
@@ -2,14 +2,18 @@
 Handler 基类，提供公共功能
 """
 
+import functools
 import logging
 import mimetypes
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterable, Awaitable, Callable
 from abc import ABC, abstractmethod
 
 from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
 
 from utils import HttpUtil, constants
+from .file_response import CachedFileResponse, FileIdentity
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,33 @@ class BaseHandler(ABC):
         """
         pass
 
+    async def handle_asgi(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        原始 ASGI 入口 (快速路径)，不经过 FastAPI 的路由匹配、参数解析和依赖注入
+
+        Request 只是 scope 的轻量包装，请求头、查询参数和请求体按需从 scope 和 receive 读取
+
+        Args:
+            scope: ASGI scope
+            receive: ASGI receive
+            send: ASGI send
+        """
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        response = await self.handle_request(Request(scope, receive), path[1:])
+        await response(scope, receive, send)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取处理器的运行统计信息，子类可按需覆盖
+
+        Returns:
+            统计信息字典
+        """
+        return {}
+
     @staticmethod
     def build_full_url(base_url: str, path: str, query: Optional[str] = None) -> str:
         """
@@ -46,6 +77,20 @@ class BaseHandler(ABC):
         """
         return HttpUtil.build_full_url(base_url, path, query)
 
+    @staticmethod
+    def get_query(request: Request) -> Optional[str]:
+        """
+        读取原始查询参数字符串 (直接取自 scope，不构造 URL 对象)
+
+        Args:
+            request: FastAPI 请求对象
+
+        Returns:
+            查询参数字符串，没有查询参数时返回 None
+        """
+        query_string = request.scope["query_string"]
+        return query_string.decode("latin-1") if query_string else None
+
     @staticmethod
     async def read_request_body(request: Request) -> bytes:
         """
@@ -59,6 +104,33 @@ class BaseHandler(ABC):
         """
         return await request.body()
 
+    @staticmethod
+    def prepare_headers(
+        headers: Optional[Dict[str, str]], path: Optional[str] = None
+    ) -> tuple[Dict[str, str], str]:
+        """
+        复制响应头并补全 Content-Type
+
+        Args:
+            headers: 响应头字典
+            path: 请求路径（用于推测 MIME 类型）
+
+        Returns:
+            (响应头副本, Content-Type) 元组
+        """
+        # 复制一份，避免修改缓存中共享的 headers 字典
+        headers = dict(headers) if headers else {}
+
+        # 如果没有 Content-Type，尝试根据路径猜测
+        if "content-type" not in headers and path:
+            guessed_type, _ = mimetypes.guess_type(path)
+            if guessed_type:
+                headers["content-type"] = guessed_type
+
+        # 如果仍然没有 Content-Type，使用默认值
+        content_type = headers.get("content-type", constants.DEFAULT_MIME_TYPE)
+        return headers, content_type
+
     @staticmethod
     def build_response(
         content: bytes,
@@ -78,18 +150,317 @@ class BaseHandler(ABC):
         Returns:
             FastAPI 响应对象
         """
-        headers = headers or {}
+        headers, content_type = BaseHandler.prepare_headers(headers, path)
 
-        # 如果没有 Content-Type，尝试根据路径猜测
-        if "content-type" not in headers and path:
-            guessed_type, _ = mimetypes.guess_type(path)
-            if guessed_type:
-                headers["content-type"] = guessed_type
+        return Response(
+            content=content,
+            status_code=status_code,
+            headers=headers,
+            media_type=content_type,
+        )
 
-        # 如果仍然没有 Content-Type，使用默认值
-        content_type = headers.get("content-type", constants.DEFAULT_MIME_TYPE)
+    @staticmethod
+    def build_file_response(
+        file_path: str,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        path: Optional[str] = None,
+        offset: int = 0,
+        length: Optional[int] = None,
+        identity: Optional[FileIdentity] = None,
+        fallback: Optional[Callable[[], Awaitable[Response]]] = None,
+    ) -> CachedFileResponse:
+        """
+        构建直接发送缓存文件的响应对象
+
+        Args:
+            file_path: 缓存文件路径
+            status_code: HTTP 状态码
+            headers: 响应头字典
+            path: 请求路径（用于推测 MIME 类型）
+            offset: 响应体在文件中的起始偏移
+            length: 响应体长度（可选，默认到文件末尾）
+            identity: 查找缓存时记录的文件标识（可选，发送前校验文件未被替换）
+            fallback: 文件已被替换时生成替代响应的协程函数（可选）
+
+        Returns:
+            缓存文件响应对象
+        """
+        headers, content_type = BaseHandler.prepare_headers(headers, path)
+
+        return CachedFileResponse(
+            file_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=content_type,
+            offset=offset,
+            length=length,
+            identity=identity,
+            fallback=fallback,
+        )
+
+    def _file_fallback(
+        self, request: Optional[Request], path: Optional[str], cache_key: Optional[str] = None
+    ) -> Optional[Callable[[], Awaitable[Response]]]:
+        """
+        缓存文件在查找后被并发写入或淘汰替换时，重新处理请求生成响应
+
+        Args:
+            request: FastAPI 请求对象
+            path: 请求路径
+            cache_key: 条目的缓存键 (重新处理前使内存缓存中的旧副本失效)
+
+        Returns:
+            生成替代响应的协程函数，没有请求对象时返回 None
+        """
+        if request is None or path is None:
+            return None
+        return functools.partial(self._retry_changed_file, request, path, cache_key)
+
+    async def _retry_changed_file(
+        self, request: Request, path: str, cache_key: Optional[str]
+    ) -> Response:
+        """
+        文件已被替换: 丢弃内存缓存中指向旧文件的条目后重新处理请求
+
+        其他 worker 替换的文件在索引同步前仍留在本进程的内存缓存中，
+        不丢弃时重新处理会再次得到旧条目，最终返回 503
+
+        Args:
+            request: FastAPI 请求对象
+            path: 请求路径
+            cache_key: 条目的缓存键
 
+        Returns:
+            FastAPI 响应对象
+        """
+        cache_manager = getattr(self, "cache_manager", None)
+        if cache_key is not None and cache_manager is not None:
+            cache_manager.memory_cache.invalidate(cache_key)
+        return await self.handle_request(request, path)
+
+    def build_cached_response(
+        self,
+        cached_response: Dict[str, Any],
+        path: Optional[str] = None,
+        request: Optional[Request] = None,
+    ) -> Response:
+        """
+        根据缓存条目构建响应，大文件条目直接从文件发送
+
+        提供请求对象时按 Accept-Encoding 发送预压缩变体，处理客户端的条件请求
+        (缓存未变化时返回不带响应体的 304) 和单个字节范围的 Range 请求 (206)
+
+        Args:
+            cached_response: CacheManager 返回的缓存条目
+            path: 请求路径（用于推测 MIME 类型）
+            request: FastAPI 请求对象（可选，用于内容协商、条件请求和范围请求）
+
+        Returns:
+            FastAPI 响应对象
+        """
+        headers = dict(cached_response["headers"])
+        status_code = cached_response["status_code"]
+        etag = cached_response.get("etag")
+        variants = cached_response.get("variants")
+
+        # 只对 GET 的 200 响应处理 Range，范围请求始终基于未压缩内容
+        range_header = None
+        if (
+            request is not None
+            and request.method.upper() == constants.HTTP_METHOD_GET
+            and status_code == constants.HTTP_STATUS_OK
+        ):
+            range_header = request.headers.get("range")
+
+        # 按 Accept-Encoding 选择预压缩变体，压缩后的字节原样发送
+        encoding = None
+        if variants:
+            headers["vary"] = HttpUtil.add_vary(headers.get("vary"), "Accept-Encoding")
+            if request is not None and not range_header:
+                encoding = HttpUtil.negotiate_encoding(
+                    request.headers.get("accept-encoding"),
+                    variants,
+                    constants.PRECOMPRESS_ENCODINGS,
+                )
+
+        if etag:
+            # 对外使用缓存层根据内容计算的 ETag，各压缩变体使用独立的 ETag
+            headers["etag"] = HttpUtil.variant_etag(etag, encoding) if encoding else etag
+
+        if request is not None and self.is_not_modified(request, status_code, headers):
+            return self.build_not_modified_response(headers)
+
+        if encoding:
+            headers["content-encoding"] = encoding
+            return self.build_file_response(
+                file_path=variants[encoding]["file_path"],
+                status_code=status_code,
+                headers=headers,
+                path=path,
+                length=variants[encoding]["length"],
+                identity=variants[encoding].get("identity"),
+                fallback=self._file_fallback(request, path, cached_response.get("cache_key")),
+            )
+
+        if status_code == constants.HTTP_STATUS_OK:
+            headers["accept-ranges"] = "bytes"
+        if range_header and HttpUtil.if_range_matches(
+            request.headers.get("if-range"), headers.get("etag"), headers.get("last-modified")
+        ):
+            size = (
+                cached_response["length"]
+                if "file_path" in cached_response
+                else len(cached_response["content"])
+            )
+            try:
+                byte_range = HttpUtil.parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=constants.HTTP_STATUS_RANGE_NOT_SATISFIABLE,
+                    headers={"content-range": f"bytes */{size}"},
+                )
+            if byte_range is not None:
+                return self.build_range_response(
+                    cached_response, headers, path, *byte_range, size, request
+                )
+
+        if "file_path" in cached_response:
+            return self.build_file_response(
+                file_path=cached_response["file_path"],
+                status_code=status_code,
+                headers=headers,
+                path=path,
+                offset=cached_response.get("offset", 0),
+                length=cached_response.get("length"),
+                identity=cached_response.get("identity"),
+                fallback=self._file_fallback(request, path, cached_response.get("cache_key")),
+            )
+        return self.build_response(
+            content=cached_response["content"],
+            status_code=status_code,
+            headers=headers,
+            path=path,
+        )
+
+    def build_range_response(
+        self,
+        cached_response: Dict[str, Any],
+        headers: Dict[str, str],
+        path: Optional[str],
+        start: int,
+        end: int,
+        size: int,
+        request: Optional[Request] = None,
+    ) -> Response:
+        """
+        构建 206 部分内容响应，文件条目直接定位到文件偏移发送，不读入整个文件
+
+        Args:
+            cached_response: 缓存条目
+            headers: 已处理的响应头
+            path: 请求路径（用于推测 MIME 类型）
+            start: 起始字节位置
+            end: 结束字节位置 (包含)
+            size: 内容总长度
+            request: FastAPI 请求对象（可选，文件已被替换时用于重新处理请求）
+
+        Returns:
+            FastAPI 响应对象
+        """
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        if "file_path" in cached_response:
+            return self.build_file_response(
+                file_path=cached_response["file_path"],
+                status_code=constants.HTTP_STATUS_PARTIAL_CONTENT,
+                headers=headers,
+                path=path,
+                offset=cached_response.get("offset", 0) + start,
+                length=end - start + 1,
+                identity=cached_response.get("identity"),
+                fallback=self._file_fallback(request, path, cached_response.get("cache_key")),
+            )
+        return self.build_response(
+            content=cached_response["content"][start : end + 1],
+            status_code=constants.HTTP_STATUS_PARTIAL_CONTENT,
+            headers=headers,
+            path=path,
+        )
+
+    @staticmethod
+    def is_not_modified(request: Request, status_code: int, headers: Dict[str, str]) -> bool:
+        """
+        判断客户端的条件请求是否命中 (客户端已持有相同版本)
+
+        If-None-Match 优先于 If-Modified-Since，只处理 GET/HEAD 的 200 响应
+
+        Args:
+            request: FastAPI 请求对象
+            status_code: 缓存的状态码
+            headers: 缓存的响应头
+
+        Returns:
+            是否应返回 304
+        """
+        if request.method.upper() not in (constants.HTTP_METHOD_GET, constants.HTTP_METHOD_HEAD):
+            return False
+        if status_code != constants.HTTP_STATUS_OK:
+            return False
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return HttpUtil.etag_matches(if_none_match, headers.get("etag"))
+
+        if_modified_since = HttpUtil.parse_http_date(request.headers.get("if-modified-since"))
+        last_modified = HttpUtil.parse_http_date(headers.get("last-modified"))
+        return (
+            if_modified_since is not None
+            and last_modified is not None
+            and last_modified <= if_modified_since
+        )
+
+    @staticmethod
+    def build_not_modified_response(headers: Dict[str, str]) -> Response:
+        """
+        构建不带响应体的 304 响应
+
+        Args:
+            headers: 缓存的响应头
+
+        Returns:
+            FastAPI 响应对象
+        """
         return Response(
+            status_code=constants.HTTP_STATUS_NOT_MODIFIED,
+            headers={
+                name: value
+                for name, value in headers.items()
+                if name in constants.NOT_MODIFIED_HEADERS
+            },
+        )
+
+    @staticmethod
+    def build_streaming_response(
+        content: AsyncIterable[bytes],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        path: Optional[str] = None,
+    ) -> StreamingResponse:
+        """
+        构建流式响应对象
+
+        Args:
+            content: 响应内容的异步迭代器
+            status_code: HTTP 状态码
+            headers: 响应头字典
+            path: 请求路径（用于推测 MIME 类型）
+
+        Returns:
+            FastAPI 流式响应对象
+        """
+        headers, content_type = BaseHandler.prepare_headers(headers, path)
+
+        return StreamingResponse(
             content=content,
             status_code=status_code,
             headers=headers,
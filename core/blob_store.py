@@ -0,0 +1,204 @@
+"""
+内容寻址的响应体存储模块
+相同内容的响应体只保存一份，各缓存文件通过硬链接共享同一个 inode (磁盘空间和页缓存都只占一份)
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    按内容哈希保存响应体，引用计数即文件的硬链接数
+
+    存储目录中的文件名为内容哈希，缓存文件是它的硬链接；
+    硬链接数为 1 (只剩存储目录中的这一个) 时说明已无缓存引用，由垃圾回收删除。
+    删除存储中的文件不影响已链接的缓存文件，因此回收和写入之间不需要加锁
+    """
+
+    def __init__(self, root: Path):
+        """
+        初始化存储
+
+        Args:
+            root: 存储目录
+        """
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        # 文件系统不支持硬链接时自动停用 (缓存文件按普通文件保存)
+        self.enabled = True
+
+        self.stored = 0
+        self.deduplicated = 0
+        self.deduplicated_bytes = 0
+        self.collected = 0
+        self.collected_bytes = 0
+        # 存储占用: 写入和链接时累加，垃圾回收时按实际链接数重新统计
+        # (缓存文件被替换或删除释放的引用要到下次回收才会计入)
+        self._usage: Dict[str, int] = {
+            "blobs": 0,
+            "physical_bytes": 0,
+            "logical_bytes": 0,
+            "saved_bytes": 0,
+        }
+
+    @staticmethod
+    def digest_from_etag(etag: Optional[str]) -> Optional[str]:
+        """
+        从缓存层计算的强 ETag 中取出内容哈希
+
+        Args:
+            etag: ETag 字符串 (如 '"0b4661484ed1cc8e28c4a7f18e8b1019"')
+
+        Returns:
+            十六进制内容哈希，不是内容哈希格式的 ETag 返回 None
+        """
+        if not etag or not (etag.startswith('"') and etag.endswith('"')):
+            return None
+        digest = etag[1:-1]
+        if len(digest) != 32 or any(char not in "0123456789abcdef" for char in digest):
+            return None
+        return digest
+
+    def path(self, key: str) -> Path:
+        """
+        存储中的文件路径 (按哈希前两位分目录)
+
+        Args:
+            key: 内容哈希 (预压缩变体为 "{哈希}.{编码}")
+
+        Returns:
+            文件路径
+        """
+        return self.root / key[:2] / key
+
+    def link(self, key: str, temp_path: Path) -> bool:
+        """
+        已有相同内容时，创建指向它的硬链接 (通常是缓存路径旁的临时文件，之后原子替换到缓存路径)
+
+        Args:
+            key: 内容哈希
+            temp_path: 要创建的链接路径
+
+        Returns:
+            是否已创建，存储中没有该内容时返回 False
+        """
+        if not self.enabled:
+            return False
+        try:
+            os.link(self.path(key), temp_path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self._disable(e)
+            return False
+        size = os.stat(temp_path).st_size
+        self.deduplicated += 1
+        self.deduplicated_bytes += size
+        self._usage["logical_bytes"] += size
+        self._usage["saved_bytes"] += size
+        return True
+
+    def add(self, key: str, temp_path: Path) -> None:
+        """
+        将已写好的临时文件加入存储 (建立硬链接，临时文件仍由调用方替换到缓存路径)
+
+        已有相同内容时不做任何操作
+
+        Args:
+            key: 内容哈希
+            temp_path: 内容文件
+        """
+        if not self.enabled:
+            return
+        blob_path = self.path(key)
+        try:
+            blob_path.parent.mkdir(exist_ok=True)
+            os.link(temp_path, blob_path)
+            size = os.stat(blob_path).st_size
+            self.stored += 1
+            self._usage["blobs"] += 1
+            self._usage["physical_bytes"] += size
+            self._usage["logical_bytes"] += size
+        except FileExistsError:
+            pass
+        except OSError as e:
+            self._disable(e)
+
+    def deduplicate(self, key: str, temp_path: Path) -> None:
+        """
+        对已写好的临时文件去重: 已有相同内容时将其替换为指向该内容的硬链接 (释放重复的数据)，
+        否则加入存储
+
+        Args:
+            key: 内容哈希
+            temp_path: 内容文件
+        """
+        swap_path = temp_path.with_name(temp_path.name + constants.CACHE_FILE_EXTENSION_TEMP)
+        if self.link(key, swap_path):
+            os.replace(swap_path, temp_path)
+        else:
+            self.add(key, temp_path)
+
+    def _disable(self, error: OSError) -> None:
+        """文件系统不支持硬链接，停用去重"""
+        if self.enabled:
+            self.enabled = False
+            logger.warning(f"Hard links unavailable in {self.root}, body deduplication disabled: {error}")
+
+    def collect_garbage(self) -> int:
+        """
+        删除已没有缓存文件引用的内容 (硬链接数为 1)，同时统计存储占用和节省的空间
+
+        Returns:
+            删除的文件数
+        """
+        usage = {"blobs": 0, "physical_bytes": 0, "logical_bytes": 0, "saved_bytes": 0}
+        collected = 0
+        for dir_path, _, file_names in os.walk(self.root):
+            for name in file_names:
+                blob_path = os.path.join(dir_path, name)
+                try:
+                    stat_result = os.stat(blob_path)
+                except FileNotFoundError:
+                    continue
+                if stat_result.st_nlink <= 1:
+                    try:
+                        os.unlink(blob_path)
+                    except FileNotFoundError:
+                        continue
+                    collected += 1
+                    self.collected_bytes += stat_result.st_size
+                    continue
+                references = stat_result.st_nlink - 1
+                usage["blobs"] += 1
+                usage["physical_bytes"] += stat_result.st_size
+                usage["logical_bytes"] += stat_result.st_size * references
+                usage["saved_bytes"] += stat_result.st_size * (references - 1)
+        self.collected += collected
+        self._usage = usage
+        return collected
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取存储统计信息
+
+        Returns:
+            包含存储占用 (内容数、实际字节数、各缓存文件合计字节数、节省的字节数)
+            以及写入去重和回收计数的字典
+        """
+        return {
+            "enabled": self.enabled,
+            **self._usage,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "deduplicated_bytes": self.deduplicated_bytes,
+            "collected": self.collected,
+            "collected_bytes": self.collected_bytes,
+        }
@@ -0,0 +1,91 @@
+"""
+布隆过滤器模块
+以很小的内存判断缓存键是否一定不存在，未命中的请求无需访问文件系统
+"""
+
+import hashlib
+import math
+import threading
+from typing import Any, Dict
+
+from utils import constants
+
+
+class BloomFilter:
+    """
+    线程安全的布隆过滤器 (只增不删)
+
+    不存在假阴性: 添加过的键一定判定为可能存在；
+    已删除的键和少量误判的键判定为可能存在，由调用方按正常流程查找
+    """
+
+    def __init__(self, capacity: int, error_rate: float = constants.BLOOM_FILTER_ERROR_RATE):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity: 预计的键数量，超出后误判率上升
+            error_rate: 达到预计数量时的误判率
+        """
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(
+            8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+        # 启动扫描完成前过滤器不完整，不能用于判断未命中
+        self.ready = False
+
+    def _positions(self, key: str) -> list[int]:
+        """计算键对应的位下标 (双重哈希)"""
+        digest = hashlib.blake2b(key.encode(constants.ENCODING_UTF8), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        """
+        添加键
+
+        Args:
+            key: 缓存键
+        """
+        positions = self._positions(key)
+        with self._lock:
+            added = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取过滤器统计信息
+
+        Returns:
+            包含容量、键数量、内存占用和当前估算误判率的字典
+        """
+        estimated_error = (
+            1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        ) ** self.num_hashes
+        return {
+            "ready": self.ready,
+            "capacity": self.capacity,
+            "count": self.count,
+            "bytes": len(self._bits),
+            "hashes": self.num_hashes,
+            "error_rate": round(estimated_error, 6),
+        }
@@ -0,0 +1,165 @@
+"""
+磁盘缓存淘汰模块
+后台任务按索引检查全局和各域名的配额，超出时按 LRU 或 LFU 删除条目
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import CacheEvictionPolicy
+from utils import constants
+from .cache_index import CacheIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEvictor:
+    """磁盘缓存淘汰任务"""
+
+    def __init__(
+        self,
+        index: CacheIndex,
+        delete_func: Callable[[str], bool],
+        run_io: Callable[..., Awaitable[Any]],
+        policy: CacheEvictionPolicy,
+        interval: float,
+        max_bytes: int = 0,
+        max_entries: int = 0,
+        domain_max_bytes: int = 0,
+        domain_max_entries: int = 0,
+    ):
+        """
+        初始化淘汰任务
+
+        Args:
+            index: 缓存索引
+            delete_func: 删除缓存条目的同步函数，参数为缓存键，返回是否已删除
+            run_io: 在 I/O 线程池中执行同步函数的协程函数
+            policy: 淘汰策略
+            interval: 检查间隔 (秒)
+            max_bytes: 全局字节数配额 (0 表示不限制)
+            max_entries: 全局条目数配额
+            domain_max_bytes: 单个域名的字节数配额
+            domain_max_entries: 单个域名的条目数配额
+        """
+        self.index = index
+        self.delete_func = delete_func
+        self.run_io = run_io
+        self.policy = policy
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.domain_max_bytes = domain_max_bytes
+        self.domain_max_entries = domain_max_entries
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.passes = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+
+    def start(self) -> None:
+        """启动后台淘汰任务 (需要运行中的事件循环)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="cache-evictor")
+
+    async def _run(self) -> None:
+        """后台任务: 定期检查配额"""
+        while True:
+            try:
+                evicted = await self.run_io(self.evict_once)
+            except Exception as e:
+                logger.error(f"缓存淘汰失败: {e}")
+                evicted = 0
+            # 一轮淘汰满额说明仍可能超出配额，短暂让出 I/O 线程池和索引锁后继续
+            if evicted < constants.CACHE_EVICT_BATCH:
+                await asyncio.sleep(self.interval)
+            else:
+                await asyncio.sleep(constants.CACHE_EVICT_BATCH_PAUSE)
+
+    def evict_once(self) -> int:
+        """
+        执行一轮淘汰: 先处理超出配额的域名，再处理全局配额 (索引就绪前跳过)
+
+        Returns:
+            本轮淘汰的条目数
+        """
+        if not self.index.ready:
+            return 0
+        self.passes += 1
+        evicted = 0
+        if self.domain_max_bytes or self.domain_max_entries:
+            for domain in self.index.domains():
+                evicted += self._enforce(
+                    self.domain_max_bytes, self.domain_max_entries, domain
+                )
+        if self.max_bytes or self.max_entries:
+            evicted += self._enforce(self.max_bytes, self.max_entries)
+        return evicted
+
+    def _enforce(self, max_bytes: int, max_entries: int, domain: Optional[str] = None) -> int:
+        """
+        超出配额时淘汰条目，直到低于配额的 CACHE_EVICT_LOW_WATERMARK
+
+        Args:
+            max_bytes: 字节数配额 (0 表示不限制)
+            max_entries: 条目数配额 (0 表示不限制)
+            domain: 域名 (None 表示全局)
+
+        Returns:
+            淘汰的条目数
+        """
+        usage_bytes, count = self.index.usage(domain)
+        excess_bytes = excess_entries = 0
+        if max_bytes and usage_bytes > max_bytes:
+            excess_bytes = usage_bytes - int(max_bytes * constants.CACHE_EVICT_LOW_WATERMARK)
+        if max_entries and count > max_entries:
+            excess_entries = count - int(max_entries * constants.CACHE_EVICT_LOW_WATERMARK)
+        if excess_bytes <= 0 and excess_entries <= 0:
+            return 0
+
+        victims = self.index.select_victims(
+            constants.CACHE_EVICT_BATCH,
+            time.time() - constants.CACHE_EVICT_MIN_IDLE,
+            domain,
+        )
+        evicted = 0
+        for key, size in victims:
+            if excess_bytes <= 0 and excess_entries <= 0:
+                break
+            if not self.delete_func(key):
+                continue
+            evicted += 1
+            self.evicted += 1
+            self.evicted_bytes += size
+            excess_bytes -= size
+            excess_entries -= 1
+
+        if evicted:
+            logger.info(f"Evicted {evicted} cache entries ({domain or 'global'} quota)")
+        return evicted
+
+    async def close(self) -> None:
+        """停止后台淘汰任务"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取淘汰统计信息
+
+        Returns:
+            包含淘汰策略、配额和淘汰计数的字典
+        """
+        return {
+            "policy": self.policy.value,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "passes": self.passes,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+        }
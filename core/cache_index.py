@@ -0,0 +1,683 @@
+"""
+磁盘缓存索引模块
+记录每个缓存条目的位置、占用字节数、状态码、响应头、获取时间和访问情况，
+持久化到缓存目录下的 SQLite 文件，启动时载入内存，查找和淘汰都无需访问缓存目录
+"""
+
+import bisect
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CacheEvictionPolicy
+from utils import JsonUtil, constants
+
+
+class CacheIndexEntry:
+    """单个缓存条目的索引记录 (响应头只保存在 SQLite 中)"""
+
+    __slots__ = ("domain", "size", "last_access", "hits", "status_code", "fetched_at")
+
+    def __init__(
+        self,
+        domain: str,
+        size: int,
+        last_access: float,
+        hits: int = 0,
+        status_code: Optional[int] = None,
+        fetched_at: Optional[float] = None,
+    ):
+        self.domain = domain
+        self.size = size
+        self.last_access = last_access
+        self.hits = hits
+        self.status_code = status_code
+        self.fetched_at = fetched_at
+
+
+class EvictionOrder:
+    """
+    淘汰顺序: 按访问次数分层 (LRU 只有一层)，每层是按最后访问时间排列的 OrderedDict
+
+    增删和命中都是 O(1)；选出 k 个候选只需从访问次数最少的层、最早访问的条目开始遍历，
+    不需要扫描全部条目。非递增的访问时间 (扫描缓存目录、同步其他 worker) 只标记该层待排序，
+    在下次选择时排序一次
+    """
+
+    def __init__(self, by_hits: bool):
+        """
+        初始化淘汰顺序
+
+        Args:
+            by_hits: 是否按访问次数分层 (LFU)，否则所有条目在同一层 (LRU)
+        """
+        self.by_hits = by_hits
+        self._levels: Dict[int, "OrderedDict[str, CacheIndexEntry]"] = {}
+        # 已有的层 (升序)
+        self._level_keys: List[int] = []
+        self._unsorted: set[int] = set()
+
+    def _level(self, entry: CacheIndexEntry) -> int:
+        """条目所在的层"""
+        return entry.hits if self.by_hits else 0
+
+    def add(self, key: str, entry: CacheIndexEntry) -> None:
+        """
+        添加条目 (放在所在层的末尾)
+
+        Args:
+            key: 缓存键
+            entry: 索引记录
+        """
+        level = self._level(entry)
+        bucket = self._levels.get(level)
+        if bucket is None:
+            bucket = self._levels[level] = OrderedDict()
+            bisect.insort(self._level_keys, level)
+        elif bucket and next(reversed(bucket.values())).last_access > entry.last_access:
+            self._unsorted.add(level)
+        bucket[key] = entry
+
+    def discard(self, key: str, entry: CacheIndexEntry) -> None:
+        """
+        移除条目 (必须在修改 hits 之前调用)
+
+        Args:
+            key: 缓存键
+            entry: 索引记录
+        """
+        level = self._level(entry)
+        bucket = self._levels.get(level)
+        if bucket is None or bucket.pop(key, None) is None:
+            return
+        if not bucket:
+            del self._levels[level]
+            self._level_keys.pop(bisect.bisect_left(self._level_keys, level))
+            self._unsorted.discard(level)
+
+    def select(self, limit: int, idle_before: float) -> List[Tuple[str, int]]:
+        """
+        按顺序选出最先淘汰的条目
+
+        Args:
+            limit: 最多返回的条目数
+            idle_before: 只选择最后访问时间早于该时间戳的条目
+
+        Returns:
+            [(缓存键, 占用字节数)]，最先淘汰的在前
+        """
+        victims: List[Tuple[str, int]] = []
+        for level in self._level_keys:
+            bucket = self._levels[level]
+            if level in self._unsorted:
+                ordered = sorted(bucket.items(), key=lambda item: item[1].last_access)
+                bucket.clear()
+                bucket.update(ordered)
+                self._unsorted.discard(level)
+            for key, entry in bucket.items():
+                # 层内按访问时间排列，之后的条目都在最近访问过
+                if entry.last_access >= idle_before:
+                    break
+                victims.append((key, entry.size))
+                if len(victims) >= limit:
+                    return victims
+        return victims
+
+
+class CacheIndex:
+    """
+    线程安全的缓存条目索引，按域名汇总占用
+
+    内存中的记录是查找的唯一依据；变更先记在内存中，由 flush 批量写入 SQLite。
+    正常关闭时标记为干净，下次启动直接载入；文件缺失或上次未正常关闭时需要重新扫描缓存目录。
+
+    多 worker 共享同一个 SQLite 文件: 由主 worker 调用 open 载入 (或扫描后) 并 mark_ready，
+    其他 worker 调用 attach 载入；每次 flush 分配递增的序号，sync 按序号拉取其他 worker 的变更
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        policy: CacheEvictionPolicy = CacheEvictionPolicy.LRU,
+    ):
+        """
+        初始化索引
+
+        Args:
+            db_path: SQLite 文件路径 (None 表示只在内存中维护，不持久化)
+            policy: 淘汰策略 (决定 select_victims 使用的顺序)
+        """
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self._entries: Dict[str, CacheIndexEntry] = {}
+        # 域名 -> [总字节数, 条目数]
+        self._domains: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+
+        # 全局和各域名的淘汰顺序
+        self._by_hits = policy == CacheEvictionPolicy.LFU
+        self._order = EvictionOrder(self._by_hits)
+        self._domain_orders: Dict[str, EvictionOrder] = {}
+
+        # 尚未写入 SQLite 的变更
+        self._dirty: set[str] = set()
+        self._removed: set[str] = set()
+        self._pending_headers: Dict[str, str] = {}
+
+        # 已同步到的变更序号
+        self._seq = 0
+        # 是否负责标记正常关闭 (多 worker 时只有主 worker 负责)
+        self.owner = True
+
+        # 载入或扫描完成前索引不完整，查找需要回退到文件系统
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开 SQLite 连接 (调用方持有 _db_lock)"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        return self._db
+
+    def open(self) -> bool:
+        """
+        打开 SQLite 文件并载入全部记录
+
+        Returns:
+            索引是否完整 (上次正常关闭)；返回 False 时调用方需要扫描缓存目录
+        """
+        if self.db_path is None:
+            return False
+
+        with self._db_lock:
+            db = self._connect()
+            with db:
+                version = db.execute("PRAGMA user_version").fetchone()[0]
+                if version != constants.CACHE_INDEX_SCHEMA_VERSION:
+                    db.execute("DROP TABLE IF EXISTS entries")
+                    db.execute("DROP TABLE IF EXISTS removed")
+                    db.execute("DROP TABLE IF EXISTS state")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, domain TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "status_code INTEGER, headers TEXT, fetched_at REAL, "
+                    "last_access REAL NOT NULL, hits INTEGER NOT NULL, seq INTEGER NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS entries_domain ON entries (domain)")
+                db.execute("CREATE INDEX IF NOT EXISTS entries_seq ON entries (seq)")
+                # 已删除条目的记录，供其他 worker 同步删除
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS removed ("
+                    "key TEXT PRIMARY KEY, seq INTEGER NOT NULL, removed_at REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS removed_seq ON removed (seq)")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT)"
+                )
+                db.execute(f"PRAGMA user_version={constants.CACHE_INDEX_SCHEMA_VERSION}")
+
+                row = db.execute("SELECT value FROM state WHERE name = 'clean'").fetchone()
+                clean = row is not None and row[0] == "1"
+                # 运行期间标记为未正常关闭，崩溃后下次启动会重新扫描
+                db.execute("INSERT OR REPLACE INTO state VALUES ('clean', '0')")
+                # 载入完成 (mark_ready) 前其他 worker 不能载入
+                db.execute("INSERT OR REPLACE INTO state VALUES ('ready', '')")
+                db.execute("INSERT OR IGNORE INTO state VALUES ('seq', '0')")
+
+                if not clean:
+                    db.execute("DELETE FROM entries")
+                    db.execute("DELETE FROM removed")
+                    return False
+
+        self._load_rows()
+        return True
+
+    def attach(self, token: str) -> bool:
+        """
+        其他 worker 载入主 worker 已准备好的索引
+
+        Args:
+            token: 主 worker 的标识
+
+        Returns:
+            是否已载入，主 worker 尚未完成载入或扫描时返回 False
+        """
+        if self.db_path is None or not self.db_path.exists():
+            return False
+        with self._db_lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT value FROM state WHERE name = 'ready'"
+                ).fetchone()
+            except sqlite3.OperationalError:
+                # 主 worker 尚未建表
+                return False
+        if row is None or row[0] != token:
+            return False
+        self._load_rows()
+        return True
+
+    def mark_ready(self, token: str) -> None:
+        """
+        主 worker 完成载入或扫描 (并已 flush) 后调用，允许其他 worker 载入
+
+        Args:
+            token: 主 worker 的标识
+        """
+        if self._db is None:
+            return
+        with self._db_lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO state VALUES ('ready', ?)", (token,))
+            row = self._db.execute("SELECT value FROM state WHERE name = 'seq'").fetchone()
+        with self._lock:
+            self._seq = max(self._seq, int(row[0]))
+
+    def _load_rows(self) -> None:
+        """载入全部记录 (同一快照内读取当前序号)"""
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                row = self._db.execute("SELECT value FROM state WHERE name = 'seq'").fetchone()
+                rows = self._db.execute(
+                    "SELECT key, domain, size, status_code, fetched_at, last_access, hits FROM entries"
+                ).fetchall()
+            finally:
+                self._db.execute("COMMIT")
+
+        with self._lock:
+            for key, domain, size, status_code, fetched_at, last_access, hits in rows:
+                # 载入期间新写入的记录优先
+                if key not in self._entries:
+                    self._insert(
+                        key,
+                        CacheIndexEntry(domain, size, last_access, hits, status_code, fetched_at),
+                        dirty=False,
+                    )
+            self._seq = max(self._seq, int(row[0]) if row else 0)
+
+    def record(
+        self,
+        key: str,
+        domain: str,
+        size: int,
+        status_code: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """
+        写入缓存后记录条目 (已存在时保留访问记录)
+
+        Args:
+            key: 缓存键
+            domain: 条目所属域名
+            size: 条目占用的字节数 (内容、元数据和预压缩变体)
+            status_code: HTTP 状态码
+            headers: 响应头
+            fetched_at: 获取响应的时间戳
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._insert(
+                    key, CacheIndexEntry(domain, size, time.time(), 0, status_code, fetched_at)
+                )
+            else:
+                self._adjust(entry.domain, size - entry.size)
+                entry.size = size
+                entry.status_code = status_code
+                entry.fetched_at = fetched_at
+                self._dirty.add(key)
+            if headers is not None:
+                self._pending_headers[key] = JsonUtil.dumps(headers).decode(constants.ENCODING_UTF8)
+
+    def load(self, key: str, domain: str, size: int, last_access: float) -> None:
+        """
+        扫描缓存目录时加载已有条目 (扫描期间新写入的记录优先)
+
+        Args:
+            key: 缓存键
+            domain: 条目所属域名
+            size: 条目占用的字节数
+            last_access: 初始访问时间 (使用文件修改时间)
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._insert(key, CacheIndexEntry(domain, size, last_access))
+
+    def touch(self, key: str, cached: Optional[Dict[str, Any]] = None) -> None:
+        """
+        记录一次缓存命中
+
+        Args:
+            key: 缓存键
+            cached: 命中的缓存条目 (可选，用于补全扫描得到的记录中缺少的状态码和获取时间)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._unorder(key, entry)
+            entry.last_access = time.time()
+            entry.hits += 1
+            self._reorder(key, entry)
+            if entry.status_code is None and cached is not None:
+                entry.status_code = cached.get("status_code")
+                entry.fetched_at = cached.get("fetched_at")
+            self._dirty.add(key)
+
+    def remove(self, key: str) -> Optional[CacheIndexEntry]:
+        """
+        移除条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            被移除的记录，不存在时返回 None
+        """
+        with self._lock:
+            entry = self._drop(key)
+            if entry is not None:
+                self._removed.add(key)
+            return entry
+
+    def _drop(self, key: str) -> Optional[CacheIndexEntry]:
+        """从内存中移除记录 (调用方持有锁)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._unorder(key, entry)
+        self._adjust(entry.domain, -entry.size)
+        usage = self._domains[entry.domain]
+        usage[1] -= 1
+        if usage[1] <= 0:
+            del self._domains[entry.domain]
+            self._domain_orders.pop(entry.domain, None)
+        self._dirty.discard(key)
+        self._pending_headers.pop(key, None)
+        return entry
+
+    def _insert(self, key: str, entry: CacheIndexEntry, dirty: bool = True) -> None:
+        """添加新记录 (调用方持有锁)"""
+        self._entries[key] = entry
+        self._reorder(key, entry)
+        self._domains.setdefault(entry.domain, [0, 0])[1] += 1
+        self._adjust(entry.domain, entry.size)
+        self._removed.discard(key)
+        if dirty:
+            self._dirty.add(key)
+
+    def _reorder(self, key: str, entry: CacheIndexEntry) -> None:
+        """将记录加入全局和所属域名的淘汰顺序 (调用方持有锁)"""
+        self._order.add(key, entry)
+        order = self._domain_orders.get(entry.domain)
+        if order is None:
+            order = self._domain_orders[entry.domain] = EvictionOrder(self._by_hits)
+        order.add(key, entry)
+
+    def _unorder(self, key: str, entry: CacheIndexEntry) -> None:
+        """从淘汰顺序中移除记录，修改访问时间或次数前调用 (调用方持有锁)"""
+        self._order.discard(key, entry)
+        order = self._domain_orders.get(entry.domain)
+        if order is not None:
+            order.discard(key, entry)
+
+    def _adjust(self, domain: str, delta: int) -> None:
+        """调整全局和域名的字节数 (调用方持有锁)"""
+        self.total_bytes += delta
+        self._domains.setdefault(domain, [0, 0])[0] += delta
+
+    def flush(self) -> None:
+        """将内存中的变更批量写入 SQLite"""
+        if self._db is None:
+            return
+
+        with self._lock:
+            rows = []
+            for key in self._dirty:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    rows.append(
+                        (
+                            key,
+                            entry.domain,
+                            entry.size,
+                            entry.status_code,
+                            self._pending_headers.get(key),
+                            entry.fetched_at,
+                            entry.last_access,
+                            entry.hits,
+                        )
+                    )
+            removed = [(key,) for key in self._removed]
+            self._dirty.clear()
+            self._removed.clear()
+            self._pending_headers.clear()
+
+        if not rows and not removed:
+            return
+        now = time.time()
+        with self._db_lock, self._db:
+            # 每批变更分配一个递增序号，其他 worker 据此增量同步
+            seq = int(
+                self._db.execute(
+                    "UPDATE state SET value = CAST(value AS INTEGER) + 1 WHERE name = 'seq' "
+                    "RETURNING value"
+                ).fetchone()[0]
+            )
+            self._db.executemany("DELETE FROM entries WHERE key = ?", removed)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO removed VALUES (?, ?, ?)",
+                [(key, seq, now) for key, in removed],
+            )
+            self._db.executemany(
+                "DELETE FROM removed WHERE key = ?", [(row[0],) for row in rows]
+            )
+            self._db.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "domain = excluded.domain, size = excluded.size, "
+                "status_code = excluded.status_code, "
+                "headers = COALESCE(excluded.headers, entries.headers), "
+                "fetched_at = excluded.fetched_at, "
+                "last_access = excluded.last_access, hits = excluded.hits, seq = excluded.seq",
+                [(*row, seq) for row in rows],
+            )
+            if self.owner:
+                self._db.execute(
+                    "DELETE FROM removed WHERE removed_at < ?",
+                    (now - constants.CACHE_INDEX_TOMBSTONE_TTL,),
+                )
+
+    def sync(self) -> List[str]:
+        """
+        拉取其他 worker 写入 SQLite 的变更 (本地尚未写入的变更优先)
+
+        Returns:
+            内容有变化 (新增、重新获取或删除) 的缓存键，调用方需要让内存缓存中的副本失效
+        """
+        if self._db is None or not self.ready:
+            return []
+
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                rows = self._db.execute(
+                    "SELECT key, domain, size, status_code, fetched_at, last_access, hits, seq "
+                    "FROM entries WHERE seq > ?",
+                    (self._seq,),
+                ).fetchall()
+                removed = self._db.execute(
+                    "SELECT key, seq FROM removed WHERE seq > ?", (self._seq,)
+                ).fetchall()
+            finally:
+                self._db.execute("COMMIT")
+
+        changed = []
+        with self._lock:
+            seq = self._seq
+            for key, domain, size, status_code, fetched_at, last_access, hits, row_seq in rows:
+                seq = max(seq, row_seq)
+                # 本地尚未写入的变更 (包括删除) 优先
+                if key in self._dirty or key in self._removed:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._insert(
+                        key,
+                        CacheIndexEntry(domain, size, last_access, hits, status_code, fetched_at),
+                        dirty=False,
+                    )
+                    changed.append(key)
+                    continue
+                if entry.size != size or entry.fetched_at != fetched_at:
+                    changed.append(key)
+                self._adjust(entry.domain, size - entry.size)
+                entry.size = size
+                entry.status_code = status_code
+                entry.fetched_at = fetched_at
+                # 各 worker 分别计数，取较大值 (近似)
+                if last_access > entry.last_access or hits > entry.hits:
+                    self._unorder(key, entry)
+                    entry.last_access = max(entry.last_access, last_access)
+                    entry.hits = max(entry.hits, hits)
+                    self._reorder(key, entry)
+            for key, row_seq in removed:
+                seq = max(seq, row_seq)
+                # 本地之后又写入了该条目
+                if key in self._dirty:
+                    continue
+                if self._drop(key) is not None:
+                    changed.append(key)
+            self._seq = seq
+        return changed
+
+    def close(self) -> None:
+        """写入剩余变更并标记为正常关闭 (多 worker 时由主 worker 标记)"""
+        if self._db is None:
+            return
+        self.flush()
+        with self._db_lock:
+            if self.ready and self.owner:
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO state VALUES ('clean', '1')")
+            self._db.close()
+            self._db = None
+
+    def get_headers(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        读取条目的响应头 (先写入未落盘的变更)
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            响应头字典，不存在或未记录时返回 None
+        """
+        pending = self._pending_headers.get(key)
+        if pending is not None:
+            return JsonUtil.loads(pending)
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT headers FROM entries WHERE key = ?", (key,)).fetchone()
+        return JsonUtil.loads(row[0]) if row and row[0] else None
+
+    def usage(self, domain: Optional[str] = None) -> Tuple[int, int]:
+        """
+        获取占用情况
+
+        Args:
+            domain: 域名 (None 表示全局)
+
+        Returns:
+            (总字节数, 条目数)
+        """
+        if domain is None:
+            return self.total_bytes, len(self._entries)
+        bytes_used, count = self._domains.get(domain, (0, 0))
+        return bytes_used, count
+
+    def domains(self) -> List[str]:
+        """获取所有域名"""
+        with self._lock:
+            return list(self._domains)
+
+    def keys(self, domain: Optional[str] = None) -> List[str]:
+        """
+        枚举缓存键
+
+        Args:
+            domain: 只返回该域名的条目 (None 表示全部)
+
+        Returns:
+            缓存键列表
+        """
+        with self._lock:
+            return [
+                key
+                for key, entry in self._entries.items()
+                if domain is None or entry.domain == domain
+            ]
+
+    def get(self, key: str) -> Optional[CacheIndexEntry]:
+        """
+        获取条目的索引记录
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            索引记录，不存在时返回 None
+        """
+        return self._entries.get(key)
+
+    def select_victims(
+        self, limit: int, idle_before: float, domain: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        按淘汰策略选出候选条目 (lru 按最后访问时间，lfu 按访问次数再按最后访问时间)
+
+        从维护好的淘汰顺序开头取，耗时与返回的条目数成正比，不随索引大小增长
+
+        Args:
+            limit: 最多返回的条目数
+            idle_before: 只选择最后访问时间早于该时间戳的条目
+            domain: 只在该域名内选择 (None 表示全局)
+
+        Returns:
+            [(缓存键, 占用字节数)]，最先淘汰的在前
+        """
+        with self._lock:
+            order = self._order if domain is None else self._domain_orders.get(domain)
+            if order is None:
+                return []
+            return order.select(limit, idle_before)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取索引统计信息
+
+        Returns:
+            包含条目数、总字节数、域名数和是否已就绪的字典
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "domains": len(self._domains),
+            "ready": self.ready,
+            "dirty": len(self._dirty) + len(self._removed),
+        }
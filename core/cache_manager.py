@@ -3,11 +3,47 @@
 负责处理请求缓存的读写操作
 """
 
+import asyncio
+import functools
+import hashlib
 import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Callable, Iterable, Iterator, Tuple, TypeVar
 
-from utils import EncodingUtil, CachePathUtil, HttpUtil, constants
+from config import app_config, PerformanceProfile, RunMode
+from utils import (
+    EncodingUtil,
+    CachePathUtil,
+    CacheEntryUtil,
+    CompressionUtil,
+    HttpUtil,
+    JsonUtil,
+    LockUtil,
+    constants,
+)
+from .blob_store import BlobStore
+from .bloom_filter import BloomFilter
+from .cache_evictor import CacheEvictor
+from .cache_index import CacheIndex
+from .file_response import file_identity
+from .key_normalizer import CacheKeyNormalizer
+from .memory_cache import MemoryCache
+from .write_queue import CacheWriteQueue
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InconsistentEntryError(Exception):
+    """缓存条目的各个文件来自不同的写入 (读取时恰好有并发写入提交)"""
 
 
 class CacheManager:
@@ -19,6 +55,277 @@ class CacheManager:
         # 确保缓存目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # 写锁目录，按缓存键哈希分片，多个 worker 进程共享
+        self.lock_dir = self.cache_dir / constants.CACHE_DIR_LOCKS
+        self.lock_dir.mkdir(exist_ok=True)
+
+        # 多 worker 部署: 持有主 worker 锁的进程负责载入 (或扫描重建) 索引、淘汰缓存和回收内容，
+        # 其他进程载入主 worker 准备好的索引并定期同步各进程的变更，主 worker 退出后由其他进程接替
+        self.workers = max(1, app_config.workers)
+        self.is_leader = False
+        self._leader_fd: Optional[int] = None
+        self._leader_token = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # 本进程持有的回源填充锁分片
+        self._fill_stripes: set[int] = set()
+        self.fill_stats = {"acquired": 0, "waited": 0, "timeouts": 0}
+
+        # 磁盘 I/O 专用的有界线程池，避免文件读写阻塞事件循环
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=max(1, app_config.cache_io_workers),
+            thread_name_prefix="cache-io",
+        )
+
+        # 带参数 GET 和 POST 条目按哈希前缀分层的深度，分层前的旧布局仍可读取
+        self.shard_depth = min(max(0, app_config.cache_shard_depth), constants.CACHE_SHARD_MAX_DEPTH)
+
+        # 缓存键规范化 (查询参数排序、忽略易变参数、规范化请求体)，保存和查找使用同一规则
+        self.key_normalizer = CacheKeyNormalizer(
+            sort_params=app_config.cache_key_sort_params,
+            ignore_params=app_config.cache_key_ignore_params.split(","),
+            canonical_body=app_config.cache_key_canonical_body,
+            rules=CacheKeyNormalizer.load_rules(app_config.cache_key_rules),
+        )
+
+        # 缓存元数据和条目头部的编解码器 (fast 配置下使用 orjson，未安装时回退到标准库)
+        JsonUtil.configure(app_config.performance_profile == PerformanceProfile.FAST)
+
+        # 内存热缓存，保存已解析好的响应
+        # 多 worker 时其他 worker 替换的条目通过缓存索引同步失效，未启用索引时无法得知，不使用内存缓存
+        memory_cache_size = app_config.memory_cache_size
+        if self.workers > 1 and not app_config.cache_index and memory_cache_size > 0:
+            logger.warning(
+                "Memory cache is disabled: with multiple workers it requires CACHE_INDEX=true"
+            )
+            memory_cache_size = 0
+        self.memory_cache = MemoryCache(
+            max_bytes=memory_cache_size,
+            max_entry_bytes=app_config.memory_cache_max_entry_size,
+        )
+
+        # 写入时预压缩的编码 (未安装依赖的编码被忽略)
+        self.precompress_encodings = CompressionUtil.available_encodings(
+            app_config.precompress_encodings
+        )
+        if self.precompress_encodings:
+            logger.info(f"Precompressing cached text responses: {', '.join(self.precompress_encodings)}")
+
+        # 后台写入队列 (write-behind)，队列深度为 0 时在请求中直接写入
+        self.write_queue: Optional[CacheWriteQueue] = None
+        if app_config.cache_write_queue_size > 0:
+            self.write_queue = CacheWriteQueue(
+                write_func=self._write_now,
+                max_size=app_config.cache_write_queue_size,
+                workers=app_config.cache_write_workers,
+                policy=app_config.cache_write_policy,
+            )
+
+        # 持久化缓存索引，启动后由后台任务载入 (或扫描缓存目录重建)
+        self.index: Optional[CacheIndex] = None
+        self._index_task: Optional[asyncio.Task] = None
+        if app_config.cache_index:
+            self.index = CacheIndex(
+                self.cache_dir / constants.CACHE_INDEX_FILE, app_config.cache_eviction_policy
+            )
+            # 当选主 worker 后才负责标记正常关闭
+            self.index.owner = False
+
+        # 未启用索引时，由启动时扫描构建的布隆过滤器判断一定不存在的缓存键
+        # (多 worker 写入缓存时各进程的过滤器看不到其他进程新写入的键，只在本地模式下使用)
+        self.bloom: Optional[BloomFilter] = None
+        if (
+            self.index is None
+            and app_config.cache_bloom_capacity > 0
+            and (self.workers == 1 or app_config.mode == RunMode.LOCAL)
+        ):
+            self.bloom = BloomFilter(app_config.cache_bloom_capacity)
+
+        # 内容寻址存储: 相同内容的响应体通过硬链接共享，由后台任务回收已无引用的内容
+        self.blob_store: Optional[BlobStore] = None
+        self._blob_task: Optional[asyncio.Task] = None
+        if app_config.cache_dedup:
+            self.blob_store = BlobStore(self.cache_dir / constants.CACHE_DIR_BLOBS)
+
+        # 磁盘缓存配额: 配置了任一配额时由后台任务按索引淘汰
+        self.evictor: Optional[CacheEvictor] = None
+        has_quota = any(
+            (
+                app_config.cache_max_size,
+                app_config.cache_max_entries,
+                app_config.cache_domain_max_size,
+                app_config.cache_domain_max_entries,
+            )
+        )
+        if has_quota and self.index is None:
+            logger.warning("Cache quotas require CACHE_INDEX=true, eviction is disabled")
+        elif has_quota:
+            self.evictor = CacheEvictor(
+                index=self.index,
+                delete_func=self.delete_entry,
+                run_io=self._run_io,
+                policy=app_config.cache_eviction_policy,
+                interval=app_config.cache_eviction_interval,
+                max_bytes=app_config.cache_max_size,
+                max_entries=app_config.cache_max_entries,
+                domain_max_bytes=app_config.cache_domain_max_size,
+                domain_max_entries=app_config.cache_domain_max_entries,
+            )
+
+    def start(self) -> None:
+        """启动后台任务 (载入缓存索引或构建布隆过滤器、缓存淘汰、内容回收)，需要在运行中的事件循环内调用"""
+        self._try_lead()
+        if self._index_task is None:
+            if self.index is not None:
+                self._index_task = asyncio.create_task(self._maintain_index(), name="cache-index")
+            elif self.bloom is not None:
+                self._index_task = asyncio.create_task(self._build_bloom(), name="cache-bloom")
+        if self.evictor is not None and self.is_leader:
+            self.evictor.start()
+        if self.blob_store is not None and self._blob_task is None:
+            self._blob_task = asyncio.create_task(self._collect_blobs(), name="cache-blobs")
+
+    def _try_lead(self) -> bool:
+        """
+        尝试获取主 worker 锁 (非阻塞，进程退出时自动释放)
+
+        Returns:
+            当前进程是否为主 worker
+        """
+        if self.is_leader:
+            return True
+        fd = LockUtil.try_file_lock(self.lock_dir / constants.CACHE_LEADER_LOCK)
+        if fd is None:
+            return False
+        if fd >= 0:
+            # 写入标识，其他 worker 据此确认索引由当前主 worker 准备完成
+            os.ftruncate(fd, 0)
+            os.write(fd, self._leader_token.encode(constants.ENCODING_UTF8))
+        self._leader_fd = fd
+        self.is_leader = True
+        if self.index is not None:
+            self.index.owner = True
+        if self.workers > 1:
+            logger.info(f"Worker {os.getpid()} is the cache leader")
+        return True
+
+    def _read_leader_token(self) -> Optional[str]:
+        """读取主 worker 写入锁文件的标识"""
+        try:
+            token = (self.lock_dir / constants.CACHE_LEADER_LOCK).read_text(
+                encoding=constants.ENCODING_UTF8
+            )
+        except OSError:
+            return None
+        return token.strip() or None
+
+    async def _maintain_index(self) -> None:
+        """
+        后台任务: 载入索引，之后定期将内存中的变更写入 SQLite
+
+        多 worker 时同时拉取其他 worker 的变更，并在主 worker 退出后接替淘汰任务
+        """
+        try:
+            started = time.monotonic()
+            if self.is_leader:
+                await self._run_io(self._load_index)
+            else:
+                await self._follow_index()
+            usage_bytes, count = self.index.usage()
+            logger.info(
+                f"Cache index ready: {count} entries, {usage_bytes} bytes "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"缓存索引载入失败: {e}")
+            return
+
+        while True:
+            await asyncio.sleep(constants.CACHE_INDEX_FLUSH_INTERVAL)
+            try:
+                await self._run_io(self._sync_index)
+            except Exception as e:
+                logger.error(f"缓存索引写入失败: {e}")
+            if not self.is_leader and self._try_lead() and self.evictor is not None:
+                self.evictor.start()
+
+    async def _follow_index(self) -> None:
+        """等待主 worker 准备好索引后载入 (主 worker 已退出时接替并自行载入)"""
+        while True:
+            if self._try_lead():
+                if self.evictor is not None:
+                    self.evictor.start()
+                await self._run_io(self._load_index)
+                return
+            token = self._read_leader_token()
+            if token is not None and await self._run_io(self.index.attach, token):
+                self.index.ready = True
+                return
+            await asyncio.sleep(constants.CACHE_FOLLOWER_POLL)
+
+    def _sync_index(self) -> None:
+        """写入本地变更，多 worker 时拉取其他 worker 的变更并使内存缓存中的旧副本失效"""
+        self.index.flush()
+        if self.workers > 1:
+            for cache_key in self.index.sync():
+                self.memory_cache.invalidate(cache_key)
+
+    async def _build_bloom(self) -> None:
+        """后台任务: 扫描缓存目录构建布隆过滤器"""
+        try:
+            started = time.monotonic()
+            await self._run_io(self._scan_bloom)
+            logger.info(
+                f"Cache bloom filter ready: {self.bloom.count} keys "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"布隆过滤器构建失败: {e}")
+
+    async def _collect_blobs(self) -> None:
+        """后台任务: 启动时和之后定期删除已没有缓存文件引用的内容 (多 worker 时由主 worker 执行)"""
+        while True:
+            if not self._try_lead():
+                await asyncio.sleep(constants.CACHE_BLOB_GC_INTERVAL)
+                continue
+            try:
+                collected = await self._run_io(self.blob_store.collect_garbage)
+                if collected:
+                    logger.info(f"Collected {collected} unreferenced cache blobs")
+            except Exception as e:
+                logger.error(f"缓存内容回收失败: {e}")
+            await asyncio.sleep(constants.CACHE_BLOB_GC_INTERVAL)
+
+    def _scan_bloom(self) -> None:
+        """扫描缓存目录，将所有缓存键加入布隆过滤器"""
+        for cache_path, _ in self._iter_cache_files():
+            self.bloom.add(str(cache_path))
+        self.bloom.ready = True
+
+    def _load_index(self) -> None:
+        """从 SQLite 载入索引，文件不存在或上次未正常关闭时扫描缓存目录重建"""
+        if not self.index.open():
+            logger.info(f"Rebuilding cache index from {self.cache_dir}")
+            self._scan_index()
+            self.index.flush()
+        self.index.mark_ready(self._leader_token)
+        self.index.ready = True
+
+    async def _run_io(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在 I/O 线程池中执行阻塞的文件操作
+
+        Args:
+            func: 要执行的同步函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数的返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._io_executor, functools.partial(func, *args, **kwargs)
+        )
+
     def _get_cache_path(
             self, url: str, method: str = "GET", body: Optional[bytes] = None
     ) -> Path:
@@ -33,18 +340,84 @@ class CacheManager:
         Returns:
             缓存文件的路径
         """
-        domain, path, query = CachePathUtil.extract_url_parts(url)
+        return self._resolve_cache_path(url, method, body)[0]
 
-        if method.upper() == constants.HTTP_METHOD_GET:
-            return CachePathUtil.build_get_cache_path(
-                self.cache_dir, domain, path, query
+    def _resolve_cache_path(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> tuple[Path, bool]:
+        """
+        规范化查询参数和请求体后生成缓存文件路径
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法 (GET 或 POST)
+            body: 请求体 (POST 请求需要)
+
+        Returns:
+            (缓存文件的路径, 规范化是否改变了缓存键)
+        """
+        domain, path, query = CachePathUtil.extract_url_parts(url)
+        method = method.upper()
+        if method == constants.HTTP_METHOD_GET:
+            query, _, normalized = self.key_normalizer.normalize(domain, path, query, None)
+            cache_path = CachePathUtil.build_get_cache_path(
+                self.cache_dir, domain, path, query, self.shard_depth
             )
-        elif method.upper() == constants.HTTP_METHOD_POST:
-            return CachePathUtil.build_post_cache_path(
-                self.cache_dir, domain, path, body
+        elif method == constants.HTTP_METHOD_POST:
+            _, body, normalized = self.key_normalizer.normalize(domain, path, "", body)
+            cache_path = CachePathUtil.build_post_cache_path(
+                self.cache_dir, domain, path, body, self.shard_depth
             )
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
+        return cache_path, normalized
+
+    def _unsharded_path(self, cache_path: Path) -> Optional[Path]:
+        """
+        分层布局的条目在旧布局 (未分层) 中的路径
+
+        Args:
+            cache_path: 按当前分层深度生成的缓存路径
+
+        Returns:
+            旧布局路径，未启用分层或不是条目格式时返回 None
+        """
+        if not self.shard_depth or cache_path.suffix != constants.CACHE_FILE_EXTENSION_ENTRY:
+            return None
+        return cache_path.parents[self.shard_depth] / cache_path.name
+
+    def _drop_unsharded(self, cache_path: Path) -> None:
+        """
+        写入分层布局的条目后删除旧布局中的同一条目 (不持有写锁时调用)
+
+        Args:
+            cache_path: 刚写入的缓存路径
+        """
+        unsharded = self._unsharded_path(cache_path)
+        if unsharded is None:
+            return
+        if self.index is not None and self.index.ready:
+            if str(unsharded) not in self.index:
+                return
+        elif not unsharded.exists() and not self._legacy_path(unsharded).exists():
+            return
+        self.delete_entry(str(unsharded))
+
+    def get_cache_key(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> str:
+        """
+        计算缓存键 (方法 + URL + 请求体哈希 唯一确定一个缓存文件)
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+            body: 请求体 (POST 请求需要)
+
+        Returns:
+            缓存键字符串
+        """
+        return str(self._get_cache_path(url, method, body))
 
     def save_response(
             self,
@@ -54,6 +427,9 @@ class CacheManager:
             headers: Optional[Dict[str, str]] = None,
             status_code: int = 200,
             body: Optional[bytes] = None,
+            body_content_type: Optional[str] = None,
+            fetched_at: Optional[float] = None,
+            etag: Optional[str] = None,
     ) -> None:
         """
         保存响应到缓存
@@ -65,138 +441,1738 @@ class CacheManager:
             headers: 响应头
             status_code: HTTP 状态码
             body: 请求体 (POST 请求需要)
+            body_content_type: 请求体的 Content-Type (用于解码请求体)
+            fetched_at: 从上游获取响应的时间戳 (默认当前时间)
+            etag: 响应体的强 ETag (默认根据内容计算)
         """
         cache_path = self._get_cache_path(url, method, body)
+        cache_key = str(cache_path)
+
+        # 覆盖写入前后都使内存条目失效，避免读到旧数据
+        self.memory_cache.invalidate(cache_key)
 
         # 确保父目录存在
         cache_path.parent.mkdir(parents=True, exist_ok=True)
 
         # 清理 headers，使用工具类
         cleaned_headers = HttpUtil.clean_response_headers(headers or {})
+        freshness = self._build_freshness(cleaned_headers, fetched_at)
+        if etag is None:
+            etag = self.compute_etag(content)
 
-        if method.upper() == constants.HTTP_METHOD_GET:
-            _, _, query = CachePathUtil.extract_url_parts(url)
-            
-            # 如果有查询参数，使用 JSON 格式保存（类似 POST）
-            if query:
-                data = {
-                    "status_code": status_code,
-                    "headers": cleaned_headers,
-                    "content": EncodingUtil.detect_and_decode(content),
-                    "query_params": query,
-                }
-                cache_path.write_text(
-                    json.dumps(data, indent=2, ensure_ascii=False),
-                    encoding=constants.ENCODING_UTF8,
-                )
-            else:
-                # GET 请求无参数直接保存内容
-                cache_path.write_bytes(content)
-
-                # 保存元数据 (headers 和 status_code)
-                meta_path = cache_path.with_suffix(
-                    cache_path.suffix + constants.CACHE_FILE_EXTENSION_META
-                )
-                meta_data = {"status_code": status_code, "headers": cleaned_headers}
-                meta_path.write_text(
-                    json.dumps(meta_data, indent=2, ensure_ascii=False),
-                    encoding=constants.ENCODING_UTF8,
-                )
+        # 压缩在加锁前完成，锁内只做文件替换
+        digest = self._blob_digest(etag)
+        variant_temps = self._write_variants(
+            cache_path, lambda: [content], len(content), cleaned_headers, digest
+        )
+        body_temp = None
+        try:
+            with self._write_lock(cache_key):
+                variants = self._commit_variants(cache_path, variant_temps)
+                if self._is_raw_entry(url, method):
+                    # GET 请求无参数直接保存内容，元数据 (headers 和 status_code) 单独保存
+                    body_temp = self._write_body(cache_path, content, digest)
+                    self._commit_raw(
+                        cache_path,
+                        body_temp,
+                        status_code,
+                        cleaned_headers,
+                        freshness,
+                        etag,
+                        variants,
+                    )
+                else:
+                    # GET 带参数和 POST 请求保存为条目格式: 头部 + 原始响应体
+                    header = self._build_entry_header(
+                        url,
+                        method,
+                        cleaned_headers,
+                        status_code,
+                        body,
+                        body_content_type,
+                        freshness,
+                        etag,
+                        variants,
+                    )
+                    if self.blob_store is not None:
+                        # 响应体单独保存在共享内容的 .body 文件中，条目文件只有头部
+                        body_temp = self._write_body(self._body_path(cache_path), content, digest)
+                        self._commit_entry_body(cache_path, body_temp, header)
+                    else:
+                        entry_temp = self._write_temp(
+                            cache_path, CacheEntryUtil.encode_header(header) + content
+                        )
+                        os.replace(entry_temp, cache_path)
+                        self._body_path(cache_path).unlink(missing_ok=True)
+                    self._legacy_path(cache_path).unlink(missing_ok=True)
+        finally:
+            for temp_path, _ in variant_temps.values():
+                temp_path.unlink(missing_ok=True)
+            if body_temp is not None:
+                body_temp.unlink(missing_ok=True)
 
-        elif method.upper() == constants.HTTP_METHOD_POST:
-            # POST 请求保存为 JSON (无扩展名)
-            data = {
-                "status_code": status_code,
-                "headers": cleaned_headers,
-                "content": EncodingUtil.detect_and_decode(content),
-                "request_body": EncodingUtil.detect_and_decode(body) if body else "",
-            }
-            cache_path.write_text(
-                json.dumps(data, indent=2, ensure_ascii=False),
-                encoding=constants.ENCODING_UTF8,
-            )
+        self.memory_cache.invalidate(cache_key)
+        self._index_entry(cache_path, status_code, cleaned_headers, freshness["fetched_at"])
+        self._drop_unsharded(cache_path)
 
-    def get_response(
-            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    def refresh_response(
+            self,
+            url: str,
+            method: str,
+            headers: Dict[str, str],
+            body: Optional[bytes] = None,
+            fetched_at: Optional[float] = None,
     ) -> Optional[Dict[str, Any]]:
         """
-        从缓存读取响应
+        更新已有缓存的响应头和获取时间，响应体保持不变 (上游返回 304 时使用)
+
+        GET 无参数缓存只重写元数据文件；条目格式重写头部并复制响应体
 
         Args:
             url: 请求的完整 URL
             method: HTTP 方法
+            headers: 新的响应头 (已合并 304 响应头)
             body: 请求体 (POST 请求需要)
+            fetched_at: 获取时间戳 (默认当前时间)
 
         Returns:
-            包含响应数据的字典,如果缓存不存在则返回 None
-            字典格式: {
-                "content": bytes,
-                "headers": dict,
-                "status_code": int
-            }
+            更新后的缓存条目，缓存不存在或格式无效时返回 None
         """
         cache_path = self._get_cache_path(url, method, body)
+        unsharded = self._unsharded_path(cache_path)
+        if unsharded is not None and not cache_path.exists():
+            # 尚未迁移到分层布局的条目原地更新
+            cache_path = unsharded
+        cache_key = str(cache_path)
+        cleaned_headers = HttpUtil.clean_response_headers(headers)
+        freshness = self._build_freshness(cleaned_headers, fetched_at)
+
+        self.memory_cache.invalidate(cache_key)
+        with self._write_lock(cache_key):
+            if self._is_raw_entry(url, method):
+                refreshed = self._refresh_raw(cache_path, cleaned_headers, freshness)
+            else:
+                refreshed = self._refresh_entry(cache_path, cleaned_headers, freshness)
+        self.memory_cache.invalidate(cache_key)
 
-        if not cache_path.exists():
+        if not refreshed:
             return None
+        cached = self.get_response(url, method, body)
+        if cached is not None:
+            self._index_entry(
+                cache_path, cached["status_code"], cleaned_headers, freshness["fetched_at"]
+            )
+        return cached
 
-        if method.upper() == constants.HTTP_METHOD_GET:
-            _, _, query = CachePathUtil.extract_url_parts(url)
-            
-            # 如果有查询参数，从 JSON 格式读取
-            if query:
-                data = json.loads(
-                    cache_path.read_text(encoding=constants.ENCODING_UTF8)
-                )
-                return {
-                    "content": data.get("content", "").encode(constants.ENCODING_UTF8),
-                    "headers": data.get("headers", {}),
-                    "status_code": data.get("status_code", constants.HTTP_STATUS_OK),
-                }
-            else:
-                # GET 请求无参数直接读取内容
-                content = cache_path.read_bytes()
+    def _refresh_raw(
+            self, cache_path: Path, headers: Dict[str, str], freshness: Dict[str, Any]
+    ) -> bool:
+        """
+        重写 GET 无参数缓存的元数据
 
-                # 读取元数据
-                meta_path = cache_path.with_suffix(
-                    cache_path.suffix + constants.CACHE_FILE_EXTENSION_META
-                )
-                if meta_path.exists():
-                    meta_data = json.loads(
-                        meta_path.read_text(encoding=constants.ENCODING_UTF8)
-                    )
-                    headers = meta_data.get("headers", {})
-                    status_code = meta_data.get("status_code", constants.HTTP_STATUS_OK)
-                else:
-                    headers = {}
-                    status_code = constants.HTTP_STATUS_OK
-
-                return {"content": content, "headers": headers, "status_code": status_code}
-
-        elif method.upper() == constants.HTTP_METHOD_POST:
-            # POST 请求从 JSON 读取
-            data = json.loads(cache_path.read_text(encoding=constants.ENCODING_UTF8))
-            return {
-                "content": data.get("content", "").encode(constants.ENCODING_UTF8),
-                "headers": data.get("headers", {}),
-                "status_code": data.get("status_code", constants.HTTP_STATUS_OK),
-            }
+        Args:
+            cache_path: 缓存内容文件路径
+            headers: 新的响应头
+            freshness: 新鲜度信息
+
+        Returns:
+            是否更新成功
+        """
+        meta_data = self._read_meta(cache_path)
+        try:
+            stat_result = os.stat(cache_path)
+        except FileNotFoundError:
+            return False
+        if not self._meta_matches(meta_data, stat_result):
+            return False
 
-        return None
+        meta_data.update(
+            headers=headers,
+            body_size=stat_result.st_size,
+            body_mtime_ns=stat_result.st_mtime_ns,
+            **freshness,
+        )
+        meta_path = self._meta_path(cache_path)
+        meta_temp = self._write_temp(
+            meta_path,
+            JsonUtil.dumps(meta_data, pretty=True),
+        )
+        os.replace(meta_temp, meta_path)
+        return True
 
-    def has_cache(
-            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    def _refresh_entry(
+            self, cache_path: Path, headers: Dict[str, str], freshness: Dict[str, Any]
     ) -> bool:
         """
-        检查缓存是否存在
+        重写条目格式缓存的头部，响应体原样复制到新文件 (响应体单独保存的条目只重写头部)
 
         Args:
-            url: 请求的完整 URL
-            method: HTTP 方法
-            body: 请求体 (POST 请求需要)
+            cache_path: 条目文件路径
+            headers: 新的响应头
+            freshness: 新鲜度信息
 
         Returns:
-            缓存是否存在
+            是否更新成功
         """
-        cache_path = self._get_cache_path(url, method, body)
-        return cache_path.exists()
+        try:
+            file = open(cache_path, "rb")
+        except FileNotFoundError:
+            return False
+
+        with file:
+            parsed = CacheEntryUtil.read_header(file)
+            if parsed is None:
+                return False
+            header, _ = parsed
+            header.update(headers=headers, **freshness)
+
+            temp_path = self._temp_path(cache_path)
+            try:
+                with open(temp_path, "wb") as temp_file:
+                    temp_file.write(CacheEntryUtil.encode_header(header))
+                    shutil.copyfileobj(file, temp_file, constants.STREAM_CHUNK_SIZE)
+                    if app_config.cache_fsync:
+                        temp_file.flush()
+                        os.fsync(temp_file.fileno())
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+
+        os.replace(temp_path, cache_path)
+        return True
+
+    def _entry_files(self, cache_path: Path) -> list[Path]:
+        """
+        缓存条目对应的全部文件 (内容、元数据、单独保存的响应体、旧版条目和预压缩变体)
+
+        Args:
+            cache_path: 缓存文件路径
+
+        Returns:
+            文件路径列表 (不保证存在)
+        """
+        paths = [cache_path, self._meta_path(cache_path)]
+        if cache_path.suffix == constants.CACHE_FILE_EXTENSION_ENTRY:
+            paths.append(self._body_path(cache_path))
+            paths.append(self._legacy_path(cache_path))
+        paths.extend(
+            self._variant_path(cache_path, encoding)
+            for encoding in constants.PRECOMPRESS_ENCODINGS
+        )
+        return paths
+
+    def _disk_size(self, cache_path: Path, names: Optional[set[str]] = None) -> int:
+        """
+        计算缓存条目占用的磁盘字节数
+
+        Args:
+            cache_path: 缓存文件路径
+            names: 所在目录的文件名集合 (可选，提供时跳过不存在的文件)
+
+        Returns:
+            所有相关文件的总字节数
+        """
+        size = 0
+        for path in self._entry_files(cache_path):
+            if names is not None and path.name not in names:
+                continue
+            try:
+                size += os.stat(path).st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _cache_domain(self, cache_path: Path) -> str:
+        """缓存文件所属的域名 (缓存根目录下的第一级目录)"""
+        parts = cache_path.relative_to(self.cache_dir).parts
+        return parts[0] if len(parts) > 1 else ""
+
+    def _index_entry(
+            self,
+            cache_path: Path,
+            status_code: int,
+            headers: Dict[str, str],
+            fetched_at: float,
+    ) -> None:
+        """
+        写入缓存后更新索引和布隆过滤器
+
+        Args:
+            cache_path: 缓存文件路径
+            status_code: HTTP 状态码
+            headers: 已清理的响应头
+            fetched_at: 获取响应的时间戳
+        """
+        if self.bloom is not None:
+            self.bloom.add(str(cache_path))
+        if self.index is None:
+            return
+        self.index.record(
+            str(cache_path),
+            self._cache_domain(cache_path),
+            self._disk_size(cache_path),
+            status_code,
+            headers,
+            fetched_at,
+        )
+
+    def _iter_cache_files(self) -> Iterator[tuple[Path, set[str]]]:
+        """
+        遍历缓存目录中的所有缓存条目
+
+        跳过写锁、索引、内容存储等以 "." 开头的内部目录和文件 (包括临时文件)
+        以及元数据、单独保存的响应体和预压缩变体，
+        旧版 JSON 条目以对应的条目路径作为缓存键
+
+        Yields:
+            (缓存文件路径, 所在目录的文件名集合)
+        """
+        sidecar_suffixes = (
+            constants.CACHE_FILE_EXTENSION_META,
+            constants.CACHE_FILE_EXTENSION_BODY,
+            constants.CACHE_FILE_EXTENSION_VARIANT,
+            constants.CACHE_FILE_EXTENSION_TEMP,
+            constants.CACHE_FILE_EXTENSION_LOCK,
+        )
+        for dir_path, dir_names, file_names in os.walk(self.cache_dir):
+            dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+            names = set(file_names)
+            for name in file_names:
+                if name.startswith(".") or name.endswith(sidecar_suffixes):
+                    continue
+                cache_path = Path(dir_path) / name
+                if self._is_legacy_file(cache_path, names):
+                    cache_path = cache_path.with_suffix(constants.CACHE_FILE_EXTENSION_ENTRY)
+                    if cache_path.name in names:
+                        continue
+                yield cache_path, names
+
+    def _scan_index(self) -> None:
+        """
+        扫描缓存目录构建索引
+
+        只在索引文件不存在或上次未正常关闭时执行，之后由写入和删除增量更新。
+        元数据和预压缩变体计入所属条目，初始访问时间使用文件修改时间
+        """
+        for cache_path, names in self._iter_cache_files():
+            try:
+                mtime = max(
+                    os.stat(path).st_mtime
+                    for path in self._entry_files(cache_path)
+                    if path.name in names
+                )
+            except (FileNotFoundError, ValueError):
+                continue
+            self.index.load(
+                str(cache_path),
+                self._cache_domain(cache_path),
+                self._disk_size(cache_path, names),
+                mtime,
+            )
+
+    def _is_legacy_file(self, path: Path, names: set[str]) -> bool:
+        """
+        判断文件是否为旧版 JSON 条目 (文件名为请求哈希且没有元数据文件，区别于名为 *.json 的 GET 缓存)
+
+        Args:
+            path: 文件路径
+            names: 所在目录的文件名集合
+
+        Returns:
+            是否为旧版条目
+        """
+        return (
+            path.suffix == constants.CACHE_FILE_EXTENSION_JSON
+            and len(path.stem) == 32
+            and all(char in "0123456789abcdef" for char in path.stem)
+            and self._meta_path(path).name not in names
+        )
+
+    def delete_entry(self, cache_key: str) -> bool:
+        """
+        删除缓存条目及其元数据和预压缩变体
+
+        写入队列中尚未落盘的条目不删除
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            是否已删除
+        """
+        if self._get_pending(cache_key) is not None:
+            return False
+
+        cache_path = Path(cache_key)
+        self.memory_cache.invalidate(cache_key)
+        with self._write_lock(cache_key):
+            for path in self._entry_files(cache_path):
+                path.unlink(missing_ok=True)
+        self.memory_cache.invalidate(cache_key)
+        if self.index is not None:
+            self.index.remove(cache_key)
+        return True
+
+    @contextmanager
+    def _write_lock(self, cache_key: str) -> Iterator[None]:
+        """
+        获取缓存键的写锁 (跨线程、跨进程)
+
+        锁文件按缓存键哈希分片，数量固定，不会随缓存条目增长
+
+        Args:
+            cache_key: 缓存键
+        """
+        stripe = self._lock_stripe(cache_key, constants.CACHE_LOCK_STRIPES)
+        with LockUtil.file_lock(self.lock_dir / f"{stripe}{constants.CACHE_FILE_EXTENSION_LOCK}"):
+            yield
+
+    @staticmethod
+    def _lock_stripe(cache_key: str, stripes: int) -> int:
+        """缓存键对应的锁分片"""
+        digest = hashlib.md5(cache_key.encode(constants.ENCODING_UTF8)).digest()
+        return int.from_bytes(digest[:4], "big") % stripes
+
+    async def acquire_fill_lock(self, cache_key: str) -> Tuple[Optional[Tuple[int, int]], bool]:
+        """
+        获取缓存键的跨进程回源填充锁，多 worker 时同一缓存键同时只有一个 worker 回源
+
+        锁文件按缓存键哈希分片；本进程已持有同一分片时不再获取 (进程内的并发请求已由请求合并处理)，
+        等待超过 REQUEST_TIMEOUT 时放弃加锁直接回源
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            (锁句柄, 是否等待过其他 worker)，锁句柄传给 release_fill_lock (未加锁时为 None)；
+            等待过时调用方应重新读取缓存，其他 worker 可能已经写入
+        """
+        if self.workers == 1:
+            return None, False
+        stripe = self._lock_stripe(cache_key, constants.CACHE_FILL_LOCK_STRIPES)
+        lock_path = self.lock_dir / (
+            f"{constants.CACHE_FILL_LOCK_PREFIX}{stripe}{constants.CACHE_FILE_EXTENSION_LOCK}"
+        )
+        deadline = time.monotonic() + app_config.request_timeout
+        waited = False
+        while stripe not in self._fill_stripes:
+            fd = LockUtil.try_file_lock(lock_path)
+            if fd is not None:
+                self._fill_stripes.add(stripe)
+                self.fill_stats["acquired"] += 1
+                return (stripe, fd), waited
+            if time.monotonic() >= deadline:
+                self.fill_stats["timeouts"] += 1
+                break
+            if not waited:
+                waited = True
+                self.fill_stats["waited"] += 1
+            await asyncio.sleep(constants.CACHE_FILL_LOCK_POLL)
+        return None, waited
+
+    def release_fill_lock(self, lock: Optional[Tuple[int, int]]) -> None:
+        """
+        释放 acquire_fill_lock 获取的锁
+
+        Args:
+            lock: acquire_fill_lock 返回的锁句柄 (None 时不做任何操作)
+        """
+        if lock is None:
+            return
+        stripe, fd = lock
+        self._fill_stripes.discard(stripe)
+        LockUtil.release_file_lock(fd)
+
+    async def await_written(self, cache_key: str) -> None:
+        """
+        等待缓存键在写入队列中的条目写入磁盘 (未启用写入队列时保存即已写入)
+
+        Args:
+            cache_key: 缓存键
+        """
+        if self.write_queue is not None:
+            await self.write_queue.wait_written(cache_key)
+
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        """同目录下的唯一临时文件路径 (保证 os.replace 在同一文件系统内原子完成)"""
+        return path.with_name(
+            f".{path.name}.{uuid.uuid4().hex}{constants.CACHE_FILE_EXTENSION_TEMP}"
+        )
+
+    @staticmethod
+    def _write_temp(path: Path, data: bytes) -> Path:
+        """
+        将数据写入目标路径旁的临时文件
+
+        Args:
+            path: 最终的目标路径
+            data: 要写入的数据
+
+        Returns:
+            临时文件路径
+        """
+        temp_path = CacheManager._temp_path(path)
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(data)
+                if app_config.cache_fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return temp_path
+
+    def _blob_digest(self, etag: Optional[str]) -> Optional[str]:
+        """响应体在内容存储中的哈希，未启用去重或 ETag 不是内容哈希时返回 None"""
+        if self.blob_store is None or not self.blob_store.enabled:
+            return None
+        return BlobStore.digest_from_etag(etag)
+
+    def _write_body(self, path: Path, content: bytes, digest: Optional[str]) -> Path:
+        """
+        写入响应体临时文件，内容存储中已有相同内容时直接创建硬链接，不再写入数据
+
+        Args:
+            path: 最终的目标路径
+            content: 响应体
+            digest: 内容哈希 (None 表示不去重)
+
+        Returns:
+            临时文件路径
+        """
+        if digest is not None:
+            temp_path = self._temp_path(path)
+            if self.blob_store.link(digest, temp_path):
+                return temp_path
+        temp_path = self._write_temp(path, content)
+        if digest is not None:
+            self.blob_store.add(digest, temp_path)
+        return temp_path
+
+    @staticmethod
+    def _body_path(cache_path: Path) -> Path:
+        """条目格式缓存单独保存响应体的文件路径"""
+        return cache_path.with_name(cache_path.name + constants.CACHE_FILE_EXTENSION_BODY)
+
+    def _commit_entry_body(
+            self, cache_path: Path, body_temp: Path, header: Dict[str, Any]
+    ) -> None:
+        """
+        提交响应体单独保存的条目: 先替换响应体文件，再替换只有头部的条目文件
+
+        头部记录响应体文件的大小和修改时间，读取时二者不一致视为不存在 (同 GET 无参数缓存的元数据)
+
+        Args:
+            cache_path: 条目文件路径
+            body_temp: 已写好响应体的临时文件
+            header: 条目头部
+        """
+        stat_result = os.stat(body_temp)
+        header.update(body_size=stat_result.st_size, body_mtime_ns=stat_result.st_mtime_ns)
+        entry_temp = self._write_temp(cache_path, CacheEntryUtil.encode_header(header))
+        try:
+            os.replace(body_temp, self._body_path(cache_path))
+        except BaseException:
+            entry_temp.unlink(missing_ok=True)
+            raise
+        os.replace(entry_temp, cache_path)
+
+    @staticmethod
+    def _build_freshness(
+            headers: Dict[str, str], fetched_at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        构建缓存条目的新鲜度信息 (获取时间和 Cache-Control/Expires 解析结果)
+
+        Args:
+            headers: 响应头
+            fetched_at: 获取响应的时间戳 (默认当前时间)
+
+        Returns:
+            新鲜度字典: {"fetched_at", "ttl", "stale_while_revalidate", "stale_if_error"}
+        """
+        if fetched_at is None:
+            fetched_at = time.time()
+        return {"fetched_at": fetched_at, **HttpUtil.parse_freshness(headers, fetched_at)}
+
+    @staticmethod
+    def _read_freshness(data: Dict[str, Any], mtime: float) -> Dict[str, Any]:
+        """
+        从元数据或条目头部读取新鲜度信息，旧版缓存以文件修改时间作为获取时间
+
+        Args:
+            data: 元数据或条目头部字典
+            mtime: 缓存文件的修改时间
+
+        Returns:
+            新鲜度字典
+        """
+        return {
+            "fetched_at": data.get("fetched_at", mtime),
+            "ttl": data.get("ttl"),
+            "stale_while_revalidate": data.get("stale_while_revalidate"),
+            "stale_if_error": data.get("stale_if_error"),
+        }
+
+    @staticmethod
+    def _variant_path(cache_path: Path, encoding: str) -> Path:
+        """预压缩变体文件路径"""
+        return cache_path.with_name(
+            f"{cache_path.name}.{encoding}{constants.CACHE_FILE_EXTENSION_VARIANT}"
+        )
+
+    def _write_variants(
+            self,
+            cache_path: Path,
+            source: Callable[[], Iterable[bytes]],
+            size: int,
+            headers: Dict[str, str],
+            digest: Optional[str] = None,
+    ) -> Dict[str, tuple[Path, int]]:
+        """
+        将响应体压缩为各编码的变体，写入临时文件
+
+        只压缩达到最小长度的文本类响应，压缩效果不明显的编码不保存；
+        内容存储中已有相同内容的变体时直接链接，无需再次压缩
+
+        Args:
+            cache_path: 缓存文件路径
+            source: 返回响应体数据块的函数 (每种编码调用一次)
+            size: 响应体长度
+            headers: 已清理的响应头
+            digest: 响应体的内容哈希 (None 表示不去重)
+
+        Returns:
+            {编码: (临时文件路径, 压缩后长度)}
+        """
+        if (
+            not self.precompress_encodings
+            or size < app_config.precompress_min_size
+            or not CompressionUtil.is_compressible(headers.get("content-type"))
+        ):
+            return {}
+
+        variant_temps: Dict[str, tuple[Path, int]] = {}
+        try:
+            for encoding in self.precompress_encodings:
+                temp_path = self._temp_path(self._variant_path(cache_path, encoding))
+                blob_key = f"{digest}.{encoding}" if digest is not None else None
+                if blob_key is not None and self.blob_store.link(blob_key, temp_path):
+                    variant_temps[encoding] = (temp_path, os.stat(temp_path).st_size)
+                    continue
+                try:
+                    with open(temp_path, "wb") as file:
+                        length = CompressionUtil.compress_stream(source(), file, encoding)
+                        if app_config.cache_fsync:
+                            file.flush()
+                            os.fsync(file.fileno())
+                except BaseException:
+                    temp_path.unlink(missing_ok=True)
+                    raise
+
+                if length >= size * constants.PRECOMPRESS_MAX_RATIO:
+                    temp_path.unlink(missing_ok=True)
+                    continue
+                variant_temps[encoding] = (temp_path, length)
+                if blob_key is not None:
+                    self.blob_store.add(blob_key, temp_path)
+        except Exception as e:
+            # 压缩失败不影响缓存本身
+            logger.warning(f"Precompression failed for {cache_path}: {e}")
+            for temp_path, _ in variant_temps.values():
+                temp_path.unlink(missing_ok=True)
+            return {}
+        return variant_temps
+
+    def _commit_variants(
+            self, cache_path: Path, variant_temps: Dict[str, tuple[Path, int]]
+    ) -> Dict[str, int]:
+        """
+        将变体临时文件替换到变体路径，并删除本次未生成的旧变体 (需持有写锁)
+
+        Args:
+            cache_path: 缓存文件路径
+            variant_temps: _write_variants 的返回值
+
+        Returns:
+            {编码: 压缩后长度}，记录在元数据中用于读取时校验
+        """
+        for encoding in constants.PRECOMPRESS_ENCODINGS:
+            variant_path = self._variant_path(cache_path, encoding)
+            if encoding in variant_temps:
+                os.replace(variant_temps[encoding][0], variant_path)
+            else:
+                variant_path.unlink(missing_ok=True)
+        return {encoding: length for encoding, (_, length) in variant_temps.items()}
+
+    def _load_variants(
+            self, cache_path: Path, declared: Optional[Dict[str, int]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        读取元数据中记录的变体，长度与记录不一致 (已被并发写入替换) 的变体忽略
+
+        Args:
+            cache_path: 缓存文件路径
+            declared: 元数据中的 {编码: 压缩后长度}
+
+        Returns:
+            {编码: {"file_path": 变体文件路径, "length": 长度, "identity": 文件标识}}
+        """
+        variants = {}
+        for encoding, length in (declared or {}).items():
+            variant_path = self._variant_path(cache_path, encoding)
+            try:
+                stat_result = os.stat(variant_path)
+            except FileNotFoundError:
+                continue
+            if stat_result.st_size != length:
+                continue
+            variants[encoding] = {
+                "file_path": str(variant_path),
+                "length": length,
+                "identity": file_identity(stat_result),
+            }
+        return variants
+
+    @staticmethod
+    def compute_etag(content: bytes) -> str:
+        """
+        根据响应体内容计算强 ETag (与上游的 ETag 相互独立)
+
+        Args:
+            content: 响应体
+
+        Returns:
+            带引号的 ETag 字符串
+        """
+        return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+    async def acompute_etag(self, content: bytes) -> str:
+        """
+        异步计算响应体的 ETag，大响应体在 I/O 线程池中计算 (hashlib 计算时释放 GIL)，避免阻塞事件循环
+
+        Args:
+            content: 响应体
+
+        Returns:
+            带引号的 ETag 字符串 (同 compute_etag)
+        """
+        if len(content) >= app_config.file_response_threshold:
+            return await self._run_io(self.compute_etag, content)
+        return self.compute_etag(content)
+
+    @staticmethod
+    def _weak_etag(stat_result: os.stat_result) -> str:
+        """
+        没有保存 ETag 的缓存 (旧版缓存、流式写入的条目) 根据文件大小和修改时间生成弱 ETag
+
+        Args:
+            stat_result: 缓存文件的 stat 结果
+
+        Returns:
+            弱 ETag 字符串
+        """
+        return f'W/"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+    @staticmethod
+    def _commit_raw(
+            cache_path: Path,
+            body_temp: Path,
+            status_code: int,
+            headers: Dict[str, str],
+            freshness: Dict[str, Any],
+            etag: Optional[str] = None,
+            variants: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        提交 GET 无参数缓存: 先替换元数据，再替换内容文件
+
+        元数据记录内容文件的大小和修改时间，读取时二者不一致说明
+        内容和元数据来自不同的写入 (或写入中途崩溃)，该条目视为不存在
+
+        Args:
+            cache_path: 缓存内容文件路径
+            body_temp: 已写好内容的临时文件
+            status_code: HTTP 状态码
+            headers: 已清理的响应头
+            freshness: 新鲜度信息
+            etag: 响应体的强 ETag
+            variants: 预压缩变体 {编码: 压缩后长度}
+        """
+        meta_path = CacheManager._meta_path(cache_path)
+        try:
+            stat_result = os.stat(body_temp)
+            meta_data = {
+                "status_code": status_code,
+                "headers": headers,
+                "body_size": stat_result.st_size,
+                "body_mtime_ns": stat_result.st_mtime_ns,
+                "etag": etag,
+                "variants": variants or {},
+                **freshness,
+            }
+            meta_temp = CacheManager._write_temp(
+                meta_path,
+                JsonUtil.dumps(meta_data, pretty=True),
+            )
+            os.replace(meta_temp, meta_path)
+            os.replace(body_temp, cache_path)
+        except BaseException:
+            body_temp.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _meta_path(cache_path: Path) -> Path:
+        """GET 无参数缓存的元数据文件路径"""
+        return cache_path.with_suffix(
+            cache_path.suffix + constants.CACHE_FILE_EXTENSION_META
+        )
+
+    def _is_raw_entry(self, url: str, method: str) -> bool:
+        """
+        判断缓存是否按原始文件保存 (GET 无参数，包括规范化后不剩参数的)，否则使用条目格式
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+
+        Returns:
+            是否为原始文件缓存
+        """
+        if method.upper() != constants.HTTP_METHOD_GET:
+            return False
+        domain, path, query = CachePathUtil.extract_url_parts(url)
+        if query:
+            query = self.key_normalizer.normalize(domain, path, query, None)[0]
+        return not query
+
+    @staticmethod
+    def _legacy_path(cache_path: Path) -> Path:
+        """旧版 JSON 格式条目的路径"""
+        return cache_path.with_suffix(constants.CACHE_FILE_EXTENSION_JSON)
+
+    @staticmethod
+    def _build_entry_header(
+            url: str,
+            method: str,
+            headers: Dict[str, str],
+            status_code: int,
+            body: Optional[bytes],
+            body_content_type: Optional[str] = None,
+            freshness: Optional[Dict[str, Any]] = None,
+            etag: Optional[str] = None,
+            variants: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        构建条目格式的头部 (状态码、响应头、新鲜度和请求指纹)
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+            headers: 已清理的响应头
+            status_code: HTTP 状态码
+            body: 请求体 (POST 请求需要)
+            body_content_type: 请求体的 Content-Type
+            freshness: 新鲜度信息
+            etag: 响应体的强 ETag
+            variants: 预压缩变体 {编码: 压缩后长度}
+
+        Returns:
+            头部字典
+        """
+        header = {
+            "status_code": status_code,
+            "headers": headers,
+            "etag": etag,
+            "variants": variants or {},
+            **(freshness or {}),
+        }
+        domain, _, query = CachePathUtil.extract_url_parts(url)
+        if method.upper() == constants.HTTP_METHOD_GET:
+            header["query_params"] = query
+        else:
+            # 非文本请求体 (如文件上传) 不解码，只保存指纹
+            header["request_body"] = (
+                EncodingUtil.detect_and_decode(body, body_content_type, domain)
+                if body
+                else ""
+            )
+            header["request_body_hash"] = CachePathUtil.compute_hash(body or b"")
+        return header
+
+    async def aopen_stream_writer(
+            self,
+            url: str,
+            method: str,
+            headers: Optional[Dict[str, str]] = None,
+            status_code: int = 200,
+            body: Optional[bytes] = None,
+            body_content_type: Optional[str] = None,
+    ) -> "CacheStreamWriter":
+        """
+        打开流式缓存写入器，边接收响应边写入临时文件
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+            headers: 响应头
+            status_code: HTTP 状态码
+            body: 请求体 (POST 请求需要)
+            body_content_type: 请求体的 Content-Type
+
+        Returns:
+            流式缓存写入器
+        """
+        writer = CacheStreamWriter(
+            self, url, method, headers, status_code, body, body_content_type
+        )
+        await self._run_io(writer.open)
+        return writer
+
+    def get_response(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        从缓存读取响应
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+            body: 请求体 (POST 请求需要)
+
+        Returns:
+            包含响应数据的字典,如果缓存不存在则返回 None
+            字典格式: {
+                "content": bytes,
+                "headers": dict,
+                "status_code": int
+            }
+            大响应体不读取内容，以 "file_path" (缓存文件路径) 代替 "content"，
+            同时带上 "length"、读取时的文件标识 "identity" (发送前据此确认文件未被替换)
+            和所属的 "cache_key" (文件被替换时据此使内存缓存中的副本失效)，
+            条目格式还会带上响应体在文件中的 "offset"
+        """
+        cache_path, normalized = self._resolve_cache_path(url, method, body)
+        cached = self._get_cached(cache_path, url, method)
+        if cached is None:
+            unsharded = self._unsharded_path(cache_path)
+            if unsharded is not None:
+                cached = self._get_cached(unsharded, url, method)
+        self.key_normalizer.record_lookup(normalized, cached is not None)
+        return cached
+
+    def _get_cached(self, cache_path: Path, url: str, method: str) -> Optional[Dict[str, Any]]:
+        """
+        按缓存路径依次查找写入队列、内存缓存和磁盘
+
+        Args:
+            cache_path: 缓存文件路径
+            url: 请求的完整 URL
+            method: HTTP 方法
+
+        Returns:
+            缓存条目，不存在时返回 None
+        """
+        cache_key = str(cache_path)
+        cached = self._get_pending(cache_key) or self.memory_cache.get(cache_key)
+        if cached is None:
+            if self._index_misses(cache_key):
+                return None
+            generation = self.memory_cache.generation
+            cached = self._load_response(cache_path, url, method)
+            if cached is None:
+                self._forget_missing(cache_path, url, method)
+                return None
+            self.memory_cache.put(cache_key, cached, generation)
+        self._index_touch(cache_key, cached)
+        return cached
+
+    def _index_misses(self, cache_key: str) -> bool:
+        """
+        无需访问文件系统即可确定未命中: 索引已就绪且不包含该缓存键，
+        或 (未启用索引时) 布隆过滤器判定该缓存键一定不存在
+        """
+        if self.index is not None:
+            return self.index.ready and cache_key not in self.index
+        return self.bloom is not None and self.bloom.ready and cache_key not in self.bloom
+
+    def _index_touch(self, cache_key: str, cached: Dict[str, Any]) -> None:
+        """
+        在索引中记录命中
+
+        Args:
+            cache_key: 缓存键
+            cached: 读取到的缓存条目
+        """
+        if self.index is not None:
+            self.index.touch(cache_key, cached)
+
+    def _forget_missing(self, cache_path: Path, url: str, method: str) -> None:
+        """
+        读取不到缓存时，确认文件已不存在 (被外部删除) 后从索引移除该记录
+
+        文件仍存在 (并发写入导致读取不一致、格式无效) 时保留记录，避免之后的查找
+        在索引重建前一直按未命中处理；检查和移除在写锁内完成，不会移除并发写入刚提交的条目
+
+        Args:
+            cache_path: 缓存文件路径
+            url: 请求的完整 URL
+            method: HTTP 方法
+        """
+        if self.index is None or not self.index.ready:
+            return
+        paths = [cache_path]
+        if not self._is_raw_entry(url, method):
+            paths.append(self._legacy_path(cache_path))
+        with self._write_lock(str(cache_path)):
+            if not any(path.exists() for path in paths):
+                self.index.remove(str(cache_path))
+
+    def _load_response(
+            self, cache_path: Path, url: str, method: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        从磁盘读取并解析缓存文件
+
+        Args:
+            cache_path: 缓存文件路径
+            url: 请求的完整 URL
+            method: HTTP 方法
+
+        Returns:
+            包含响应数据的字典，如果缓存不存在则返回 None
+        """
+        load = self._load_raw if self._is_raw_entry(url, method) else self._load_entry
+        try:
+            return load(cache_path)
+        except InconsistentEntryError:
+            pass
+
+        # 并发写入恰好在两次读取之间提交: 持有写锁重新读取 (写入方提交完成前不会释放)
+        with self._write_lock(str(cache_path)):
+            try:
+                return load(cache_path)
+            except InconsistentEntryError:
+                logger.debug(f"Cache entry is inconsistent, treating as miss: {cache_path}")
+                return None
+
+    def _load_raw(self, cache_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取 GET 无参数缓存 (内容文件和 .meta 元数据文件)
+
+        Args:
+            cache_path: 缓存内容文件路径
+
+        Returns:
+            包含响应数据的字典，缓存不存在时返回 None
+
+        Raises:
+            InconsistentEntryError: 元数据和内容文件来自不同的写入
+        """
+        # 元数据和内容由不同的写入产生时重试一次 (并发写入恰好发生在两次读取之间)
+        for _ in range(constants.CACHE_READ_ATTEMPTS):
+            meta_data = self._read_meta(cache_path)
+            try:
+                file = open(cache_path, "rb")
+            except FileNotFoundError:
+                return None
+
+            with file:
+                stat_result = os.fstat(file.fileno())
+                if not self._meta_matches(meta_data, stat_result):
+                    continue
+
+                cached = {
+                    "headers": meta_data.get("headers", {}),
+                    "status_code": meta_data.get("status_code", constants.HTTP_STATUS_OK),
+                    "etag": meta_data.get("etag") or self._weak_etag(stat_result),
+                    "variants": self._load_variants(cache_path, meta_data.get("variants")),
+                    **self._read_freshness(meta_data, stat_result.st_mtime),
+                }
+
+                # 大文件不读入内存，由文件响应直接发送
+                if stat_result.st_size >= app_config.file_response_threshold:
+                    cached.update(
+                        cache_key=str(cache_path),
+                        file_path=str(cache_path),
+                        length=stat_result.st_size,
+                        identity=file_identity(stat_result),
+                    )
+                else:
+                    # GET 请求无参数直接读取内容
+                    cached["content"] = file.read()
+                return cached
+
+        raise InconsistentEntryError(str(cache_path))
+
+    def _read_meta(self, cache_path: Path) -> Dict[str, Any]:
+        """
+        读取 GET 无参数缓存的元数据
+
+        Args:
+            cache_path: 缓存内容文件路径
+
+        Returns:
+            元数据字典，不存在时返回空字典
+        """
+        try:
+            return JsonUtil.loads(self._meta_path(cache_path).read_bytes())
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def _meta_matches(meta_data: Dict[str, Any], stat_result: os.stat_result) -> bool:
+        """
+        校验元数据与内容文件是否来自同一次写入
+
+        没有记录内容大小的元数据 (旧版缓存或手动放入的文件) 不做校验
+
+        Args:
+            meta_data: 元数据字典
+            stat_result: 内容文件的 stat 结果
+
+        Returns:
+            是否一致
+        """
+        if "body_size" not in meta_data:
+            return True
+        return (
+            meta_data["body_size"] == stat_result.st_size
+            and meta_data.get("body_mtime_ns") == stat_result.st_mtime_ns
+        )
+
+    def _load_entry(self, cache_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取条目格式的缓存 (GET 带参数和 POST 请求)，兼容旧版 JSON 格式
+
+        Args:
+            cache_path: 条目文件路径
+
+        Returns:
+            包含响应数据的字典，如果缓存不存在或格式无效则返回 None
+
+        Raises:
+            InconsistentEntryError: 条目头部和单独保存的响应体来自不同的写入
+        """
+        try:
+            file = open(cache_path, "rb")
+        except FileNotFoundError:
+            return self._load_legacy_entry(self._legacy_path(cache_path))
+
+        with file:
+            parsed = CacheEntryUtil.read_header(file)
+            if parsed is None:
+                return None
+            header, offset = parsed
+            stat_result = os.fstat(file.fileno())
+            if "body_size" not in header:
+                return self._build_entry(
+                    cache_path, header, file, cache_path, offset, stat_result, stat_result
+                )
+
+        # 响应体单独保存在 .body 文件中 (可能与其他条目共享内容)
+        body_path = self._body_path(cache_path)
+        try:
+            body_file = open(body_path, "rb")
+        except FileNotFoundError:
+            raise InconsistentEntryError(str(cache_path)) from None
+        with body_file:
+            body_stat = os.fstat(body_file.fileno())
+            if not self._meta_matches(header, body_stat):
+                raise InconsistentEntryError(str(cache_path))
+            return self._build_entry(
+                cache_path, header, body_file, body_path, 0, body_stat, stat_result
+            )
+
+    def _build_entry(
+            self,
+            cache_path: Path,
+            header: Dict[str, Any],
+            body_file: BinaryIO,
+            body_path: Path,
+            offset: int,
+            body_stat: os.stat_result,
+            entry_stat: os.stat_result,
+    ) -> Dict[str, Any]:
+        """
+        根据条目头部和响应体文件构建缓存条目
+
+        Args:
+            cache_path: 条目文件路径
+            header: 条目头部
+            body_file: 已定位到响应体起始位置的文件
+            body_path: 响应体所在文件的路径
+            offset: 响应体在文件中的偏移
+            body_stat: 响应体所在文件的 stat 结果
+            entry_stat: 条目文件的 stat 结果
+
+        Returns:
+            缓存条目字典
+        """
+        length = body_stat.st_size - offset
+        cached = {
+            "headers": header.get("headers", {}),
+            "status_code": header.get("status_code", constants.HTTP_STATUS_OK),
+            "etag": header.get("etag") or self._weak_etag(body_stat),
+            "variants": self._load_variants(cache_path, header.get("variants")),
+            **self._read_freshness(header, entry_stat.st_mtime),
+        }
+        # 大响应体不读入内存，由文件响应从偏移位置直接发送
+        if length >= app_config.file_response_threshold:
+            cached.update(
+                cache_key=str(cache_path),
+                file_path=str(body_path),
+                offset=offset,
+                length=length,
+                identity=file_identity(body_stat),
+            )
+        else:
+            cached["content"] = body_file.read()
+        return cached
+
+    @staticmethod
+    def _load_legacy_entry(legacy_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取旧版 JSON 格式的缓存 (响应体已被解码为文本保存)
+
+        Args:
+            legacy_path: 旧版条目文件路径
+
+        Returns:
+            包含响应数据的字典，如果文件不存在则返回 None
+        """
+        try:
+            data = json.loads(legacy_path.read_text(encoding=constants.ENCODING_UTF8))
+            stat_result = legacy_path.stat()
+        except FileNotFoundError:
+            return None
+        return {
+            "content": data.get("content", "").encode(constants.ENCODING_UTF8),
+            "headers": data.get("headers", {}),
+            "status_code": data.get("status_code", constants.HTTP_STATUS_OK),
+            "etag": CacheManager._weak_etag(stat_result),
+            **CacheManager._read_freshness(data, stat_result.st_mtime),
+        }
+
+    def has_cache(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> bool:
+        """
+        检查缓存是否存在
+
+        Args:
+            url: 请求的完整 URL
+            method: HTTP 方法
+            body: 请求体 (POST 请求需要)
+
+        Returns:
+            缓存是否存在
+        """
+        cache_path = self._get_cache_path(url, method, body)
+        if self._has_cached(cache_path, url, method):
+            return True
+        unsharded = self._unsharded_path(cache_path)
+        return unsharded is not None and self._has_cached(unsharded, url, method)
+
+    def _has_cached(self, cache_path: Path, url: str, method: str) -> bool:
+        """
+        检查缓存路径是否存在 (写入队列、内存缓存、索引或文件系统)
+
+        Args:
+            cache_path: 缓存文件路径
+            url: 请求的完整 URL
+            method: HTTP 方法
+
+        Returns:
+            缓存是否存在
+        """
+        cache_key = str(cache_path)
+        if self._get_pending(cache_key) is not None or cache_key in self.memory_cache:
+            return True
+        if self._index_misses(cache_key):
+            return False
+        if self.index is not None and self.index.ready:
+            return True
+        if cache_path.exists():
+            return True
+        return not self._is_raw_entry(url, method) and self._legacy_path(cache_path).exists()
+
+    async def asave_response(
+            self,
+            url: str,
+            method: str,
+            content: bytes,
+            headers: Optional[Dict[str, str]] = None,
+            status_code: int = 200,
+            body: Optional[bytes] = None,
+            body_content_type: Optional[str] = None,
+            etag: Optional[str] = None,
+    ) -> None:
+        """
+        异步保存响应到缓存
+
+        启用写入队列时只入队，由后台任务写入磁盘；写入完成前读取方直接使用队列中的条目。
+        未启用时在 I/O 线程池中直接写入
+
+        参数同 save_response，etag 为调用方已经计算好的 acompute_etag 结果 (未提供时计算)
+        """
+        if etag is None:
+            etag = await self.acompute_etag(content)
+        kwargs = dict(
+            url=url,
+            method=method,
+            content=content,
+            headers=headers,
+            status_code=status_code,
+            body=body,
+            body_content_type=body_content_type,
+            fetched_at=time.time(),
+            etag=etag,
+        )
+        if self.write_queue is None:
+            await self._write_now(**kwargs)
+            return
+
+        cache_key = self.get_cache_key(url, method, body)
+        cleaned_headers = HttpUtil.clean_response_headers(headers or {})
+        entry = {
+            "content": content,
+            "headers": cleaned_headers,
+            "status_code": status_code,
+            "etag": kwargs["etag"],
+            **self._build_freshness(cleaned_headers, kwargs["fetched_at"]),
+        }
+        self.memory_cache.invalidate(cache_key)
+        await self.write_queue.submit(cache_key, entry, **kwargs)
+
+    async def _write_now(self, **kwargs: Any) -> None:
+        """在 I/O 线程池中执行 save_response"""
+        await self._run_io(self.save_response, **kwargs)
+
+    def _get_pending(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """获取写入队列中尚未落盘的条目"""
+        if self.write_queue is None:
+            return None
+        return self.write_queue.get_pending(cache_key)
+
+    async def arefresh_response(
+            self,
+            url: str,
+            method: str,
+            headers: Dict[str, str],
+            body: Optional[bytes] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        异步更新缓存的响应头和获取时间，文件操作在 I/O 线程池中执行
+
+        参数和返回值同 refresh_response
+        """
+        return await self._run_io(self.refresh_response, url, method, headers, body)
+
+    async def aget_response(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        异步读取缓存，文件读取在 I/O 线程池中执行
+
+        参数和返回值同 get_response
+        """
+        cache_path, normalized = self._resolve_cache_path(url, method, body)
+        cached = await self._aget_cached(cache_path, url, method)
+        if cached is None:
+            unsharded = self._unsharded_path(cache_path)
+            if unsharded is not None:
+                cached = await self._aget_cached(unsharded, url, method)
+        self.key_normalizer.record_lookup(normalized, cached is not None)
+        return cached
+
+    async def _aget_cached(
+            self, cache_path: Path, url: str, method: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        异步按缓存路径查找，磁盘读取在 I/O 线程池中执行
+
+        参数和返回值同 _get_cached
+        """
+        cache_key = str(cache_path)
+        cached = self._get_pending(cache_key) or self.memory_cache.get(cache_key)
+        if cached is None:
+            if self._index_misses(cache_key):
+                return None
+            generation = self.memory_cache.generation
+            cached = await self._run_io(self._load_response, cache_path, url, method)
+            if cached is None:
+                if self.index is not None and self.index.ready:
+                    await self._run_io(self._forget_missing, cache_path, url, method)
+                return None
+            self.memory_cache.put(cache_key, cached, generation)
+        self._index_touch(cache_key, cached)
+        return cached
+
+    async def aload_response(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        绕过内存缓存和索引直接从磁盘读取 (读取其他 worker 刚写入、尚未同步到索引的条目)
+
+        参数和返回值同 get_response
+        """
+        cache_path = self._get_cache_path(url, method, body)
+        cache_key = str(cache_path)
+        self.memory_cache.invalidate(cache_key)
+        generation = self.memory_cache.generation
+        cached = await self._run_io(self._load_response, cache_path, url, method)
+        if cached is not None:
+            self.memory_cache.put(cache_key, cached, generation)
+        return cached
+
+    async def ahas_cache(
+            self, url: str, method: str = "GET", body: Optional[bytes] = None
+    ) -> bool:
+        """
+        异步检查缓存是否存在
+
+        参数和返回值同 has_cache
+        """
+        cache_key = self.get_cache_key(url, method, body)
+        if self._get_pending(cache_key) is not None or cache_key in self.memory_cache:
+            return True
+        return await self._run_io(self.has_cache, url, method, body)
+
+    @staticmethod
+    def get_stale_seconds(cached: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+        """
+        计算缓存条目已过期的秒数
+
+        新鲜期取响应声明的值，未声明时使用 CACHE_DEFAULT_TTL
+
+        Args:
+            cached: get_response 返回的缓存条目
+            now: 当前时间戳 (默认当前时间)
+
+        Returns:
+            过期秒数 (未过期时小于等于 0)，永不过期的条目返回 None
+        """
+        ttl = cached.get("ttl")
+        if ttl is None:
+            ttl = app_config.cache_default_ttl
+        if ttl is None:
+            return None
+        age = (now if now is not None else time.time()) - cached.get("fetched_at", 0)
+        return age - ttl
+
+    @staticmethod
+    def get_freshness(cached: Dict[str, Any], now: Optional[float] = None) -> str:
+        """
+        判断缓存条目的新鲜度状态
+
+        stale-while-revalidate 窗口优先使用响应声明的值，未声明时使用配置
+
+        Args:
+            cached: get_response 返回的缓存条目
+            now: 当前时间戳 (默认当前时间)
+
+        Returns:
+            constants.CACHE_STATE_FRESH / CACHE_STATE_STALE / CACHE_STATE_EXPIRED
+        """
+        stale_for = CacheManager.get_stale_seconds(cached, now)
+        if stale_for is None or stale_for <= 0:
+            return constants.CACHE_STATE_FRESH
+
+        window = cached.get("stale_while_revalidate")
+        if window is None:
+            window = app_config.cache_stale_while_revalidate
+        if stale_for <= window:
+            return constants.CACHE_STATE_STALE
+        return constants.CACHE_STATE_EXPIRED
+
+    @staticmethod
+    def can_serve_stale_on_error(cached: Dict[str, Any]) -> bool:
+        """
+        上游请求失败时，判断过期缓存是否仍在 stale-if-error 窗口内
+
+        Args:
+            cached: 缓存条目
+
+        Returns:
+            是否可以使用该缓存
+        """
+        stale_for = CacheManager.get_stale_seconds(cached)
+        if stale_for is None:
+            return True
+        window = cached.get("stale_if_error")
+        if window is None:
+            window = app_config.cache_stale_if_error
+        return stale_for <= window
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            各缓存层的统计信息字典
+        """
+        stats = {"memory": self.memory_cache.get_stats()}
+        if self.workers > 1:
+            stats["worker"] = {
+                "pid": os.getpid(),
+                "leader": self.is_leader,
+                "fill_lock": dict(self.fill_stats),
+            }
+        if self.index is not None:
+            stats["index"] = self.index.get_stats()
+        if self.bloom is not None:
+            stats["bloom"] = self.bloom.get_stats()
+        if self.key_normalizer.enabled:
+            stats["keys"] = self.key_normalizer.get_stats()
+        if self.blob_store is not None:
+            stats["blobs"] = self.blob_store.get_stats()
+        if self.write_queue is not None:
+            stats["write_queue"] = self.write_queue.get_stats()
+        if self.evictor is not None:
+            stats["eviction"] = self.evictor.get_stats()
+        return stats
+
+    async def flush(self) -> None:
+        """等待写入队列中的条目全部写入磁盘"""
+        if self.write_queue is not None:
+            await self.write_queue.flush()
+
+    async def aclose(self) -> None:
+        """停止后台任务，写完队列中剩余的条目后关闭 I/O 线程池并保存索引"""
+        for task in (self._index_task, self._blob_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._index_task = self._blob_task = None
+        if self.evictor is not None:
+            await self.evictor.close()
+        if self.write_queue is not None:
+            await self.write_queue.close()
+        self.close()
+
+    def close(self) -> None:
+        """关闭 I/O 线程池，等待未完成的写入结束，之后保存索引"""
+        self._io_executor.shutdown(wait=True)
+        if self.index is not None:
+            self.index.close()
+        if self._leader_fd is not None:
+            LockUtil.release_file_lock(self._leader_fd)
+            self._leader_fd = None
+            self.is_leader = False
+
+    def _worker_stats_path(self, pid: int) -> Path:
+        """worker 统计快照文件路径"""
+        return self.cache_dir / constants.CACHE_DIR_WORKERS / f"{pid}{constants.CACHE_FILE_EXTENSION_JSON}"
+
+    def save_worker_stats(self, stats: Dict[str, Any]) -> None:
+        """
+        写入本进程的统计快照，供其他 worker 的统计接口汇总
+
+        Args:
+            stats: 本进程的统计信息
+        """
+        path = self._worker_stats_path(os.getpid())
+        path.parent.mkdir(exist_ok=True)
+        temp_path = self._write_temp(
+            path, json.dumps(stats, ensure_ascii=False, default=str).encode(constants.ENCODING_UTF8)
+        )
+        os.replace(temp_path, path)
+
+    def load_worker_stats(self, max_age: float) -> Dict[str, Dict[str, Any]]:
+        """
+        读取其他 worker 最近写入的统计快照
+
+        Args:
+            max_age: 快照的最长有效时间 (秒)，更早的快照 (已退出的 worker) 被删除
+
+        Returns:
+            进程号 -> 统计信息
+        """
+        stats_dir = self.cache_dir / constants.CACHE_DIR_WORKERS
+        own = self._worker_stats_path(os.getpid()).name
+        now = time.time()
+        result = {}
+        try:
+            paths = list(stats_dir.glob(f"*{constants.CACHE_FILE_EXTENSION_JSON}"))
+        except OSError:
+            return result
+        for path in paths:
+            if path.name == own:
+                continue
+            try:
+                if now - path.stat().st_mtime > max_age:
+                    # 异常退出的 worker 没有删除自己的快照
+                    path.unlink(missing_ok=True)
+                    continue
+                result[path.stem] = json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                continue
+        return result
+
+    def remove_worker_stats(self) -> None:
+        """删除本进程的统计快照 (退出时调用)"""
+        self._worker_stats_path(os.getpid()).unlink(missing_ok=True)
+
+
+class CacheStreamWriter:
+    """
+    流式缓存写入器
+    响应内容先写入同目录下的临时文件，传输完成后原子替换到缓存路径
+    """
+
+    def __init__(
+            self,
+            cache_manager: CacheManager,
+            url: str,
+            method: str,
+            headers: Optional[Dict[str, str]],
+            status_code: int,
+            body: Optional[bytes],
+            body_content_type: Optional[str] = None,
+    ):
+        self.cache_manager = cache_manager
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.status_code = status_code
+        self.body = body
+        self.body_content_type = body_content_type
+        self.freshness = cache_manager._build_freshness(headers or {})
+        # 边写入边计算响应体哈希 (内联响应体的条目格式头部先于响应体写入，无法保存 ETag)
+        self._hasher = hashlib.blake2b(digest_size=16)
+        self.cache_path = cache_manager._get_cache_path(url, method, body)
+        self.is_raw = cache_manager._is_raw_entry(url, method)
+        # 启用去重时条目格式的响应体单独保存，头部在传输完成后写入
+        self.external_body = not self.is_raw and cache_manager.blob_store is not None
+        self.body_path = (
+            cache_manager._body_path(self.cache_path) if self.external_body else self.cache_path
+        )
+        self.temp_path = cache_manager._temp_path(self.body_path)
+        self._file = None
+
+    def open(self) -> None:
+        """创建父目录并打开临时文件，内联响应体的条目格式先写入头部"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.temp_path, "wb")
+        if not self.is_raw and not self.external_body:
+            header = self.cache_manager._build_entry_header(
+                self.url,
+                self.method,
+                self.headers or {},
+                self.status_code,
+                self.body,
+                self.body_content_type,
+                self.freshness,
+            )
+            self._file.write(CacheEntryUtil.encode_header(header))
+
+    async def write(self, chunk: bytes) -> None:
+        """
+        写入一段响应内容
+
+        Args:
+            chunk: 响应内容片段
+        """
+        await self.cache_manager._run_io(self._write_chunk, chunk)
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._hasher.update(chunk)
+
+    async def commit(self) -> None:
+        """传输完成，将临时文件替换到缓存路径"""
+        await self.cache_manager._run_io(self._commit)
+
+    async def abort(self) -> None:
+        """传输中断，丢弃临时文件"""
+        await self.cache_manager._run_io(self._abort)
+
+    def _commit(self) -> None:
+        if app_config.cache_fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        cache_key = str(self.cache_path)
+        self.cache_manager.memory_cache.invalidate(cache_key)
+        etag = f'"{self._hasher.hexdigest()}"'
+
+        # 内容存储中已有相同内容时，临时文件替换为指向它的硬链接
+        digest = self.cache_manager._blob_digest(etag)
+        if digest is not None:
+            self.cache_manager.blob_store.deduplicate(digest, self.temp_path)
+
+        # 内联响应体的条目格式头部已先写入，无法记录变体，不生成预压缩变体
+        variant_temps = {}
+        if self.is_raw or self.external_body:
+            variant_temps = self.cache_manager._write_variants(
+                self.cache_path,
+                self._read_temp_chunks,
+                os.path.getsize(self.temp_path),
+                self.headers or {},
+                digest,
+            )
+
+        try:
+            with self.cache_manager._write_lock(cache_key):
+                if self.is_raw:
+                    variants = self.cache_manager._commit_variants(
+                        self.cache_path, variant_temps
+                    )
+                    self.cache_manager._commit_raw(
+                        self.cache_path,
+                        self.temp_path,
+                        self.status_code,
+                        self.headers or {},
+                        self.freshness,
+                        etag,
+                        variants,
+                    )
+                elif self.external_body:
+                    variants = self.cache_manager._commit_variants(
+                        self.cache_path, variant_temps
+                    )
+                    header = self.cache_manager._build_entry_header(
+                        self.url,
+                        self.method,
+                        self.headers or {},
+                        self.status_code,
+                        self.body,
+                        self.body_content_type,
+                        self.freshness,
+                        etag,
+                        variants,
+                    )
+                    self.cache_manager._commit_entry_body(self.cache_path, self.temp_path, header)
+                    self.cache_manager._legacy_path(self.cache_path).unlink(missing_ok=True)
+                else:
+                    self.cache_manager._commit_variants(self.cache_path, {})
+                    os.replace(self.temp_path, self.cache_path)
+                    self.cache_manager._body_path(self.cache_path).unlink(missing_ok=True)
+                    self.cache_manager._legacy_path(self.cache_path).unlink(missing_ok=True)
+        finally:
+            for temp_path, _ in variant_temps.values():
+                temp_path.unlink(missing_ok=True)
+            self.temp_path.unlink(missing_ok=True)
+
+        self.cache_manager.memory_cache.invalidate(cache_key)
+        self.cache_manager._index_entry(
+            self.cache_path,
+            self.status_code,
+            self.headers or {},
+            self.freshness["fetched_at"],
+        )
+        self.cache_manager._drop_unsharded(self.cache_path)
+
+    def _read_temp_chunks(self) -> Iterator[bytes]:
+        """分块读取已写完的临时文件"""
+        with open(self.temp_path, "rb") as file:
+            while chunk := file.read(constants.STREAM_CHUNK_SIZE):
+                yield chunk
+
+    def _abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self.temp_path.unlink(missing_ok=True)
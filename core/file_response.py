@@ -0,0 +1,163 @@
+"""
+缓存文件响应模块
+直接从缓存文件发送响应体，内容不会整体读入 Python 内存
+"""
+
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from utils import constants
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# 文件标识: (设备号, inode, 大小, 修改时间纳秒)，缓存文件总是整体替换，标识相同即内容相同
+FileIdentity = Tuple[int, int, int, int]
+
+
+def file_identity(stat_result: os.stat_result) -> FileIdentity:
+    """
+    根据 stat 结果计算文件标识
+
+    Args:
+        stat_result: os.stat / os.fstat 的结果
+
+    Returns:
+        文件标识
+    """
+    return (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+
+class CachedFileResponse(Response):
+    """
+    基于缓存文件的响应，发送文件中 [offset, offset + length) 区间的内容
+
+    发送响应头前先打开文件并与查找缓存时记录的文件标识比对，之后始终通过这个文件描述符发送:
+    缓存文件只会被整体替换 (新的 inode)，已打开的描述符读到的一定是查找时的那个版本。
+    文件已被替换或删除时改用 fallback 重新生成的响应
+
+    发送方式:
+    1. 分块读取文件发送 (os.pread，内存占用恒定为一个分块): uvicorn 下实际使用的方式
+    2. 服务器声明 http.response.zerocopysend 扩展时交给服务器零拷贝发送 (uvicorn 不提供该扩展)
+    """
+
+    chunk_size = constants.STREAM_CHUNK_SIZE
+
+    def __init__(
+        self,
+        path: str,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        offset: int = 0,
+        length: Optional[int] = None,
+        identity: Optional[FileIdentity] = None,
+        fallback: Optional[Callable[[], Awaitable[Response]]] = None,
+    ):
+        """
+        初始化缓存文件响应
+
+        Args:
+            path: 缓存文件路径
+            status_code: HTTP 状态码
+            headers: 响应头字典
+            media_type: Content-Type
+            offset: 响应体在文件中的起始偏移
+            length: 响应体长度，未提供时发送到文件末尾
+            identity: 查找缓存时记录的文件标识 (None 表示不校验)
+            fallback: 文件已变化时生成替代响应的协程函数 (未提供时返回 503)
+        """
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.offset = offset
+        self.length = length
+        self.identity = identity
+        self.fallback = fallback
+        self.background = None
+        self.init_headers(headers)
+
+    def _open(self) -> Optional[int]:
+        """打开文件并校验标识，文件不存在或已被替换时返回 None"""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        stat_result = os.fstat(fd)
+        if self.identity is not None and file_identity(stat_result) != tuple(self.identity):
+            os.close(fd)
+            return None
+        if self.length is None:
+            self.length = max(0, stat_result.st_size - self.offset)
+        elif self.offset + self.length > stat_result.st_size:
+            os.close(fd)
+            return None
+        return fd
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        fd = await anyio.to_thread.run_sync(self._open)
+        if fd is None:
+            await self._send_fallback(scope, receive, send)
+            return
+
+        try:
+            self.headers["content-length"] = str(self.length)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+
+            extensions = scope.get("extensions") or {}
+            if scope.get("method", "").upper() == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif ZEROCOPY_EXTENSION in extensions:
+                await send(
+                    {
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": fd,
+                        "offset": self.offset,
+                        "count": self.length,
+                        "more_body": False,
+                    }
+                )
+            else:
+                await self._send_chunks(fd, send)
+        finally:
+            os.close(fd)
+
+    async def _send_fallback(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """缓存文件在查找后被替换或删除，发送替代响应"""
+        if self.fallback is not None:
+            response = await self.fallback()
+            # 替代响应同样基于文件时不再重试，避免持续写入时反复回退
+            if isinstance(response, CachedFileResponse):
+                response.fallback = None
+        else:
+            response = Response(
+                content="Cache entry changed, please retry",
+                status_code=constants.HTTP_STATUS_SERVICE_UNAVAILABLE,
+                headers={"retry-after": "1"},
+            )
+        await response(scope, receive, send)
+
+    async def _send_chunks(self, fd: int, send: Send) -> None:
+        """从已打开的文件描述符分块读取发送"""
+        remaining = self.length
+        position = self.offset
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(
+                os.pread, fd, min(self.chunk_size, remaining), position
+            )
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            position += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0 or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
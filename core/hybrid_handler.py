@@ -3,15 +3,21 @@
 优先使用本地缓存，不存在时则代理并缓存
 """
 
+import asyncio
+import functools
 import logging
+from typing import Dict, Any, Optional, Set
 
 from fastapi import Request, Response
 
+from config import app_config
 from utils import constants
 from .cache_manager import CacheManager
 from .local_handler import LocalHandler
-from .proxy_handler import ProxyHandler
+from .proxy_handler import ProxyHandler, ProxyStream
 from .base_handler import BaseHandler
+from .single_flight import SingleFlight
+from .upstream_guard import UpstreamRejected
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +40,34 @@ class HybridHandler(BaseHandler):
         self.local_handler = LocalHandler(cache_manager, target_url)
         self.proxy_handler = ProxyHandler(target_url, cache_manager)
 
+        # 合并相同缓存键的并发未命中请求
+        self.single_flight = SingleFlight()
+
+        # 正在流式转发并写入缓存的响应 (按缓存键)，同一缓存键的其他请求等待写入完成后读取缓存
+        self._streams: Dict[str, ProxyStream] = {}
+        self.stream_waiters = 0
+
+        # 后台刷新任务 (保留引用避免被垃圾回收)
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        # 新鲜度统计: 各状态的命中次数、后台刷新次数、上游失败时使用过期缓存的次数
+        # 以及熔断器打开或上游并发已满时使用已有缓存的次数
+        self.freshness_stats = {
+            constants.CACHE_STATE_FRESH: 0,
+            constants.CACHE_STATE_STALE: 0,
+            constants.CACHE_STATE_EXPIRED: 0,
+            "revalidations": 0,
+            "revalidation_errors": 0,
+            "stale_if_error": 0,
+            "breaker_fallback": 0,
+        }
+
+        # 范围请求统计: 直接转发给上游的次数和触发后台填充的次数
+        self.range_stats = {"passthrough": 0, "fills": 0}
+
+        # 多 worker 时等待其他 worker 回源后直接使用其写入的缓存的次数
+        self.peer_fills = 0
+
     async def handle_request(self, request: Request, path: str) -> Response:
         """
         处理半代理模式请求
@@ -47,9 +81,7 @@ class HybridHandler(BaseHandler):
             FastAPI 响应对象
         """
         # 构建完整 URL
-        full_url = self.build_full_url(
-            self.target_url, path, str(request.url.query) if request.url.query else None
-        )
+        full_url = self.build_full_url(self.target_url, path, self.get_query(request))
         method = request.method
         self.log_request(method, full_url, "Hybrid mode")
 
@@ -60,25 +92,283 @@ class HybridHandler(BaseHandler):
             else None
         )
 
-        # 检查缓存是否存在
-        if self.cache_manager.has_cache(full_url, method, body):
-            logger.info(f"Cache hit, using local cache for: {full_url}")
-            # 从缓存读取
-            cached_response = self.cache_manager.get_response(full_url, method, body)
-            
-            if cached_response:
-                logger.info(f"Returning cached response for: {full_url}")
-                return self.build_response(
-                    content=cached_response["content"],
-                    status_code=cached_response["status_code"],
-                    headers=cached_response["headers"],
-                    path=path,
+        # 仅 GET 和 POST 会被缓存，其他方法直接代理
+        if method.upper() not in constants.CACHEABLE_METHODS:
+            return await self.proxy_handler.handle_request(request, path)
+
+        # 读取缓存 (索引就绪后未命中无需访问文件系统)
+        cached_response = await self.cache_manager.aget_response(full_url, method, body)
+
+        cache_key = self.cache_manager.get_cache_key(full_url, method, body)
+        if cached_response:
+            state = self.cache_manager.get_freshness(cached_response)
+            self.freshness_stats[state] += 1
+            if state == constants.CACHE_STATE_FRESH:
+                logger.info(f"Cache hit, returning cached response for: {full_url}")
+                return self.build_cached_response(cached_response, path, request)
+            if state == constants.CACHE_STATE_STALE:
+                # 立即返回过期缓存，后台刷新
+                logger.info(f"Cache stale, serving while revalidating: {full_url}")
+                self._revalidate_in_background(cache_key, request, path, body, cached_response)
+                return self.build_cached_response(cached_response, path, request)
+            logger.info(f"Cache expired, proxying request to: {full_url}")
+        else:
+            logger.info(f"Cache miss, proxying request to: {full_url}")
+
+        # 范围请求直接转发给上游 (部分内容不写入缓存)，按需在后台获取完整响应填充缓存
+        if method.upper() == constants.HTTP_METHOD_GET and "range" in request.headers:
+            self.range_stats["passthrough"] += 1
+            if cached_response or app_config.range_fill_on_miss:
+                self.range_stats["fills"] += 1
+                self._revalidate_in_background(cache_key, request, path, body, cached_response)
+            return await self.proxy_handler.handle_request(request, path)
+
+        # 同一缓存键的大响应正在流式写入缓存，等待写入完成
+        stream = self._streams.get(cache_key)
+        if stream is not None:
+            return await self._serve_after_stream(stream, request, path, full_url, body)
+
+        # 相同缓存键的并发请求只向上游发起一次 (始终获取完整响应，供所有等待者共享)
+        try:
+            result = await self.single_flight.do(
+                cache_key,
+                functools.partial(
+                    self._fetch_shared, cache_key, request, path, body, cached_response
+                ),
+            )
+        except Exception as e:
+            if (
+                cached_response
+                and isinstance(e, UpstreamRejected)
+                and cached_response.get("stale_if_error") != 0
+            ):
+                # 熔断器打开或上游并发已满时不受 stale-if-error 窗口限制，返回任何已有缓存
+                # (no-cache / must-revalidate 等禁止未经确认使用过期内容的响应除外)
+                self.freshness_stats["breaker_fallback"] += 1
+                logger.warning(f"Upstream unavailable ({e}), serving cached response for: {full_url}")
+                return self.build_cached_response(cached_response, path, request)
+            if cached_response and self.cache_manager.can_serve_stale_on_error(cached_response):
+                self.freshness_stats["stale_if_error"] += 1
+                logger.warning(f"Upstream request failed ({e}), serving stale cache for: {full_url}")
+                return self.build_cached_response(cached_response, path, request)
+            return self.proxy_handler.build_error_response(e, full_url)
+
+        stream = result.get("stream")
+        if stream is not None:
+            if stream.claim():
+                return self.build_streaming_response(
+                    stream, result["status_code"], result["headers"], path
                 )
+            # 流式响应只能被一个请求消费，其余并发请求等待其写入缓存
+            return await self._serve_after_stream(stream, request, path, full_url, body)
+
+        return self.build_cached_response(result, path, request)
+
+    def _revalidate_in_background(
+        self,
+        cache_key: str,
+        request: Request,
+        path: str,
+        body: Optional[bytes],
+        cached: Optional[Dict[str, Any]],
+    ) -> None:
+        """
+        在后台刷新过期缓存或填充缺失的缓存
+
+        Args:
+            cache_key: 缓存键
+            request: FastAPI 请求对象
+            path: 请求路径
+            body: 请求体
+            cached: 已有的缓存条目 (用于条件请求，不存在时为 None)
+        """
+        task = asyncio.create_task(self._revalidate(cache_key, request, path, body, cached))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
-        # 缓存不存在，使用代理模式
-        logger.info(f"Cache miss, proxying request to: {full_url}")
+    async def _revalidate(
+        self,
+        cache_key: str,
+        request: Request,
+        path: str,
+        body: Optional[bytes],
+        cached: Optional[Dict[str, Any]],
+    ) -> None:
+        """
+        回源获取完整响应并写入缓存，与同一缓存键的其他回源请求合并
+
+        Args:
+            cache_key: 缓存键
+            request: FastAPI 请求对象
+            path: 请求路径
+            body: 请求体
+            cached: 已有的缓存条目 (用于条件请求，不存在时为 None)
+        """
+        self.freshness_stats["revalidations"] += 1
+        # 原请求的响应已经返回，不能再读取请求体
+        fetch = functools.partial(
+            self._fetch_shared,
+            cache_key,
+            request,
+            path,
+            body if body is not None else b"",
+            cached,
+        )
+        try:
+            result = await self.single_flight.do(cache_key, fetch)
+            stream = result.get("stream")
+            if stream is not None and stream.claim():
+                # 没有客户端消费的流式响应，读完以写入缓存
+                async for _ in stream:
+                    pass
+        except UpstreamRejected as e:
+            # 熔断或排队已满时跳过本次刷新，保留已有缓存
+            self.freshness_stats["revalidation_errors"] += 1
+            logger.debug(f"Background revalidation skipped for {cache_key}: {e}")
+        except Exception as e:
+            self.freshness_stats["revalidation_errors"] += 1
+            logger.warning(f"Background revalidation failed for {cache_key}: {e}")
+
+    async def _fetch_shared(
+        self,
+        cache_key: str,
+        request: Request,
+        path: str,
+        body: Optional[bytes],
+        cached: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        回源获取完整响应，多 worker 时同一缓存键同时只有一个 worker 回源
+
+        等待过其他 worker 的填充锁时重新从磁盘读取，对方已写入新鲜的缓存则直接使用；
+        回源的 worker 在缓存写入磁盘后才释放锁 (流式响应在收到响应头后释放)
+
+        Args:
+            cache_key: 缓存键
+            request: FastAPI 请求对象
+            path: 请求路径
+            body: 请求体
+            cached: 已有的缓存条目 (用于条件请求，不存在时为 None)
+
+        Returns:
+            同 ProxyHandler.fetch
+        """
+        lock, waited = await self.cache_manager.acquire_fill_lock(cache_key)
+        release = True
+        try:
+            if waited:
+                full_url = self.build_full_url(self.target_url, path, self.get_query(request))
+                filled = await self.cache_manager.aload_response(full_url, request.method, body)
+                if (
+                    filled is not None
+                    and self.cache_manager.get_freshness(filled) == constants.CACHE_STATE_FRESH
+                ):
+                    self.peer_fills += 1
+                    return filled
+
+            result = await self.proxy_handler.fetch(request, path, body, cached, True)
+            stream = result.get("stream")
+            if stream is not None and stream.writer is not None:
+                self._track_stream(cache_key, stream)
+            if lock is not None and stream is None:
+                task = asyncio.create_task(self._release_after_write(cache_key, lock))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+                release = False
+            return result
+        finally:
+            if release:
+                self.cache_manager.release_fill_lock(lock)
+
+    def _track_stream(self, cache_key: str, stream: ProxyStream) -> None:
+        """
+        记录正在写入缓存的流式响应，传输结束后移除
+
+        Args:
+            cache_key: 缓存键
+            stream: 流式响应
+        """
+        self._streams[cache_key] = stream
+
+        async def untrack() -> None:
+            try:
+                await stream.wait_cached(app_config.request_timeout)
+            finally:
+                if self._streams.get(cache_key) is stream:
+                    del self._streams[cache_key]
+
+        task = asyncio.create_task(untrack())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _serve_after_stream(
+        self,
+        stream: ProxyStream,
+        request: Request,
+        path: str,
+        full_url: str,
+        body: Optional[bytes],
+    ) -> Response:
+        """
+        等待其他请求消费的流式响应写入缓存后返回缓存，
+        写入失败 (传输中断、不可缓存) 或长时间没有进展时独立回源
+
+        Args:
+            stream: 其他请求正在消费的流式响应
+            request: FastAPI 请求对象
+            path: 请求路径
+            full_url: 完整 URL
+            body: 请求体
+
+        Returns:
+            FastAPI 响应对象
+        """
+        self.stream_waiters += 1
+        if await stream.wait_cached(app_config.request_timeout):
+            cached = await self.cache_manager.aget_response(full_url, request.method, body)
+            if cached is not None:
+                logger.info(f"Streamed response cached, serving from cache: {full_url}")
+                return self.build_cached_response(cached, path, request)
+        logger.info(f"Streamed response not cached, proxying request to: {full_url}")
         return await self.proxy_handler.handle_request(request, path)
 
+    async def _release_after_write(self, cache_key: str, lock: Any) -> None:
+        """等待缓存写入磁盘后释放填充锁，其他 worker 随后即可从磁盘读到"""
+        try:
+            await self.cache_manager.await_written(cache_key)
+        finally:
+            self.cache_manager.release_fill_lock(lock)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取半代理模式统计信息
+
+        Returns:
+            包含条件回源、请求合并和新鲜度统计的字典
+        """
+        stats = {
+            **self.proxy_handler.get_stats(),
+            "single_flight": self.single_flight.get_stats(),
+            "freshness": dict(self.freshness_stats),
+            "range": dict(self.range_stats),
+        }
+        stats["single_flight"]["stream_waiters"] = self.stream_waiters
+        if self.cache_manager.workers > 1:
+            stats["single_flight"]["peer_fills"] = self.peer_fills
+        return stats
+
+    async def prewarm(self, count: int) -> None:
+        """
+        预先建立到目标服务器的连接
+
+        Args:
+            count: 预热的连接数
+        """
+        await self.proxy_handler.prewarm(count)
+
     async def close(self):
-        """关闭 HTTP 客户端"""
+        """取消后台刷新任务并关闭 HTTP 客户端"""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
         await self.proxy_handler.close()
@@ -0,0 +1,264 @@
+"""
+缓存键规范化模块
+计算缓存路径前规范化查询参数和 POST 请求体，使语义相同的请求 (参数顺序、JSON 键顺序和空白不同，
+或只有时间戳等易变参数不同) 命中同一个缓存条目
+"""
+
+import fnmatch
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+# 表单编码的请求体 (name=value&name=value)，其他格式的请求体不做表单规范化
+_FORM_BODY_PATTERN = re.compile(rb"[^=&\s]+=[^&\s]*(?:&[^=&\s]+=[^&\s]*)*")
+
+
+class _NamePatterns:
+    """参数名匹配规则 (精确名称或 fnmatch 通配符，如 "utm_*")"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.names: set[str] = set()
+        wildcards = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if any(char in pattern for char in "*?["):
+                wildcards.append(fnmatch.translate(pattern))
+            else:
+                self.names.add(pattern)
+        self.regex = re.compile("|".join(wildcards)) if wildcards else None
+
+    def __bool__(self) -> bool:
+        return bool(self.names) or self.regex is not None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names or (self.regex is not None and self.regex.match(name) is not None)
+
+
+class CacheKeyRule:
+    """按路径生效的规范化规则，未设置的项沿用全局配置"""
+
+    def __init__(
+        self,
+        match: str,
+        ignore_params: Iterable[str] = (),
+        keep_params: Optional[Iterable[str]] = None,
+        sort_params: Optional[bool] = None,
+        canonical_body: Optional[bool] = None,
+    ):
+        """
+        初始化规则
+
+        Args:
+            match: 匹配 "{域名}/{路径}" 的 fnmatch 模式 (如 "api.example.com/search*")
+            ignore_params: 额外忽略的参数名 (查询参数、表单字段和 JSON 顶层键)
+            keep_params: 只保留的参数名 (None 表示不限制)
+            sort_params: 是否按参数名排序
+            canonical_body: 是否规范化 JSON 和表单请求体
+        """
+        self.match = match
+        self.regex = re.compile(fnmatch.translate(match))
+        self.ignore_params = _NamePatterns(ignore_params)
+        self.keep_params = _NamePatterns(keep_params) if keep_params is not None else None
+        self.sort_params = sort_params
+        self.canonical_body = canonical_body
+
+
+class CacheKeyNormalizer:
+    """
+    缓存键规范化器
+
+    保存和查找都经过同一次规范化，因此只影响请求映射到哪个缓存条目；
+    查询参数没有被删除或重排时保留原始字符串，已有缓存的键不变
+    """
+
+    def __init__(
+        self,
+        sort_params: bool = False,
+        ignore_params: Iterable[str] = (),
+        canonical_body: bool = False,
+        rules: Optional[List[CacheKeyRule]] = None,
+    ):
+        """
+        初始化规范化器
+
+        Args:
+            sort_params: 是否按参数名排序查询参数 (同名参数保持原有顺序)
+            ignore_params: 忽略的参数名 (查询参数、表单字段和 JSON 顶层键)，支持通配符
+            canonical_body: 是否规范化 JSON (键排序、去除空白) 和表单请求体
+            rules: 按路径生效的规则 (按顺序匹配，第一条匹配的规则生效)
+        """
+        self.sort_params = sort_params
+        self.ignore_params = _NamePatterns(ignore_params)
+        self.canonical_body = canonical_body
+        self.rules = rules or []
+
+        self.lookups = 0
+        # 规范化改变了缓存键的查找次数，以及其中命中的次数 (按原始请求计算缓存键时不会命中)
+        self.normalized = 0
+        self.normalized_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了任何规范化"""
+        return self.sort_params or self.canonical_body or bool(self.ignore_params) or bool(self.rules)
+
+    @staticmethod
+    def load_rules(rules_file: Optional[str]) -> List[CacheKeyRule]:
+        """
+        从 JSON 文件加载按路径生效的规则
+
+        文件内容为规则列表，如
+        [{"match": "api.example.com/search*", "ignore_params": ["ts"], "sort_params": true}]
+
+        Args:
+            rules_file: 规则文件路径 (None 或空字符串表示不加载)
+
+        Returns:
+            规则列表
+
+        Raises:
+            ValueError: 文件格式错误
+        """
+        if not rules_file:
+            return []
+        try:
+            data = json.loads(Path(rules_file).read_text(encoding=constants.ENCODING_UTF8))
+            if not isinstance(data, list):
+                raise ValueError("rules must be a JSON list")
+            return [CacheKeyRule(**rule) for rule in data]
+        except (OSError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cache key rules file {rules_file}: {e}") from e
+
+    def _find_rule(self, domain: str, path: str) -> Optional[CacheKeyRule]:
+        """查找第一条匹配的规则"""
+        if not self.rules:
+            return None
+        target = f"{domain}/{path}"
+        for rule in self.rules:
+            if rule.regex.match(target):
+                return rule
+        return None
+
+    def normalize(
+        self, domain: str, path: str, query: str, body: Optional[bytes]
+    ) -> Tuple[str, Optional[bytes], bool]:
+        """
+        规范化查询参数和请求体
+
+        Args:
+            domain: 域名
+            path: URL 路径 (不含首尾 "/")
+            query: 查询参数字符串
+            body: 请求体 (GET 请求为 None)
+
+        Returns:
+            (规范化后的查询参数, 规范化后的请求体, 是否有变化)
+        """
+        if not self.enabled:
+            return query, body, False
+
+        rule = self._find_rule(domain, path)
+        sort_params = self.sort_params
+        canonical_body = self.canonical_body
+        if rule is not None:
+            if rule.sort_params is not None:
+                sort_params = rule.sort_params
+            if rule.canonical_body is not None:
+                canonical_body = rule.canonical_body
+
+        new_query = query
+        if query:
+            new_query = self._normalize_query(query, rule, sort_params)
+        new_body = body
+        if body and canonical_body:
+            new_body = self._normalize_body(body, rule)
+        return new_query, new_body, new_query != query or new_body != body
+
+    def _keep(self, name: str, rule: Optional[CacheKeyRule]) -> bool:
+        """参数是否参与缓存键"""
+        if name in self.ignore_params:
+            return False
+        if rule is None:
+            return True
+        if name in rule.ignore_params:
+            return False
+        return rule.keep_params is None or name in rule.keep_params
+
+    def _normalize_pairs(
+        self, pairs: List[Tuple[str, str]], rule: Optional[CacheKeyRule], sort_params: bool
+    ) -> List[Tuple[str, str]]:
+        """过滤并排序参数 (排序稳定，同名参数保持原有顺序)"""
+        pairs = [pair for pair in pairs if self._keep(pair[0], rule)]
+        if sort_params:
+            pairs.sort(key=lambda pair: pair[0])
+        return pairs
+
+    def _normalize_query(self, query: str, rule: Optional[CacheKeyRule], sort_params: bool) -> str:
+        """规范化查询参数，参数没有被删除或重排时返回原字符串"""
+        pairs = parse_qsl(query, keep_blank_values=True)
+        normalized = self._normalize_pairs(pairs, rule, sort_params)
+        if normalized == pairs:
+            return query
+        return urlencode(normalized)
+
+    def _normalize_body(self, body: bytes, rule: Optional[CacheKeyRule]) -> bytes:
+        """规范化 JSON 或表单请求体，其他格式原样返回"""
+        stripped = body.strip()
+        if stripped[:1] in (b"{", b"["):
+            try:
+                data = json.loads(stripped)
+            except ValueError:
+                return body
+            if isinstance(data, dict):
+                data = {key: value for key, value in data.items() if self._keep(key, rule)}
+            return json.dumps(
+                data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+            ).encode(constants.ENCODING_UTF8)
+
+        if _FORM_BODY_PATTERN.fullmatch(stripped):
+            try:
+                text = stripped.decode("ascii")
+            except UnicodeDecodeError:
+                return body
+            pairs = parse_qsl(text, keep_blank_values=True)
+            return urlencode(self._normalize_pairs(pairs, rule, True)).encode("ascii")
+        return body
+
+    def record_lookup(self, normalized: bool, hit: bool) -> None:
+        """
+        记录一次缓存查找
+
+        Args:
+            normalized: 规范化是否改变了缓存键
+            hit: 是否命中
+        """
+        self.lookups += 1
+        if normalized:
+            self.normalized += 1
+            if hit:
+                self.normalized_hits += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取规范化统计信息
+
+        Returns:
+            包含查找次数、缓存键被改变的查找次数、其中命中的次数
+            以及这些命中占全部查找的比例 (规范化带来的命中率提升) 的字典
+        """
+        return {
+            "rules": len(self.rules),
+            "lookups": self.lookups,
+            "normalized": self.normalized,
+            "normalized_hits": self.normalized_hits,
+            "hit_ratio_gain": round(self.normalized_hits / self.lookups, 4) if self.lookups else 0.0,
+        }
@@ -40,9 +40,7 @@ class LocalHandler(BaseHandler):
             FastAPI 响应对象
         """
         # 构建完整 URL (用于查找缓存)
-        full_url = self.build_full_url(
-            self.target_url, path, str(request.url.query) if request.url.query else None
-        )
+        full_url = self.build_full_url(self.target_url, path, self.get_query(request))
         method = request.method
         self.log_request(method, full_url, "Local mode")
 
@@ -54,7 +52,7 @@ class LocalHandler(BaseHandler):
         )
 
         # 从缓存读取响应
-        cached_response = self.cache_manager.get_response(full_url, method, body)
+        cached_response = await self.cache_manager.aget_response(full_url, method, body)
 
         if cached_response is None:
             logger.warning(f"Cache not found for: {full_url}")
@@ -65,9 +63,4 @@ class LocalHandler(BaseHandler):
 
         # 返回缓存的响应
         logger.info(f"Returning cached response for: {full_url}")
-        return self.build_response(
-            content=cached_response["content"],
-            status_code=cached_response["status_code"],
-            headers=cached_response["headers"],
-            path=path,
-        )
+        return self.build_cached_response(cached_response, path, request)
@@ -0,0 +1,153 @@
+"""
+内存热缓存模块
+在磁盘缓存之前保存已解析好的响应，命中时无需任何文件系统调用
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+class MemoryCache:
+    """按字节预算淘汰的 LRU 内存缓存"""
+
+    # 估算每个条目的固定开销（字典、键等）
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        """
+        初始化内存缓存
+
+        Args:
+            max_bytes: 总字节预算，0 表示禁用
+            max_entry_bytes: 单个条目的最大字节数，超过则不进入内存
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        # 每次失效都会递增，用于丢弃失效前开始读取的旧数据
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用内存缓存"""
+        return self.max_bytes > 0
+
+    @property
+    def generation(self) -> int:
+        """当前失效代数，读取磁盘前记录，写入内存时校验"""
+        return self._generation
+
+    @classmethod
+    def estimate_size(cls, entry: Dict[str, Any]) -> int:
+        """
+        估算缓存条目占用的字节数
+
+        Args:
+            entry: 缓存条目字典
+
+        Returns:
+            估算的字节数
+        """
+        size = cls.ENTRY_OVERHEAD + len(entry.get("content") or b"")
+        for name, value in (entry.get("headers") or {}).items():
+            size += len(name) + len(str(value))
+        return size
+
+    def __contains__(self, key: str) -> bool:
+        """检查条目是否存在（不影响命中统计和 LRU 顺序）"""
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目，命中时将其移到最近使用的位置
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存条目，不存在时返回 None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, entry: Dict[str, Any], generation: Optional[int] = None) -> bool:
+        """
+        写入缓存条目，超出预算时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            entry: 缓存条目字典
+            generation: 读取数据前记录的失效代数，期间发生过失效则放弃写入
+
+        Returns:
+            是否写入成功
+        """
+        if not self.enabled:
+            return False
+
+        size = self.estimate_size(entry)
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+
+            self._entries[key] = (entry, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+        return True
+
+    def invalidate(self, key: str) -> None:
+        """
+        使缓存条目失效
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._generation += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取内存缓存统计信息
+
+        Returns:
+            包含命中、未命中、淘汰次数和容量信息的字典
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
@@ -2,15 +2,20 @@
 反代模式核心功能模块
 """
 
+import asyncio
 import logging
+import math
+import time
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 
 import httpx
 from fastapi import Request, Response
 
 from config import app_config
 from utils import HttpUtil, constants
-from .cache_manager import CacheManager
+from .cache_manager import CacheManager, CacheStreamWriter
 from .base_handler import BaseHandler
+from .upstream_guard import CircuitBreaker, ConcurrencyLimiter, GuardedStream, UpstreamRejected
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +33,72 @@ class ProxyHandler(BaseHandler):
         """
         self.target_url = target_url.rstrip("/")
         self.cache_manager = cache_manager
-        self.client = httpx.AsyncClient(
-            timeout=app_config.request_timeout, follow_redirects=False
+        self.client = self._build_client()
+
+        # 上游并发限制和熔断器 (每个处理器对应一个上游)
+        self.limiter = ConcurrencyLimiter(
+            app_config.upstream_max_concurrency,
+            app_config.upstream_max_queue,
+            app_config.upstream_queue_timeout,
+        )
+        self.breaker = CircuitBreaker(
+            app_config.upstream_breaker_threshold, app_config.upstream_breaker_cooldown
+        )
+
+        # 条件请求统计: 携带缓存校验值的回源次数和上游返回 304 的次数
+        self.revalidations = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _build_client() -> httpx.AsyncClient:
+        """
+        按配置创建上游 HTTP 客户端 (连接池、keep-alive、HTTP/2 和分项超时)
+
+        Returns:
+            httpx 异步客户端
+        """
+        http2 = app_config.upstream_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("未安装 h2，上游连接回退到 HTTP/1.1 (pip install httpx[http2])")
+                http2 = False
+
+        def _or_default(value: Optional[float]) -> float:
+            return app_config.request_timeout if value is None else value
+
+        timeout = httpx.Timeout(
+            app_config.request_timeout,
+            connect=_or_default(app_config.upstream_connect_timeout),
+            read=_or_default(app_config.upstream_read_timeout),
         )
+        limits = httpx.Limits(
+            max_connections=app_config.upstream_max_connections,
+            max_keepalive_connections=app_config.upstream_max_keepalive_connections,
+            keepalive_expiry=app_config.upstream_keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            timeout=timeout, limits=limits, http2=http2, follow_redirects=False
+        )
+
+    async def prewarm(self, count: int) -> None:
+        """
+        预先建立到目标服务器的连接 (并发发送 HEAD 请求)，连接保留在连接池中
+
+        Args:
+            count: 预热的连接数，不超过 keep-alive 连接池大小
+        """
+        count = min(count, app_config.upstream_max_keepalive_connections)
+        if count <= 0:
+            return
+
+        results = await asyncio.gather(
+            *(self.client.head(f"{self.target_url}/") for _ in range(count)),
+            return_exceptions=True,
+        )
+        warmed = sum(not isinstance(result, Exception) for result in results)
+        logger.info(f"Prewarmed {warmed}/{count} upstream connections to: {self.target_url}")
 
     async def handle_request(self, request: Request, path: str) -> Response:
         """
@@ -43,100 +111,588 @@ class ProxyHandler(BaseHandler):
         Returns:
             FastAPI 响应对象
         """
-        # 构建目标 URL
-        target_full_url = self.build_full_url(
-            self.target_url, path, str(request.url.query) if request.url.query else None
+        try:
+            cached = await self._lookup_cached(request, path)
+            result = await self.fetch(request, path, cached=cached)
+            if "stream" in result:
+                result["stream"].claim()
+                return self.build_streaming_response(
+                    result["stream"], result["status_code"], result["headers"], path
+                )
+            return self.build_cached_response(result, path, request)
+        except Exception as e:
+            return self.build_error_response(e, self.build_target_url(request, path))
+
+    def build_target_url(self, request: Request, path: str) -> str:
+        """
+        构建目标服务器上的完整 URL
+
+        Args:
+            request: FastAPI 请求对象
+            path: 请求路径
+
+        Returns:
+            目标完整 URL
+        """
+        return self.build_full_url(self.target_url, path, self.get_query(request))
+
+    async def _lookup_cached(self, request: Request, path: str) -> Optional[Dict[str, Any]]:
+        """
+        查找请求对应的已有缓存，用于向上游发送条件请求
+
+        Args:
+            request: FastAPI 请求对象
+            path: 请求路径
+
+        Returns:
+            缓存条目，不可缓存的方法或缓存不存在时返回 None
+        """
+        method = request.method.upper()
+        if method not in constants.CACHEABLE_METHODS:
+            return None
+        body = (
+            await self.read_request_body(request)
+            if method == constants.HTTP_METHOD_POST
+            else None
         )
+        try:
+            return await self.cache_manager.aget_response(
+                self.build_target_url(request, path), method, body
+            )
+        except Exception as e:
+            logger.error(f"缓存读取失败: {e}")
+            return None
+
+    async def fetch(
+        self,
+        request: Request,
+        path: str,
+        body: Optional[bytes] = None,
+        cached: Optional[Dict[str, Any]] = None,
+        full: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        请求目标服务器并缓存响应
+
+        提供已有缓存时携带其 ETag / Last-Modified 发送条件请求，
+        上游返回 304 则只更新缓存的响应头和获取时间，直接使用缓存的响应体
+
+        Args:
+            request: FastAPI 请求对象
+            path: 请求路径
+            body: 已读取的请求体（可选，未提供时从请求中读取）
+            cached: 该请求已有的缓存条目（可选）
+            full: 是否忽略客户端的 Range 请求头，获取完整响应 (用于后台填充缓存)
+
+        Returns:
+            响应数据字典: {"content": bytes, "headers": dict, "status_code": int}，
+            大响应返回 {"stream": ProxyStream, "headers": dict, "status_code": int}，
+            304 时返回更新后的缓存条目 (可能以 "file_path" 代替 "content")
+
+        Raises:
+            httpx.HTTPError: 请求目标服务器失败
+            UpstreamRejected: 上游并发已满或熔断器打开，请求未发出
+        """
+        # 构建目标 URL
+        target_full_url = self.build_target_url(request, path)
         method = request.method
         self.log_request(method, target_full_url, "Proxying")
 
-        try:
-            # 清理请求头
-            headers = HttpUtil.clean_proxy_request_headers(dict(request.headers))
+        # 清理请求头
+        headers = HttpUtil.clean_raw_request_headers(request.scope["headers"])
 
-            # 读取请求体
+        # 读取请求体
+        if body is None:
             body = await self.read_request_body(request)
 
-            # 发送请求
-            response = await self.client.request(
-                method=method, url=target_full_url, headers=headers, content=body
-            )
+        # 客户端自身的条件请求头不转发 (上游的 304 对客户端没有可用的响应体)，
+        # 改为携带缓存条目的校验值
+        for name in constants.CONDITIONAL_REQUEST_HEADERS:
+            headers.pop(name, None)
+        if full:
+            headers.pop("range", None)
+            headers.pop("if-range", None)
+        validators = HttpUtil.build_validators(cached["headers"]) if cached else {}
+        if validators:
+            self.revalidations += 1
+            headers.update(validators)
+
+        # 发送请求 (流式接收，根据响应大小决定是否缓冲)
+        response = await self._send(method, target_full_url, headers, body)
+        status_code = response.status_code
+
+        logger.debug(f"Response status: {status_code}")
+        logger.debug(f"Response content-type: {response.headers.get('content-type', '')}")
 
-            # 获取响应内容
-            response_headers = dict(response.headers)
+        # 处理 304 Not Modified: 缓存未变化，更新响应头和获取时间后使用缓存的响应体
+        if status_code == constants.HTTP_STATUS_NOT_MODIFIED:
+            await response.aclose()
+            if validators:
+                self.not_modified += 1
+                refreshed = await self._refresh_cached(
+                    cached, dict(response.headers), target_full_url, method, body, headers
+                )
+                if refreshed is not None:
+                    logger.info(f"Not modified, serving cached body for: {target_full_url}")
+                    return refreshed
+
+            # 缓存已不可用，移除条件请求头重新获取完整内容
+            logger.info(f"Received 304 Not Modified, fetching full content")
+            for name in constants.CONDITIONAL_REQUEST_HEADERS:
+                headers.pop(name, None)
+            response = await self._send(method, target_full_url, headers, body)
             status_code = response.status_code
-            content = response.content
-
-            logger.debug(f"Response status: {status_code}")
-            logger.debug(f"Response content-type: {response_headers.get('content-type', '')}")
-            logger.debug(f"Response content length: {len(content)}")
-
-            # 处理 304 Not Modified: 移除条件请求头重新获取完整内容
-            if status_code == constants.HTTP_STATUS_NOT_MODIFIED:
-                logger.info(f"Received 304 Not Modified, fetching full content")
-                # 移除导致 304 的条件请求头
-                headers.pop('if-modified-since', None)
-                headers.pop('if-none-match', None)
-                
-                # 重新请求获取完整内容
-                response = await self.client.request(
-                    method=method, url=target_full_url, headers=headers, content=body
+            logger.info(f"Refetched with status: {status_code}")
+
+        response_headers = dict(response.headers)
+
+        # 处理重定向 Location header
+        if "location" in response_headers:
+            original_location = response_headers["location"]
+            new_location, modified = HttpUtil.rewrite_location_header(
+                original_location, self.target_url
+            )
+            if modified:
+                response_headers["location"] = new_location
+                logger.info(f"Rewriting Location: {original_location} -> {new_location}")
+
+        # 大响应走流式路径，边转发边写入缓存
+        if self._should_stream(response):
+            return await self._build_stream_result(
+                response, target_full_url, method, response_headers, body, headers
+            )
+
+        if app_config.stream_threshold > 0 and not self._has_content_length(response):
+            # 未声明长度 (分块传输): 先缓冲，读满阈值仍未结束时改为流式转发，已读取的部分一并转发和缓存
+            chunks = response.aiter_bytes(constants.STREAM_CHUNK_SIZE)
+            try:
+                prefix, complete = await self._read_prefix(chunks)
+            except BaseException:
+                await response.aclose()
+                raise
+            if not complete:
+                return await self._build_stream_result(
+                    response, target_full_url, method, response_headers, body, headers,
+                    prefix=prefix, chunks=chunks,
                 )
-                response_headers = dict(response.headers)
-                status_code = response.status_code
-                content = response.content
-                logger.info(f"Refetched with status: {status_code}, content length: {len(content)}")
-
-            # 处理重定向 Location header
-            if "location" in response_headers:
-                original_location = response_headers["location"]
-                new_location, modified = HttpUtil.rewrite_location_header(
-                    original_location, self.target_url  
+            await response.aclose()
+            content = prefix
+        else:
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+        logger.debug(f"Response content length: {len(content)}")
+
+        # 清理响应头
+        response_headers = HttpUtil.clean_response_headers(response_headers)
+
+        # 缓存响应 (仅 GET 和 POST 的完整响应)
+        result = {"content": content, "headers": response_headers, "status_code": status_code}
+        if self._is_cacheable(method, status_code):
+            # 本次响应与之后的缓存命中使用同一个缓存层 ETag，客户端的条件请求才能命中
+            result["etag"] = await self.cache_manager.acompute_etag(content)
+            try:
+                await self.cache_manager.asave_response(
+                    url=target_full_url,
+                    method=method,
+                    content=content,
+                    headers=response_headers,
+                    status_code=status_code,
+                    body=body if method.upper() == constants.HTTP_METHOD_POST else None,
+                    body_content_type=headers.get("content-type"),
+                    etag=result["etag"],
                 )
-                if modified:
-                    response_headers["location"] = new_location
-                    logger.info(f"Rewriting Location: {original_location} -> {new_location}")
-
-            # 清理响应头
-            response_headers = HttpUtil.clean_response_headers(response_headers)
-
-            # 缓存响应 (仅 GET 和 POST)
-            if method.upper() in constants.CACHEABLE_METHODS:
-                try:
-                    self.cache_manager.save_response(
-                        url=target_full_url,
-                        method=method,
-                        content=content,
-                        headers=response_headers,
-                        status_code=status_code,
-                        body=body if method.upper() == constants.HTTP_METHOD_POST else None,
-                    )
-                    logger.info(f"Response cached for: {target_full_url}")
-                except Exception as e:
-                    logger.error(f"缓存保存失败: {e}")
-
-            # 调试: 打印返回内容预览
-            if logger.isEnabledFor(logging.DEBUG):
-                preview = content[: constants.LOG_PREVIEW_LENGTH].decode(
-                    constants.ENCODING_UTF8, errors="ignore"
+                logger.info(f"Response cached for: {target_full_url}")
+            except Exception as e:
+                logger.error(f"缓存保存失败: {e}")
+
+        # 调试: 打印返回内容预览
+        if logger.isEnabledFor(logging.DEBUG):
+            preview = content[: constants.LOG_PREVIEW_LENGTH].decode(
+                constants.ENCODING_UTF8, errors="ignore"
+            )
+            logger.debug(f"返回内容预览: {preview}...")
+
+        return result
+
+    async def _refresh_cached(
+        self,
+        cached: Dict[str, Any],
+        not_modified_headers: Dict[str, str],
+        url: str,
+        method: str,
+        body: bytes,
+        request_headers: Dict[str, str],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        上游返回 304 后，用 304 响应头更新缓存条目并重置获取时间
+
+        Args:
+            cached: 已有的缓存条目
+            not_modified_headers: 304 响应的响应头
+            url: 目标 URL
+            method: HTTP 方法
+            body: 请求体
+            request_headers: 转发给上游的请求头
+
+        Returns:
+            更新后的缓存条目，缓存已不存在时返回 None
+        """
+        # 旧响应的 Age 不再适用 (新鲜期从本次确认开始计算，只使用 304 响应自带的 Age)
+        kept = {name: value for name, value in cached["headers"].items() if name != "age"}
+        headers = HttpUtil.clean_response_headers({**kept, **not_modified_headers})
+        cache_body = body if method.upper() == constants.HTTP_METHOD_POST else None
+        try:
+            if "content" in cached:
+                # 响应体已在内存中，按正常写入路径保存 (响应体未变，沿用缓存层 ETag；
+                # 旧版缓存的弱 ETag 由文件修改时间生成，重新计算)
+                etag = cached.get("etag")
+                if not etag or etag.startswith("W/"):
+                    etag = await self.cache_manager.acompute_etag(cached["content"])
+                await self.cache_manager.asave_response(
+                    url=url,
+                    method=method,
+                    content=cached["content"],
+                    headers=headers,
+                    status_code=cached["status_code"],
+                    body=cache_body,
+                    body_content_type=request_headers.get("content-type"),
+                    etag=etag,
                 )
-                logger.debug(f"返回内容预览: {preview}...")
+                return {
+                    "content": cached["content"],
+                    "headers": headers,
+                    "status_code": cached["status_code"],
+                    "etag": etag,
+                }
+            # 大响应体只改写元数据，不重新写入响应体
+            return await self.cache_manager.arefresh_response(url, method, headers, cache_body)
+        except Exception as e:
+            logger.error(f"缓存更新失败: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取反代统计信息
 
-            return self.build_response(content, status_code, response_headers, path)
+        Returns:
+            包含条件回源次数、304 次数、并发限制和熔断器状态的字典
+        """
+        return {
+            "upstream": {
+                "revalidations": self.revalidations,
+                "not_modified": self.not_modified,
+                "limiter": self.limiter.get_stats(),
+                "breaker": self.breaker.get_stats(),
+            }
+        }
 
-        except httpx.TimeoutException:
-            logger.error(f"Request timeout: {target_full_url}")
+    async def _send(
+        self, method: str, url: str, headers: Dict[str, str], body: bytes
+    ) -> httpx.Response:
+        """
+        以流式方式发送请求，只读取响应头
+
+        请求经过熔断器和并发限制，并发名额在响应关闭 (响应体读完或流式转发结束) 时释放
+
+        Args:
+            method: HTTP 方法
+            url: 目标 URL
+            headers: 请求头
+            body: 请求体
+
+        Returns:
+            尚未读取响应体的 httpx 响应对象
+
+        Raises:
+            UpstreamRejected: 上游并发已满或熔断器打开
+        """
+        self.breaker.before_request()
+        try:
+            release = await self.limiter.acquire()
+        except BaseException:
+            self.breaker.record_aborted()
+            raise
+
+        upstream_request = self.client.build_request(
+            method=method, url=url, headers=headers, content=body
+        )
+        try:
+            response = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError:
+            release()
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            release()
+            self.breaker.record_aborted()
+            raise
+
+        if response.status_code in constants.UPSTREAM_BREAKER_FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.is_closed:
+            # 传输层已读完响应体并关闭响应，之后的 aclose() 不会再经过包装流
+            release()
+        else:
+            response.stream = GuardedStream(response.stream, release, self.breaker)
+        return response
+
+    @staticmethod
+    def _is_cacheable(method: str, status_code: int) -> bool:
+        """
+        判断响应是否写入缓存 (仅 GET 和 POST，部分内容响应不缓存)
+
+        Args:
+            method: HTTP 方法
+            status_code: 上游响应状态码
+
+        Returns:
+            是否缓存
+        """
+        return (
+            method.upper() in constants.CACHEABLE_METHODS
+            and status_code != constants.HTTP_STATUS_PARTIAL_CONTENT
+        )
+
+    @staticmethod
+    def _has_content_length(response: httpx.Response) -> bool:
+        """
+        响应是否声明了有效的 Content-Length
+
+        Args:
+            response: 尚未读取响应体的 httpx 响应对象
+
+        Returns:
+            是否声明了长度
+        """
+        content_length = response.headers.get("content-length")
+        return bool(content_length) and content_length.isdigit()
+
+    @classmethod
+    def _should_stream(cls, response: httpx.Response) -> bool:
+        """
+        根据 Content-Length 判断是否直接走流式路径
+
+        未声明长度的响应(分块传输)返回 False，由 `_read_prefix()` 读取到阈值后再决定
+
+        Args:
+            response: 尚未读取响应体的 httpx 响应对象
+
+        Returns:
+            是否流式转发
+        """
+        if app_config.stream_threshold <= 0 or not cls._has_content_length(response):
+            return False
+        return int(response.headers["content-length"]) >= app_config.stream_threshold
+
+    @staticmethod
+    async def _read_prefix(chunks: AsyncIterator[bytes]) -> Tuple[bytes, bool]:
+        """
+        从未声明长度的响应体中读取数据，直到读完或达到流式阈值
+
+        最多缓冲 stream_threshold 加一个数据块的字节数
+
+        Args:
+            chunks: 响应体数据块迭代器 (未读完时由调用方继续消费)
+
+        Returns:
+            (已读取的数据, 响应体是否已读完)
+        """
+        buffered = bytearray()
+        while len(buffered) < app_config.stream_threshold:
+            try:
+                buffered += await chunks.__anext__()
+            except StopAsyncIteration:
+                return bytes(buffered), True
+        return bytes(buffered), False
+
+    async def _build_stream_result(
+        self,
+        response: httpx.Response,
+        url: str,
+        method: str,
+        response_headers: Dict[str, str],
+        body: bytes,
+        request_headers: Dict[str, str],
+        prefix: bytes = b"",
+        chunks: Optional[AsyncIterator[bytes]] = None,
+    ) -> Dict[str, Any]:
+        """
+        构建流式响应结果，并按需打开缓存写入器
+
+        Args:
+            response: 尚未读取响应体的 httpx 响应对象
+            url: 目标 URL
+            method: HTTP 方法
+            response_headers: 响应头 (已重写 Location)
+            body: 请求体
+            request_headers: 转发给上游的请求头
+            prefix: 已从响应体读取的数据 (未声明长度的响应)
+            chunks: 读取 prefix 后剩余的响应体数据块迭代器
+
+        Returns:
+            响应数据字典: {"stream": ProxyStream, "headers": dict, "status_code": int}
+        """
+        status_code = response.status_code
+        cleaned_headers = HttpUtil.clean_response_headers(response_headers)
+
+        writer = None
+        if self._is_cacheable(method, status_code):
+            try:
+                writer = await self.cache_manager.aopen_stream_writer(
+                    url=url,
+                    method=method,
+                    headers=cleaned_headers,
+                    status_code=status_code,
+                    body=body if method.upper() == constants.HTTP_METHOD_POST else None,
+                    body_content_type=request_headers.get("content-type"),
+                )
+            except Exception as e:
+                logger.error(f"缓存保存失败: {e}")
+
+        # 声明了长度且未经过压缩的响应长度与转发内容一致，保留 Content-Length 便于客户端显示进度
+        headers = dict(cleaned_headers)
+        if writer is not None:
+            # 缓存层 ETag 在传输完成后才能算出，不转发上游的 ETag (与之后的缓存命中不一致)
+            headers.pop("etag", None)
+        content_length = response.headers.get("content-length", "unknown")
+        if "content-encoding" not in response.headers and self._has_content_length(response):
+            headers["content-length"] = content_length
+
+        logger.info(f"Streaming response for: {url} (length: {content_length})")
+        return {
+            "stream": ProxyStream(response, writer, url, prefix, chunks),
+            "headers": headers,
+            "status_code": status_code,
+        }
+
+    @staticmethod
+    def build_error_response(error: Exception, url: str) -> Response:
+        """
+        根据上游请求异常构建错误响应
+
+        Args:
+            error: 请求过程中抛出的异常
+            url: 请求的目标 URL
+
+        Returns:
+            FastAPI 响应对象
+        """
+        if isinstance(error, UpstreamRejected):
+            logger.warning(f"Upstream unavailable, rejecting {url}: {error}")
             return Response(
-                content="Request timeout",
-                status_code=constants.HTTP_STATUS_GATEWAY_TIMEOUT,
+                content="Upstream unavailable",
+                status_code=constants.HTTP_STATUS_SERVICE_UNAVAILABLE,
+                headers={"retry-after": str(math.ceil(error.retry_after))},
             )
-        except Exception as e:
-            logger.error(f"Proxy error: {e}")
+        if isinstance(error, httpx.TimeoutException):
+            logger.error(f"Request timeout: {url}")
             return Response(
-                content=f"Proxy error: {str(e)}",
-                status_code=constants.HTTP_STATUS_INTERNAL_ERROR,
+                content="Request timeout",
+                status_code=constants.HTTP_STATUS_GATEWAY_TIMEOUT,
             )
+        logger.error(f"Proxy error: {error}")
+        return Response(
+            content=f"Proxy error: {str(error)}",
+            status_code=constants.HTTP_STATUS_INTERNAL_ERROR,
+        )
 
     async def close(self):
         """关闭 HTTP 客户端"""
         await self.client.aclose()
+
+
+class ProxyStream:
+    """
+    上游响应体的流式转发器
+    将数据块转发给客户端的同时写入缓存，只能被一个客户端消费；
+    其他请求可以等待传输结束后从缓存读取
+    """
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        writer: Optional[CacheStreamWriter],
+        url: str,
+        prefix: bytes = b"",
+        chunks: Optional[AsyncIterator[bytes]] = None,
+    ):
+        self.response = response
+        self.writer = writer
+        self.url = url
+        # 判断是否流式转发时已读取的数据，以及之后剩余的数据块
+        self.prefix = prefix
+        self.chunks = chunks
+        self._claimed = False
+        # 传输结束 (无论成功与否) 时设置，committed 表示响应已完整写入缓存
+        self._done = asyncio.Event()
+        self.committed = False
+        # 最近一次收到数据的时间，等待方据此判断传输是否停滞
+        self.last_progress = time.monotonic()
+
+    def claim(self) -> bool:
+        """
+        声明由当前请求消费该流
+
+        Returns:
+            是否声明成功 (已被其他请求声明则返回 False)
+        """
+        if self._claimed:
+            return False
+        self._claimed = True
+        return True
+
+    async def wait_cached(self, idle_timeout: float) -> bool:
+        """
+        等待传输结束
+
+        Args:
+            idle_timeout: 超过该秒数没有收到数据 (或一直没有客户端开始消费) 时放弃等待
+
+        Returns:
+            响应是否已完整写入缓存
+        """
+        while not self._done.is_set():
+            remaining = self.last_progress + idle_timeout - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._done.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return self.committed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        completed = False
+        chunks = self.chunks or self.response.aiter_bytes(constants.STREAM_CHUNK_SIZE)
+        try:
+            if self.prefix:
+                if self.writer:
+                    await self.writer.write(self.prefix)
+                yield self.prefix
+            async for chunk in chunks:
+                self.last_progress = time.monotonic()
+                if self.writer:
+                    await self.writer.write(chunk)
+                yield chunk
+            completed = True
+        finally:
+            await chunks.aclose()
+            await self.response.aclose()
+            try:
+                if self.writer:
+                    try:
+                        if completed:
+                            await self.writer.commit()
+                            self.committed = True
+                            logger.info(f"Response cached for: {self.url}")
+                        else:
+                            await self.writer.abort()
+                            logger.warning(f"Stream interrupted, cache discarded: {self.url}")
+                    except Exception as e:
+                        logger.error(f"缓存保存失败: {e}")
+            finally:
+                self._done.set()
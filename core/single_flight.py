@@ -0,0 +1,69 @@
+"""
+请求合并模块 (single-flight)
+相同缓存键的并发请求只执行一次上游请求，所有等待者共享结果
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+
+    def __init__(self):
+        self._flights: Dict[str, "asyncio.Task[Any]"] = {}
+
+        # 实际执行的调用次数和被合并的调用次数
+        self.flights = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行调用，如果相同键的调用正在进行则等待其结果
+
+        调用在独立的任务中运行，发起者被取消(如客户端断开)不会影响其他等待者
+
+        Args:
+            key: 合并键
+            func: 返回协程的无参函数
+
+        Returns:
+            调用结果，异常同样会传递给所有等待者
+        """
+        task = self._flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.flights += 1
+            task = asyncio.ensure_future(func())
+            self._flights[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        """调用结束后移除记录，并标记异常已读取避免无人等待时的告警"""
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """正在进行的调用数"""
+        return len(self._flights)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取请求合并统计信息
+
+        Returns:
+            包含执行次数、合并次数和进行中调用数的字典
+        """
+        return {
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
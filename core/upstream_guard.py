@@ -0,0 +1,260 @@
+"""
+上游保护模块
+限制同时发往上游的请求数 (超出时在有界队列中等待)，并在上游连续失败时熔断，快速失败而不是堆积等待超时的请求
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict
+
+import httpx
+
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamRejected(Exception):
+    """请求未发往上游 (并发已满或熔断器打开)"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        # 建议客户端重试前等待的秒数
+        self.retry_after = retry_after
+
+
+class UpstreamOverloaded(UpstreamRejected):
+    """上游并发已满且等待队列已满或等待超时"""
+
+
+class CircuitOpenError(UpstreamRejected):
+    """熔断器打开，上游被判定为不可用"""
+
+
+class ConcurrencyLimiter:
+    """
+    上游并发限制器
+
+    最多 limit 个请求同时占用上游，其余请求按到达顺序等待；
+    等待中的请求数达到 max_queue 或等待超过 queue_timeout 时拒绝
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        """
+        初始化限制器
+
+        Args:
+            limit: 最大并发数 (0 表示不限制)
+            max_queue: 最多等待的请求数
+            queue_timeout: 单个请求最长等待时间 (秒)
+        """
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+        self.active = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    async def acquire(self) -> Callable[[], None]:
+        """
+        获取一个并发名额
+
+        Returns:
+            释放名额的函数 (可重复调用，只生效一次)
+
+        Raises:
+            UpstreamOverloaded: 等待队列已满或等待超时
+        """
+        if self._semaphore is not None:
+            if self._semaphore.locked():
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    raise UpstreamOverloaded(
+                        f"Upstream concurrency limit reached ({self.limit} active, "
+                        f"{self.queued} queued)",
+                        constants.UPSTREAM_OVERLOAD_RETRY_AFTER,
+                    )
+                self.queued += 1
+                self.peak_queued = max(self.peak_queued, self.queued)
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    raise UpstreamOverloaded(
+                        f"Timed out after {self.queue_timeout}s waiting for an upstream slot",
+                        constants.UPSTREAM_OVERLOAD_RETRY_AFTER,
+                    ) from None
+                finally:
+                    self.queued -= 1
+            else:
+                await self._semaphore.acquire()
+        self.active += 1
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            self.active -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+        return release
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限制器统计信息
+
+        Returns:
+            包含并发上限、当前并发数、当前和峰值队列深度以及拒绝和等待超时次数的字典
+        """
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+class CircuitBreaker:
+    """
+    上游熔断器
+
+    closed: 正常发送请求，连续失败 threshold 次后打开；
+    open: 直接拒绝请求，cooldown 秒后进入 half_open；
+    half_open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        """
+        初始化熔断器
+
+        Args:
+            threshold: 打开熔断器的连续失败次数 (0 表示不启用)
+            cooldown: 打开后多久放行探测请求 (秒)
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = constants.BREAKER_STATE_CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用熔断"""
+        return self.threshold > 0
+
+    def retry_after(self) -> float:
+        """距离放行探测请求的剩余秒数"""
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def before_request(self) -> None:
+        """
+        发送请求前检查熔断器状态
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已有探测请求
+        """
+        if not self.enabled or self.state == constants.BREAKER_STATE_CLOSED:
+            return
+        if self.state == constants.BREAKER_STATE_OPEN and self.retry_after() <= 0:
+            self.state = constants.BREAKER_STATE_HALF_OPEN
+        if self.state == constants.BREAKER_STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"Upstream circuit breaker is {self.state} after {self.failures} consecutive failures",
+            max(self.retry_after(), constants.UPSTREAM_OVERLOAD_RETRY_AFTER),
+        )
+
+    def record_success(self) -> None:
+        """记录一次成功的请求"""
+        self._probing = False
+        self.failures = 0
+        if self.state != constants.BREAKER_STATE_CLOSED:
+            self.state = constants.BREAKER_STATE_CLOSED
+            logger.info("Upstream recovered, circuit breaker closed")
+
+    def record_failure(self) -> None:
+        """记录一次失败的请求 (连接错误、超时或网关错误状态码)"""
+        self._probing = False
+        self.failures += 1
+        if not self.enabled:
+            return
+        if self.state == constants.BREAKER_STATE_HALF_OPEN or self.failures >= self.threshold:
+            if self.state != constants.BREAKER_STATE_OPEN:
+                self.opened += 1
+                logger.warning(
+                    f"Circuit breaker opened after {self.failures} consecutive upstream failures, "
+                    f"failing fast for {self.cooldown}s"
+                )
+            self.state = constants.BREAKER_STATE_OPEN
+            self._opened_at = time.monotonic()
+
+    def record_aborted(self) -> None:
+        """请求在得到结果前被取消，不计入成功或失败 (半开状态下允许下一个探测请求)"""
+        self._probing = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器统计信息
+
+        Returns:
+            包含当前状态、连续失败次数、打开次数、快速失败次数和剩余冷却时间的字典
+        """
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "threshold": self.threshold,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1)
+            if self.state != constants.BREAKER_STATE_CLOSED
+            else 0.0,
+        }
+
+
+class GuardedStream(httpx.AsyncByteStream):
+    """
+    上游响应体的包装流
+    响应关闭时释放并发名额，读取响应体时的连接错误和超时计入熔断器
+    """
+
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        release: Callable[[], None],
+        breaker: CircuitBreaker,
+    ):
+        self._stream = stream
+        self._release = release
+        self._breaker = breaker
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TransportError:
+            self._breaker.record_failure()
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
@@ -0,0 +1,190 @@
+"""
+缓存写入队列模块 (write-behind)
+响应先进入内存队列，由后台任务写入磁盘，请求无需等待磁盘写入
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import CacheWritePolicy
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWriteQueue:
+    """
+    有界的后台缓存写入队列
+
+    每个后台写入任务有自己的队列，缓存键按哈希固定分配给其中一个，
+    同一缓存键的写入按提交顺序依次完成，后提交的版本不会被先提交的覆盖
+    """
+
+    def __init__(
+        self,
+        write_func: Callable[..., Awaitable[None]],
+        max_size: int,
+        workers: int,
+        policy: CacheWritePolicy,
+    ):
+        """
+        初始化写入队列
+
+        Args:
+            write_func: 实际执行写入的异步函数，参数为提交时的关键字参数
+            max_size: 队列最大深度 (平均分给各写入任务)
+            workers: 后台写入任务数
+            policy: 队列已满时的处理策略 (drop 丢弃 / block 等待 / spill 由调用方直接写入)
+        """
+        self.write_func = write_func
+        self.max_size = max_size
+        self.workers = max(1, workers)
+        self.policy = policy
+
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        # 已提交但尚未写入磁盘的条目，供读取方直接使用
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # 等待条目写入磁盘的事件 (多 worker 时回源方写入后才释放填充锁)
+        self._written: Dict[str, asyncio.Event] = {}
+
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def _ensure_started(self) -> None:
+        """在首次提交时创建队列并启动后台写入任务 (需要运行中的事件循环)"""
+        if not self._queues:
+            depth = max(1, self.max_size // self.workers)
+            self._queues = [asyncio.Queue(maxsize=depth) for _ in range(self.workers)]
+            self._tasks = [
+                asyncio.create_task(self._worker(queue), name=f"cache-writer-{i}")
+                for i, queue in enumerate(self._queues)
+            ]
+
+    def _queue_for(self, key: str) -> asyncio.Queue:
+        """缓存键对应的写入任务队列"""
+        return self._queues[hash(key) % self.workers]
+
+    async def submit(self, key: str, entry: Dict[str, Any], **kwargs: Any) -> None:
+        """
+        提交写入请求
+
+        Args:
+            key: 缓存键
+            entry: 写入完成前供读取方使用的缓存条目
+            **kwargs: 传给 write_func 的参数
+        """
+        self._ensure_started()
+        queue = self._queue_for(key)
+        item = (key, entry, kwargs)
+
+        # 同一缓存键已有排队的写入时不能绕过队列直接写入，否则排在后面的旧版本会覆盖本次写入
+        if self.policy == CacheWritePolicy.BLOCK or (
+            self.policy == CacheWritePolicy.SPILL and key in self._pending
+        ):
+            await queue.put(item)
+            self._pending[key] = entry
+            return
+
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if self.policy == CacheWritePolicy.DROP:
+                # 丢弃本次写入，已排队的旧条目保持不变
+                self.dropped += 1
+                logger.warning(f"Cache write queue full, dropping write for: {key}")
+                return
+            self.spilled += 1
+            self._pending[key] = entry
+            try:
+                await self.write_func(**kwargs)
+            finally:
+                self._discard_pending(key, entry)
+            return
+        self._pending[key] = entry
+
+    def get_pending(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取尚未写入磁盘的缓存条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存条目，不存在时返回 None
+        """
+        return self._pending.get(key)
+
+    async def wait_written(self, key: str) -> None:
+        """
+        等待缓存键已提交的写入完成 (写入成功、失败或被丢弃)
+
+        Args:
+            key: 缓存键
+        """
+        if key not in self._pending:
+            return
+        event = self._written.get(key)
+        if event is None:
+            event = self._written[key] = asyncio.Event()
+        await event.wait()
+
+    def _discard_pending(self, key: str, entry: Dict[str, Any]) -> None:
+        """移除待写入条目 (仅当没有被更新的写入覆盖时)"""
+        if self._pending.get(key) is entry:
+            del self._pending[key]
+            event = self._written.pop(key, None)
+            if event is not None:
+                event.set()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        """
+        后台写入任务
+
+        Args:
+            queue: 该任务负责的队列
+        """
+        while True:
+            key, entry, kwargs = await queue.get()
+            try:
+                await self.write_func(**kwargs)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"缓存保存失败: {e}")
+            finally:
+                self._discard_pending(key, entry)
+                queue.task_done()
+
+    async def flush(self) -> None:
+        """等待队列中的所有写入完成"""
+        for queue in self._queues:
+            await queue.join()
+
+    async def close(self) -> None:
+        """写完队列中剩余的条目并停止后台任务"""
+        await self.flush()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取写入队列统计信息
+
+        Returns:
+            包含队列深度和写入计数的字典
+        """
+        return {
+            "depth": sum(queue.qsize() for queue in self._queues),
+            "max_depth": self.max_size,
+            "policy": self.policy.value,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+        }
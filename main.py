@@ -3,17 +3,24 @@ FastMirror - 反代框架主入口
 """
 
 import argparse
+import asyncio
+import importlib.util
 import logging
+import os
 import sys
+from enum import Enum
+from typing import Dict
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 
-from config import app_config, RunMode
+from config import app_config, PerformanceProfile, RunMode
+from core.asgi_app import FastPathApp
 from core.cache_manager import CacheManager
 from custom.custom_routes import custom_router
 from core.proxy_handler import ProxyHandler
 from core.local_handler import LocalHandler
 from core.hybrid_handler import HybridHandler
+from utils import JsonUtil, constants
 
 # 配置日志
 logging.basicConfig(
@@ -35,6 +42,7 @@ async def lifespan(app: FastAPI):
 
     # 初始化缓存管理器
     cache_manager = CacheManager(cache_dir=app_config.cache_dir)
+    cache_manager.start()
 
     # 根据模式初始化对应的处理器
     if app_config.mode == RunMode.PROXY:
@@ -68,13 +76,36 @@ async def lifespan(app: FastAPI):
             f"启动半代理模式: {app_config.target_url} -> http://{app_config.host}:{app_config.port}"
         )
 
+    # 预热上游连接
+    upstream_handler = proxy_handler or hybrid_handler
+    if upstream_handler and app_config.upstream_prewarm_connections > 0:
+        await upstream_handler.prewarm(app_config.upstream_prewarm_connections)
+
+    # 镜像流量的处理器按运行模式选定一次，之后不经过 FastAPI 路由直接调用
+    mode_handler = proxy_handler or local_handler or hybrid_handler
+    if app_config.asgi_fast_path and mode_handler:
+        asgi_app.set_handler(mode_handler.handle_asgi, catch_all)
+
+    # 多 worker 时定期写入本进程的统计快照，统计接口汇总所有 worker
+    stats_task = None
+    if app_config.workers > 1:
+        stats_task = asyncio.create_task(publish_worker_stats(), name="worker-stats")
+
     yield
 
-    # 清理资源
+    # 清理资源 (先停止快速路径，已关闭的处理器不再接收请求)
+    asgi_app.set_handler(None, catch_all)
+    if stats_task:
+        stats_task.cancel()
+        await asyncio.gather(stats_task, return_exceptions=True)
+        cache_manager.remove_worker_stats()
     if proxy_handler:
         await proxy_handler.close()
     if hybrid_handler:
         await hybrid_handler.close()
+    if cache_manager:
+        # 写完队列中尚未落盘的缓存后再退出
+        await cache_manager.aclose()
 
 
 # 创建 FastAPI 应用
@@ -87,15 +118,54 @@ app = FastAPI(
 app.include_router(custom_router)
 
 
+def worker_stats():
+    """当前 worker 进程的各缓存层统计以及当前处理器的统计"""
+    stats = cache_manager.get_stats() if cache_manager else {}
+    for handler in (proxy_handler, local_handler, hybrid_handler):
+        if handler:
+            stats.update(handler.get_stats())
+    return stats
+
+
+async def publish_worker_stats():
+    """后台任务: 定期写入当前 worker 的统计快照"""
+    while True:
+        try:
+            await asyncio.to_thread(cache_manager.save_worker_stats, worker_stats())
+        except Exception as e:
+            logger.error(f"统计快照写入失败: {e}")
+        await asyncio.sleep(constants.CACHE_INDEX_FLUSH_INTERVAL)
+
+
+async def cache_stats():
+    """
+    缓存统计接口，返回各缓存层的命中、淘汰等计数以及当前处理器的统计
+
+    多 worker 时返回处理本次请求的 worker 的统计，"workers" 中为其他 worker 最近的快照
+    """
+    stats = worker_stats()
+    if app_config.workers > 1 and cache_manager:
+        stats["workers"] = await asyncio.to_thread(
+            cache_manager.load_worker_stats, constants.CACHE_INDEX_FLUSH_INTERVAL * 3
+        )
+    return stats
+
+
+if app_config.stats_path:
+    app.add_api_route(
+        app_config.stats_path, cache_stats, methods=["GET"], include_in_schema=False
+    )
+
+
 @app.api_route(
     "/{path:path}",
-    methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
+    methods=list(constants.MIRROR_METHODS),
     include_in_schema=False,
 )
 async def catch_all(request: Request, path: str = ""):
     """
     捕获所有请求的路由(包括根路径)
-    根据运行模式调用对应的处理器
+    根据运行模式调用对应的处理器 (启用 ASGI 快速路径时由 asgi_app 直接调用处理器，不经过此路由)
     """
     if app_config.mode == RunMode.PROXY:
         return await proxy_handler.handle_request(request, path)
@@ -106,6 +176,44 @@ async def catch_all(request: Request, path: str = ""):
     return None
 
 
+# ASGI 入口: 镜像流量走快速路径，其余请求交给 FastAPI
+asgi_app = FastPathApp(app)
+
+
+def select_accelerators() -> Dict[str, str]:
+    """
+    按性能配置选择事件循环、HTTP 解析器和缓存元数据编解码器 (未安装的组件回退到标准实现)
+
+    Returns:
+        {"loop": 传给 uvicorn 的事件循环, "http": 传给 uvicorn 的 HTTP 解析器, "codec": 元数据编解码器}
+    """
+    profile = app_config.performance_profile
+    if profile == PerformanceProfile.COMPAT:
+        return {"loop": "asyncio", "http": "h11", "codec": "json"}
+
+    # 与 uvicorn 的 auto 选择一致: 已安装时使用 uvloop (Windows 不支持) 和 httptools
+    has_uvloop = importlib.util.find_spec("uvloop") is not None and sys.platform not in ("win32", "cygwin")
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    fast = profile == PerformanceProfile.FAST
+    if fast:
+        missing = [
+            name
+            for name, installed in (
+                ("uvloop", has_uvloop),
+                ("httptools", has_httptools),
+                ("orjson", JsonUtil.available()),
+            )
+            if not installed
+        ]
+        if missing:
+            logger.warning(f"性能配置 fast 缺少 {', '.join(missing)}，使用标准实现代替")
+    return {
+        "loop": "uvloop" if has_uvloop else "asyncio",
+        "http": "httptools" if has_httptools else "h11",
+        "codec": "orjson" if fast and JsonUtil.available() else "json",
+    }
+
+
 def main():
     """主函数"""
     import uvicorn
@@ -135,6 +243,64 @@ def main():
         type=str,
         help="缓存目录 [默认: 从 .env 读取或 ./cache]",
     )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        help="上游连接池最大连接数 [默认: 从 .env 读取或 100]",
+    )
+    parser.add_argument(
+        "--max-keepalive",
+        type=int,
+        help="上游 keep-alive 连接数 [默认: 从 .env 读取或 20]",
+    )
+    parser.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        help="上游空闲连接过期时间(秒) [默认: 从 .env 读取或 5.0]",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        default=None,
+        help="与上游使用 HTTP/2 (需要安装 h2) [默认: 从 .env 读取或关闭]",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        help="上游连接超时(秒) [默认: 从 .env 读取或同 REQUEST_TIMEOUT]",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        help="上游读取超时(秒) [默认: 从 .env 读取或同 REQUEST_TIMEOUT]",
+    )
+    parser.add_argument(
+        "--prewarm",
+        type=int,
+        help="启动时预先建立的上游连接数 [默认: 从 .env 读取或 0]",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="同时发往上游的最大请求数 (0 表示不限制) [默认: 从 .env 读取或 100]",
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        help="上游连续失败多少次后熔断 (0 表示不启用) [默认: 从 .env 读取或 5]",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        choices=[profile.value for profile in PerformanceProfile],
+        help="性能配置: auto (uvicorn 自动选择), fast (uvloop + httptools + orjson), "
+        "compat (asyncio + h11 + 标准库 json) [默认: 从 .env 读取或 auto]",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker 进程数，大于 1 时预先 fork 多个进程共享监听端口 [默认: 从 .env 读取或 1]",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -163,6 +329,28 @@ def main():
         app_config.cache_dir = args.cache_dir
     if args.log_level:
         app_config.log_level = args.log_level
+    if args.max_connections is not None:
+        app_config.upstream_max_connections = args.max_connections
+    if args.max_keepalive is not None:
+        app_config.upstream_max_keepalive_connections = args.max_keepalive
+    if args.keepalive_expiry is not None:
+        app_config.upstream_keepalive_expiry = args.keepalive_expiry
+    if args.http2:
+        app_config.upstream_http2 = True
+    if args.connect_timeout is not None:
+        app_config.upstream_connect_timeout = args.connect_timeout
+    if args.read_timeout is not None:
+        app_config.upstream_read_timeout = args.read_timeout
+    if args.prewarm is not None:
+        app_config.upstream_prewarm_connections = args.prewarm
+    if args.max_concurrency is not None:
+        app_config.upstream_max_concurrency = args.max_concurrency
+    if args.breaker_threshold is not None:
+        app_config.upstream_breaker_threshold = args.breaker_threshold
+    if args.workers is not None:
+        app_config.workers = args.workers
+    if args.profile:
+        app_config.performance_profile = PerformanceProfile(args.profile)
 
     # 设置日志级别
     logging.getLogger().setLevel(getattr(logging, app_config.log_level))
@@ -172,9 +360,27 @@ def main():
     logger.info("FastMirror 启动配置:")
     logger.info(f"  运行模式: {app_config.mode.value}")
     logger.info(f"  监听地址: {app_config.host}:{app_config.port}")
+    if app_config.workers > 1:
+        logger.info(f"  worker 进程数: {app_config.workers}")
     if app_config.target_url:
         logger.info(f"  目标服务器: {app_config.target_url}")
     logger.info(f"  缓存目录: {app_config.cache_dir}")
+    if app_config.target_url:
+        logger.info(
+            f"  上游连接池: max={app_config.upstream_max_connections}, "
+            f"keepalive={app_config.upstream_max_keepalive_connections}, "
+            f"http2={app_config.upstream_http2}"
+        )
+        logger.info(
+            f"  上游保护: concurrency={app_config.upstream_max_concurrency or 'unlimited'}, "
+            f"queue={app_config.upstream_max_queue}, "
+            f"breaker={app_config.upstream_breaker_threshold or 'off'}"
+        )
+    accelerators = select_accelerators()
+    logger.info(
+        f"  性能配置: {app_config.performance_profile.value} (event loop={accelerators['loop']}, "
+        f"HTTP parser={accelerators['http']}, metadata codec={accelerators['codec']})"
+    )
     logger.info(f"  日志级别: {app_config.log_level}")
     logger.info("=" * 60)
 
@@ -187,10 +393,29 @@ def main():
         sys.exit(1)
 
     # 启动服务器
+    if app_config.workers > 1:
+        # 各 worker 进程重新导入应用，通过环境变量传递命令行覆盖后的配置
+        for name in type(app_config).model_fields:
+            value = getattr(app_config, name)
+            if value is not None:
+                os.environ[name.upper()] = str(value.value if isinstance(value, Enum) else value)
+        uvicorn.run(
+            "main:asgi_app",
+            host=app_config.host,
+            port=app_config.port,
+            workers=app_config.workers,
+            loop=accelerators["loop"],
+            http=accelerators["http"],
+            log_level=app_config.log_level.lower(),
+        )
+        return
+
     uvicorn.run(
-        app,
+        asgi_app,
         host=app_config.host,
         port=app_config.port,
+        loop=accelerators["loop"],
+        http=accelerators["http"],
         log_level=app_config.log_level.lower(),
     )
 
@@ -0,0 +1,193 @@
+"""
+FastMirror - 缓存目录分层迁移工具
+将带参数 GET 和 POST 条目移动到按哈希前缀分层的目录 (也可用于修改分层深度或恢复为不分层)，
+需要在服务停止时运行
+"""
+
+import argparse
+import logging
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import app_config
+from utils import CachePathUtil, constants
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+HEX_CHARS = frozenset("0123456789abcdef")
+
+
+def _entry_hash(name: str, names: set[str]) -> Optional[str]:
+    """
+    取出条目文件 (及其 .body、预压缩变体和旧版 JSON 条目) 文件名中的哈希
+
+    Args:
+        name: 文件名
+        names: 所在目录的文件名集合
+
+    Returns:
+        十六进制哈希，不属于以哈希命名的条目时返回 None
+    """
+    if name.startswith("."):
+        return None
+    file_hash, _, suffix = name.partition(".")
+    if len(file_hash) != 32 or not HEX_CHARS.issuperset(file_hash):
+        return None
+    entry = constants.CACHE_FILE_EXTENSION_ENTRY.lstrip(".")
+    if suffix == entry or suffix.startswith(f"{entry}."):
+        return file_hash
+    # 旧版 JSON 条目没有元数据文件 (区别于名为 {hash}.json 的 GET 缓存)
+    if (
+        f".{suffix}" == constants.CACHE_FILE_EXTENSION_JSON
+        and f"{name}{constants.CACHE_FILE_EXTENSION_META}" not in names
+    ):
+        return file_hash
+    return None
+
+
+def iter_entry_groups(cache_dir: Path) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    遍历缓存目录，按哈希对条目文件分组 (同一条目的文件需要一起移动)
+
+    Args:
+        cache_dir: 缓存根目录
+
+    Yields:
+        (所在目录, 同一条目的文件名列表)
+    """
+    for dir_path, dir_names, file_names in os.walk(cache_dir):
+        dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+        names = set(file_names)
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for name in file_names:
+            file_hash = _entry_hash(name, names)
+            if file_hash is not None:
+                groups[file_hash].append(name)
+        for group in groups.values():
+            yield Path(dir_path), group
+
+
+def move_group(dir_path: Path, names: List[str], depth: int, dry_run: bool) -> str:
+    """
+    将一个条目的文件移动到目标分层深度的目录
+
+    目标位置已有同一条目时 (服务在分层布局中写入过更新的版本) 删除旧位置的文件
+
+    Args:
+        dir_path: 当前所在目录
+        names: 条目的文件名列表
+        depth: 目标分层深度
+        dry_run: 只统计不移动
+
+    Returns:
+        "skipped" (已在目标位置)、"moved" 或 "replaced" (删除了旧位置的副本)
+    """
+    first = dir_path / names[0]
+    file_hash = names[0].split(".", 1)[0]
+    current_depth = CachePathUtil.sharded_depth(first)
+    container = first.parents[current_depth]
+    target_dir = CachePathUtil.shard_dir(container, file_hash, depth)
+    if target_dir == dir_path:
+        return "skipped"
+
+    entry_name = f"{file_hash}{constants.CACHE_FILE_EXTENSION_ENTRY}"
+    legacy_name = f"{file_hash}{constants.CACHE_FILE_EXTENSION_JSON}"
+    exists = (target_dir / entry_name).exists() or (target_dir / legacy_name).exists()
+    if dry_run:
+        return "replaced" if exists else "moved"
+
+    if exists:
+        for name in names:
+            (dir_path / name).unlink(missing_ok=True)
+    else:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            os.replace(dir_path / name, target_dir / name)
+
+    # 清理迁出后变空的分层目录
+    empty_dir = dir_path
+    for _ in range(current_depth):
+        try:
+            empty_dir.rmdir()
+        except OSError:
+            break
+        empty_dir = empty_dir.parent
+    return "replaced" if exists else "moved"
+
+
+def reshard(cache_dir: Path, depth: int, workers: int, dry_run: bool = False) -> Dict[str, int]:
+    """
+    并行迁移整个缓存目录
+
+    Args:
+        cache_dir: 缓存根目录
+        depth: 目标分层深度
+        workers: 并行线程数
+        dry_run: 只统计不移动
+
+    Returns:
+        {"moved", "replaced", "skipped"} 计数
+    """
+    counts = {"moved": 0, "replaced": 0, "skipped": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(move_group, dir_path, names, depth, dry_run)
+            for dir_path, names in iter_entry_groups(cache_dir)
+        ]
+        for future in futures:
+            counts[future.result()] += 1
+
+    # 缓存键即文件路径，移动后索引需要在下次启动时重新扫描
+    if not dry_run and (counts["moved"] or counts["replaced"]):
+        for suffix in ("", "-wal", "-shm"):
+            (cache_dir / f"{constants.CACHE_INDEX_FILE}{suffix}").unlink(missing_ok=True)
+    return counts
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="FastMirror - 缓存目录分层迁移 (需要先停止服务)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=app_config.cache_dir,
+        help=f"缓存目录 [默认: 从 .env 读取或 ./cache，当前 {app_config.cache_dir}]",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=app_config.cache_shard_depth,
+        help=f"目标分层深度 (0 表示不分层) [默认: CACHE_SHARD_DEPTH，当前 {app_config.cache_shard_depth}]",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="并行线程数 [默认: 8]")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要移动的条目")
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir)
+    if not cache_dir.is_dir():
+        logger.error(f"缓存目录不存在: {cache_dir}")
+        sys.exit(1)
+    if not 0 <= args.depth <= constants.CACHE_SHARD_MAX_DEPTH:
+        logger.error(f"分层深度需要在 0 到 {constants.CACHE_SHARD_MAX_DEPTH} 之间")
+        sys.exit(1)
+
+    counts = reshard(cache_dir, args.depth, args.workers, args.dry_run)
+    logger.info(
+        f"{'[dry run] ' if args.dry_run else ''}Resharded {cache_dir} to depth {args.depth}: "
+        f"{counts['moved']} moved, {counts['replaced']} superseded, {counts['skipped']} already in place"
+    )
+    if not args.dry_run and (counts["moved"] or counts["replaced"]):
+        logger.info("缓存索引已删除，下次启动时会重新扫描缓存目录")
+
+
+if __name__ == "__main__":
+    main()
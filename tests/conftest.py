@@ -0,0 +1,27 @@
+"""
+测试公共配置: 每个测试使用独立的临时缓存目录和默认配置
+"""
+
+import pytest
+
+from config import Config, app_config
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch, tmp_path):
+    """
+    将全局配置重置为默认值 (不读取 .env 和环境变量)，缓存目录指向临时目录
+
+    测试中修改的配置项在测试结束后恢复
+    """
+    defaults = Config.model_construct()
+    for name in Config.model_fields:
+        monkeypatch.setattr(app_config, name, getattr(defaults, name))
+    monkeypatch.setattr(app_config, "cache_dir", str(tmp_path / "cache"))
+    return app_config
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """临时缓存目录"""
+    return tmp_path / "cache"
@@ -0,0 +1,123 @@
+"""
+测试辅助函数: 构造请求、收集 ASGI 响应、打开临时缓存目录
+"""
+
+import asyncio
+import contextlib
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from starlette.requests import Request
+
+from core import CacheManager
+
+
+def make_request(
+    method: str,
+    path: str,
+    query: bytes = b"",
+    body: bytes = b"",
+    headers: Iterable[Tuple[str, str]] = (),
+) -> Request:
+    """
+    构造只包含必要字段的 Starlette 请求
+
+    Args:
+        method: HTTP 方法
+        path: 请求路径 (不含开头的 "/")
+        query: 原始查询字符串
+        body: 请求体
+        headers: 请求头 (小写名称)
+
+    Returns:
+        请求对象
+    """
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/" + path,
+        "query_string": query,
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "root_path": "",
+        "http_version": "1.1",
+    }
+    sent = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+async def read_response(
+    response: Any, extensions: Optional[Dict[str, Any]] = None
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    以 ASGI 方式执行响应对象并收集结果
+
+    Args:
+        response: Starlette 响应对象
+        extensions: 模拟服务器支持的 ASGI 扩展
+
+    Returns:
+        (状态码, 响应头, 响应体)
+    """
+    messages = []
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.zerocopysend":
+            # 模拟服务器的 sendfile: 发送时从文件描述符读取
+            message = {
+                "type": "http.response.body",
+                "body": os.pread(message["file"], message["count"], message["offset"]),
+            }
+        messages.append(message)
+
+    async def receive() -> Dict[str, Any]:
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [],
+        "extensions": extensions or {},
+        "asgi": {"spec_version": "2.4"},
+    }
+    await response(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], headers, body
+
+
+@contextlib.asynccontextmanager
+async def open_cache(cache_dir: Path, ready: bool = True) -> AsyncIterator[CacheManager]:
+    """
+    创建缓存管理器并启动后台任务，退出时关闭
+
+    Args:
+        cache_dir: 缓存目录
+        ready: 是否等待缓存索引 (或未启用索引时的布隆过滤器) 载入完成
+
+    Yields:
+        缓存管理器
+    """
+    manager = CacheManager(str(cache_dir))
+    manager.start()
+    try:
+        lookup = manager.index if manager.index is not None else manager.bloom
+        if ready and lookup is not None:
+            while not lookup.ready:
+                await asyncio.sleep(0.01)
+        yield manager
+    finally:
+        await manager.aclose()
@@ -0,0 +1,134 @@
+"""
+原始 ASGI 快速路径: 镜像流量直接交给运行模式的处理器，其他路由和生命周期仍由 FastAPI 处理
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from config import RunMode, app_config
+from core import BaseHandler, CacheManager, FastPathApp, LocalHandler
+
+
+class EchoHandler(BaseHandler):
+    """返回收到的路径和查询字符串的处理器"""
+
+    async def handle_request(self, request: Request, path: str) -> PlainTextResponse:
+        query = self.get_query(request) or ""
+        return PlainTextResponse(f"handler {request.method} {path}?{query}")
+
+
+def build_app():
+    """与 main.py 结构相同的最小应用: 一个自定义路由和一个 catch-all 路由"""
+    app = FastAPI()
+
+    @app.get("/api/custom")
+    async def custom():
+        return PlainTextResponse("custom")
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def catch_all(request: Request, path: str = ""):
+        return PlainTextResponse(f"catch_all {request.method} {path}")
+
+    return app, catch_all
+
+
+@pytest.fixture
+def client():
+    app, catch_all = build_app()
+    fast_app = FastPathApp(app)
+    fast_app.set_handler(EchoHandler().handle_asgi, catch_all)
+    return TestClient(fast_app)
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("GET", "/assets/app.js?v=1", "handler GET assets/app.js?v=1"),
+        ("GET", "/", "handler GET ?"),
+        ("POST", "/api/items", "handler POST api/items?"),
+        # 完整匹配其他路由时交给 FastAPI
+        ("GET", "/api/custom", "custom"),
+        # 路径相同但方法不同，仍是镜像流量
+        ("POST", "/api/custom", "handler POST api/custom?"),
+    ],
+)
+def test_mirror_traffic_bypasses_fastapi_routing(client, method, path, expected):
+    response = client.request(method, path)
+    assert response.status_code == 200
+    assert response.text == expected
+
+
+def test_unsupported_method_is_left_to_fastapi(client):
+    assert client.request("TRACE", "/assets/app.js").status_code == 405
+
+
+def test_without_handler_everything_goes_to_fastapi():
+    app, _ = build_app()
+    client = TestClient(FastPathApp(app))
+    assert client.get("/assets/app.js").text == "catch_all GET assets/app.js"
+    assert client.get("/api/custom").text == "custom"
+
+
+def test_root_path_is_stripped_before_handler():
+    # 挂载在子路径下时 scope["path"] 包含 root_path
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/mirror/assets/app.js",
+        "root_path": "/mirror",
+        "query_string": b"v=2",
+        "headers": [],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(EchoHandler().handle_asgi(scope, receive, send))
+    assert messages[0]["status"] == 200
+    assert messages[1]["body"] == b"handler GET assets/app.js?v=2"
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_local_mode_serves_same_response_with_and_without_fast_path(
+    cache_dir, monkeypatch, fast_path
+):
+    import main
+
+    monkeypatch.setattr(app_config, "mode", RunMode.LOCAL)
+    monkeypatch.setattr(app_config, "target_url", "http://example.com")
+    monkeypatch.setattr(app_config, "asgi_fast_path", fast_path)
+    CacheManager(str(cache_dir)).save_response(
+        "http://example.com/page?lang=en", "GET", b"<p>hi</p>", {"content-type": "text/html"}
+    )
+
+    # 记录经过快速路径的请求
+    fast_paths = []
+    handle_asgi = LocalHandler.handle_asgi
+
+    async def recording_handle_asgi(self, scope, receive, send):
+        fast_paths.append(scope["path"])
+        await handle_asgi(self, scope, receive, send)
+
+    monkeypatch.setattr(LocalHandler, "handle_asgi", recording_handle_asgi)
+
+    with TestClient(main.asgi_app) as client:
+        response = client.get("/page?lang=en")
+        missing = client.get("/missing.js")
+        custom = client.get("/api/custom")
+
+    assert response.status_code == 200
+    assert response.content == b"<p>hi</p>"
+    assert response.headers["content-type"].startswith("text/html")
+    assert missing.status_code == 404
+    assert custom.json()["data"]["custom"] is True
+    assert fast_paths == (["/page", "/missing.js"] if fast_path else [])
+    # 关闭后快速路径不再指向已关闭的处理器
+    assert main.asgi_app.handler is None
@@ -0,0 +1,65 @@
+"""
+CacheManager 异步接口: 文件操作在 I/O 线程池中执行，不阻塞事件循环
+"""
+
+import asyncio
+import time
+
+from config import app_config
+from tests.helpers import open_cache
+
+URL = "http://example.com/assets/app.js"
+
+
+def test_async_roundtrip(cache_dir):
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            assert await manager.aget_response(URL) is None
+            assert not await manager.ahas_cache(URL)
+
+            await manager.asave_response(
+                URL, "GET", b"console.log(1)", {"content-type": "text/javascript"}
+            )
+            # 写入队列中尚未落盘的条目可以直接读取
+            assert (await manager.aget_response(URL))["content"] == b"console.log(1)"
+
+            await manager.flush()
+            manager.memory_cache.invalidate(manager.get_cache_key(URL, "GET"))
+            cached = await manager.aget_response(URL)
+            assert cached["content"] == b"console.log(1)"
+            assert cached["headers"]["content-type"] == "text/javascript"
+            assert await manager.ahas_cache(URL)
+
+    asyncio.run(scenario())
+
+
+def test_slow_disk_write_does_not_block_event_loop(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            original = manager.save_response
+
+            def slow_save(**kwargs):
+                time.sleep(0.5)
+                original(**kwargs)
+
+            manager.save_response = slow_save
+
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.monotonic())
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await manager.asave_response(URL, "GET", b"x" * 1024)
+            task.cancel()
+
+            gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+            assert len(ticks) > 20
+            assert max(gaps) < 0.2
+            assert (await manager.aget_response(URL))["content"] == b"x" * 1024
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+"""
+内容去重: 多个条目共享的内容在最后一个引用删除后才被回收，写入和链接时即时更新存储统计
+"""
+
+import os
+
+import pytest
+
+from config import app_config
+from core import BlobStore, CacheManager
+
+TARGET = "http://upstream.test"
+HEADERS = {"content-type": "application/octet-stream"}
+
+
+@pytest.fixture(autouse=True)
+def synchronous_writes(monkeypatch):
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+@pytest.mark.parametrize("suffix", ["", "?v=1"], ids=["raw", "entry"])
+def test_shared_blob_is_collected_after_last_reference(cache_dir, suffix):
+    manager = CacheManager(str(cache_dir))
+    content = os.urandom(8192)
+    urls = [f"{TARGET}/a/data{suffix}", f"{TARGET}/b/data{suffix}"]
+    for url in urls:
+        manager.save_response(url, "GET", content, HEADERS)
+    blob_store = manager.blob_store
+    blob_path = blob_store.path(BlobStore.digest_from_etag(manager.get_response(urls[0])["etag"]))
+    assert os.stat(blob_path).st_nlink == 3
+
+    manager.delete_entry(manager.get_cache_key(urls[0]))
+    assert blob_store.collect_garbage() == 0
+    assert blob_path.exists()
+    assert manager.get_response(urls[0]) is None
+    assert manager.get_response(urls[1])["content"] == content
+    assert blob_store.get_stats()["saved_bytes"] == 0
+
+    manager.delete_entry(manager.get_cache_key(urls[1]))
+    assert blob_store.collect_garbage() == 1
+    assert not blob_path.exists()
+    stats = blob_store.get_stats()
+    assert (stats["blobs"], stats["physical_bytes"], stats["collected_bytes"]) == (0, 0, 8192)
+
+
+def test_usage_is_updated_on_store_and_link_before_collection(cache_dir):
+    manager = CacheManager(str(cache_dir))
+    content = os.urandom(4096)
+    for name in ("a", "b", "c"):
+        manager.save_response(f"{TARGET}/{name}.bin", "GET", content, HEADERS)
+    manager.save_response(f"{TARGET}/other.bin", "GET", os.urandom(1024), HEADERS)
+
+    stats = manager.blob_store.get_stats()
+    assert (stats["stored"], stats["deduplicated"]) == (2, 2)
+    assert stats["blobs"] == 2
+    assert stats["physical_bytes"] == 4096 + 1024
+    assert stats["logical_bytes"] == 3 * 4096 + 1024
+    assert stats["saved_bytes"] == stats["deduplicated_bytes"] == 2 * 4096
+
+    # 回收按链接数重新统计，结果与写入时累加的一致
+    manager.blob_store.collect_garbage()
+    recounted = manager.blob_store.get_stats()
+    for name in ("blobs", "physical_bytes", "logical_bytes", "saved_bytes"):
+        assert recounted[name] == stats[name]
+
+
+def test_deduplicate_replaces_file_with_link_to_existing_blob(tmp_path):
+    blob_store = BlobStore(tmp_path / "blobs")
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.write_bytes(b"same body")
+    second.write_bytes(b"same body")
+
+    blob_store.deduplicate("0" * 32, first)
+    blob_store.deduplicate("0" * 32, second)
+
+    blob_inode = os.stat(blob_store.path("0" * 32)).st_ino
+    assert os.stat(first).st_ino == os.stat(second).st_ino == blob_inode
+    assert not list(tmp_path.glob("*.tmp"))
+    stats = blob_store.get_stats()
+    assert (stats["blobs"], stats["logical_bytes"], stats["saved_bytes"]) == (1, 18, 9)
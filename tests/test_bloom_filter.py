@@ -0,0 +1,84 @@
+"""
+布隆过滤器: 不存在假阴性，未启用缓存索引时一定不存在的键不访问文件系统
+"""
+
+import asyncio
+
+import pytest
+
+from config import app_config
+from core import BloomFilter, CacheManager
+from tests.helpers import open_cache
+
+
+def test_added_keys_are_never_rejected():
+    bloom = BloomFilter(10_000)
+    keys = [f"/cache/example.com/{i}.js" for i in range(10_000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    # 加入前已被误判为存在的键不计数
+    assert 9_800 <= bloom.count <= 10_000
+
+
+def test_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"/cache/example.com/{i}.js")
+
+    false_positives = sum(f"/cache/other.test/{i}.js" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+    assert bloom.get_stats()["error_rate"] == pytest.approx(0.01, rel=0.5)
+
+
+@pytest.fixture
+def bloom_config(monkeypatch):
+    """关闭缓存索引，改用布隆过滤器"""
+    monkeypatch.setattr(app_config, "cache_index", False)
+    monkeypatch.setattr(app_config, "cache_bloom_capacity", 1000)
+
+
+def test_definite_misses_skip_the_filesystem(cache_dir, bloom_config, monkeypatch):
+    # 启动前已存在的缓存由启动扫描加入
+    CacheManager(str(cache_dir)).save_response(
+        "http://example.com/old.js", "GET", b"old", {"content-type": "text/javascript"}
+    )
+    loads = []
+    original = CacheManager._load_response
+
+    def counting_load(self, cache_path, url, method):
+        loads.append(url)
+        return original(self, cache_path, url, method)
+
+    monkeypatch.setattr(CacheManager, "_load_response", counting_load)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            assert manager.index is None and manager.bloom.ready
+            assert (await manager.aget_response("http://example.com/old.js"))["content"] == b"old"
+
+            for i in range(50):
+                assert await manager.aget_response(f"http://example.com/scan/{i}.php") is None
+                assert not await manager.ahas_cache(f"http://example.com/scan/{i}.php")
+
+            # 之后写入的缓存加入过滤器
+            await manager.asave_response("http://example.com/new.js", "GET", b"new")
+            await manager.flush()
+            manager.memory_cache.invalidate(manager.get_cache_key("http://example.com/new.js"))
+            assert (await manager.aget_response("http://example.com/new.js"))["content"] == b"new"
+
+    asyncio.run(scenario())
+    # 未缓存的路径 (除去极少数误判) 不读取磁盘
+    assert loads.count("http://example.com/old.js") == 1
+    assert loads.count("http://example.com/new.js") == 1
+    assert len(loads) <= 4
+
+
+def test_lookups_use_disk_until_scan_completes(cache_dir, bloom_config):
+    CacheManager(str(cache_dir)).save_response("http://example.com/old.js", "GET", b"old")
+
+    manager = CacheManager(str(cache_dir))
+    assert not manager.bloom.ready
+    # 扫描完成前过滤器为空，不能据此判定未命中
+    assert manager.get_response("http://example.com/old.js")["content"] == b"old"
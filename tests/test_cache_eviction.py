@@ -0,0 +1,147 @@
+"""
+缓存淘汰: 索引维护的 LRU / LFU 淘汰顺序，以及淘汰任务分批执行
+"""
+
+import asyncio
+
+import pytest
+
+from config import CacheEvictionPolicy
+from core import CacheEvictor, CacheIndex
+from utils import constants
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的 time.time()"""
+    now = [NOW]
+    monkeypatch.setattr("core.cache_index.time.time", lambda: now[0])
+    return now
+
+
+def build_index(policy: CacheEvictionPolicy, clock, keys, domain: str = "a.test") -> CacheIndex:
+    """按顺序写入条目，每个条目间隔 1 秒"""
+    index = CacheIndex(policy=policy)
+    for key in keys:
+        clock[0] += 1
+        index.record(key, domain, 100)
+    return index
+
+
+def victims(index: CacheIndex, limit: int = 10, domain=None, idle_before=NOW + 10_000):
+    return [key for key, _ in index.select_victims(limit, idle_before, domain)]
+
+
+def test_lru_selects_least_recently_accessed(clock):
+    index = build_index(CacheEvictionPolicy.LRU, clock, ["a", "b", "c", "d"])
+    clock[0] += 1
+    index.touch("a")
+    clock[0] += 1
+    index.touch("c")
+
+    assert victims(index) == ["b", "d", "a", "c"]
+    assert victims(index, limit=2) == ["b", "d"]
+    # 最近访问过的条目不淘汰
+    assert victims(index, idle_before=NOW + 5) == ["b", "d"]
+
+
+def test_lfu_selects_fewest_hits_then_oldest(clock):
+    index = build_index(CacheEvictionPolicy.LFU, clock, ["a", "b", "c", "d"])
+    for key in ("a", "a", "c", "d"):
+        clock[0] += 1
+        index.touch(key)
+
+    assert victims(index) == ["b", "c", "d", "a"]
+    # 最近访问过的 c、d 被跳过，访问次数更多的 a 仍可淘汰
+    assert victims(index, idle_before=NOW + 7) == ["b", "a"]
+
+
+@pytest.mark.parametrize("policy", list(CacheEvictionPolicy))
+def test_removed_entries_leave_the_order(clock, policy):
+    index = build_index(policy, clock, ["a", "b", "c"])
+    index.touch("b")
+    index.remove("a")
+    index.remove("b")
+    assert victims(index) == ["c"]
+    index.remove("c")
+    assert victims(index) == []
+
+
+def test_domain_victims_come_from_that_domain(clock):
+    index = CacheIndex()
+    for i in range(6):
+        clock[0] += 1
+        index.record(f"k{i}", "a.test" if i % 2 else "b.test", 100)
+
+    assert victims(index, domain="a.test") == ["k1", "k3", "k5"]
+    assert victims(index, domain="b.test", limit=2) == ["k0", "k2"]
+    assert victims(index, domain="c.test") == []
+
+
+def test_scanned_entries_are_ordered_by_mtime(clock):
+    index = CacheIndex()
+    # 扫描缓存目录时条目以任意顺序载入，访问时间为文件修改时间
+    for key, mtime in [("new", NOW - 10), ("old", NOW - 300), ("mid", NOW - 100)]:
+        index.load(key, "a.test", 100, mtime)
+    clock[0] += 1
+    index.record("fresh", "a.test", 100)
+
+    assert victims(index) == ["old", "mid", "new", "fresh"]
+    assert victims(index, domain="a.test") == ["old", "mid", "new", "fresh"]
+
+
+def test_synced_access_moves_entry_back(clock, tmp_path):
+    path = tmp_path / "index.sqlite"
+    leader, follower = CacheIndex(path), CacheIndex(path)
+    leader.open()
+    leader.mark_ready("leader")
+    for key in ("a", "b"):
+        clock[0] += 1
+        leader.record(key, "a.test", 100)
+    leader.flush()
+    assert follower.attach("leader")
+    follower.ready = True
+
+    # 其他 worker 访问了 a，同步后 a 排到 b 之后
+    clock[0] += 1
+    leader.touch("a")
+    leader.flush()
+    follower.sync()
+    assert victims(follower) == ["b", "a"]
+    leader.close()
+    follower.close()
+
+
+def test_evictor_continues_full_batches_without_waiting_for_interval(clock, monkeypatch):
+    monkeypatch.setattr(constants, "CACHE_EVICT_BATCH", 10)
+    index = build_index(CacheEvictionPolicy.LRU, clock, [f"k{i}" for i in range(100)])
+    index.ready = True
+    clock[0] += constants.CACHE_EVICT_MIN_IDLE + 1
+
+    def delete(key: str) -> bool:
+        return index.remove(key) is not None
+
+    async def run_io(func, *args):
+        return func(*args)
+
+    async def scenario():
+        evictor = CacheEvictor(
+            index, delete, run_io, CacheEvictionPolicy.LRU, interval=3600, max_entries=50
+        )
+        evictor.start()
+        ticks = 0
+        while len(index) > 50 and ticks < 200:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await evictor.close()
+        return evictor.get_stats(), ticks
+
+    stats, ticks = asyncio.run(scenario())
+    # 每轮最多淘汰 10 个，满额时不等待检查间隔继续下一轮，直到不再超出配额
+    assert len(index) == 50
+    assert stats["evicted"] == 50
+    assert stats["passes"] >= 5
+    assert ticks > 1
+    assert sorted(index.keys()) == sorted(f"k{i}" for i in range(50, 100))
@@ -0,0 +1,218 @@
+"""
+缓存索引: 读取失败时只在确认文件已不存在后移除记录，多个 worker 共享同一个 SQLite 文件时同步新增和删除
+"""
+
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from config import RunMode, app_config
+from core import CacheIndex, CacheManager
+from tests.helpers import open_cache
+
+RAW_URL = "http://example.com/assets/app.js"
+ENTRY_URL = "http://example.com/api/items?page=1"
+
+
+def break_entry(manager, url: str) -> None:
+    """使缓存条目读取不一致: 内容与元数据不匹配，或单独保存的响应体缺失"""
+    cache_path = Path(manager.get_cache_key(url, "GET"))
+    if url == RAW_URL:
+        with open(cache_path, "ab") as file:
+            file.write(b"// torn")
+    else:
+        manager._body_path(cache_path).unlink()
+
+
+def delete_entry_files(manager, url: str) -> None:
+    """在缓存管理器之外删除条目的全部文件"""
+    cache_path = Path(manager.get_cache_key(url, "GET"))
+    for path in manager._entry_files(cache_path):
+        path.unlink(missing_ok=True)
+
+
+@pytest.fixture
+def index_enabled(monkeypatch):
+    """启用缓存索引 (默认关闭)"""
+    monkeypatch.setattr(app_config, "cache_index", True)
+
+
+async def lookup(manager, url: str, use_async: bool):
+    """绕过内存缓存读取"""
+    manager.memory_cache.invalidate(manager.get_cache_key(url, "GET"))
+    if use_async:
+        return await manager.aget_response(url)
+    return manager.get_response(url)
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+@pytest.mark.parametrize("url", [RAW_URL, ENTRY_URL], ids=["raw", "entry"])
+def test_inconsistent_read_keeps_index_record(cache_dir, index_enabled, url, use_async):
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            await manager.asave_response(url, "GET", b"console.log(1)")
+            await manager.flush()
+            cache_key = manager.get_cache_key(url, "GET")
+            assert cache_key in manager.index
+
+            break_entry(manager, url)
+            assert await lookup(manager, url, use_async) is None
+            # 文件仍在，不能因为一次读取失败就让之后的查找一直按未命中处理
+            assert cache_key in manager.index
+
+            await manager.asave_response(url, "GET", b"console.log(2)")
+            await manager.flush()
+            assert (await lookup(manager, url, use_async))["content"] == b"console.log(2)"
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+@pytest.mark.parametrize("url", [RAW_URL, ENTRY_URL], ids=["raw", "entry"])
+def test_externally_deleted_entry_leaves_index(cache_dir, index_enabled, url, use_async):
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            await manager.asave_response(url, "GET", b"console.log(1)")
+            await manager.flush()
+            cache_key = manager.get_cache_key(url, "GET")
+
+            delete_entry_files(manager, url)
+            assert await lookup(manager, url, use_async) is None
+            assert cache_key not in manager.index
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("mode", [RunMode.LOCAL, RunMode.HYBRID])
+def test_default_config_serves_files_placed_outside_the_service(cache_dir, monkeypatch, mode):
+    # 另一个缓存目录中写入的条目复制 (如 rsync) 到本服务的缓存目录
+    monkeypatch.setattr(app_config, "mode", mode)
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+    source = CacheManager(str(cache_dir.parent / "source"))
+    source.save_response(RAW_URL, "GET", b"console.log(1)")
+    source.save_response(ENTRY_URL, "GET", b"[1]")
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            assert manager.index is None
+            assert await manager.aget_response(RAW_URL) is None
+        shutil.copytree(cache_dir.parent / "source", cache_dir, dirs_exist_ok=True)
+        async with open_cache(cache_dir) as manager:
+            assert (await manager.aget_response(RAW_URL))["content"] == b"console.log(1)"
+            assert (await manager.aget_response(ENTRY_URL))["content"] == b"[1]"
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """共享同一个 SQLite 文件的两个索引: 主 worker 载入并标记就绪，另一个 worker 随后载入"""
+    path = tmp_path / "index.sqlite"
+    leader, follower = CacheIndex(path), CacheIndex(path)
+    assert not leader.open()
+    leader.ready = True
+    leader.mark_ready("leader")
+    assert follower.attach("leader")
+    follower.ready = True
+    follower.owner = False
+    yield leader, follower
+    follower.close()
+    leader.close()
+
+
+def test_insert_propagates_to_other_worker(workers):
+    leader, follower = workers
+    leader.record("a", "a.test", 100, 200, {"content-type": "text/css"}, 1.0)
+    leader.record("b", "b.test", 50, 200)
+    assert follower.sync() == []
+    leader.flush()
+
+    assert sorted(follower.sync()) == ["a", "b"]
+    assert "a" in follower and "b" in follower
+    assert follower.usage() == (150, 2)
+    assert follower.usage("a.test") == (100, 1)
+    assert follower.get("a").fetched_at == 1.0
+    assert follower.get_headers("a") == {"content-type": "text/css"}
+    # 已同步的变更不再重复返回
+    assert follower.sync() == []
+
+
+def test_delete_propagates_through_tombstone(workers):
+    leader, follower = workers
+    leader.record("a", "a.test", 100)
+    leader.record("b", "a.test", 50)
+    leader.flush()
+    follower.sync()
+
+    leader.remove("a")
+    leader.flush()
+    assert follower.sync() == ["a"]
+    assert "a" not in follower
+    assert follower.usage() == (50, 1)
+    assert follower.usage("a.test") == (50, 1)
+
+    # 另一个 worker 删除的条目也同步回来
+    follower.remove("b")
+    follower.flush()
+    assert leader.sync() == ["b"]
+    assert len(leader) == 0 and leader.domains() == []
+
+
+def test_rewrite_after_delete_survives_both_orders(workers):
+    leader, follower = workers
+    leader.record("a", "a.test", 100)
+    leader.flush()
+    follower.sync()
+
+    # 删除已落盘后另一个 worker 重新写入: 新记录覆盖墓碑
+    leader.remove("a")
+    leader.flush()
+    follower.sync()
+    follower.record("a", "a.test", 120)
+    follower.flush()
+    assert leader.sync() == ["a"]
+    assert leader.usage() == (120, 1)
+
+    # 另一个 worker 的删除尚未同步时本地重新写入: 本地尚未写回的记录优先
+    follower.remove("a")
+    follower.flush()
+    leader.record("a", "a.test", 130)
+    assert leader.sync() == []
+    assert leader.usage() == (130, 1)
+    leader.flush()
+    assert follower.sync() == ["a"]
+    assert follower.usage() == (130, 1)
+
+
+def test_refetched_entry_is_reported_changed(workers):
+    leader, follower = workers
+    leader.record("a", "a.test", 100, 200, None, 1.0)
+    leader.flush()
+    follower.sync()
+
+    # 只有访问记录变化时内存缓存中的副本仍然有效
+    leader.touch("a")
+    leader.flush()
+    assert follower.sync() == []
+    assert follower.get("a").hits == 1
+
+    leader.record("a", "a.test", 80, 200, None, 2.0)
+    leader.flush()
+    assert follower.sync() == ["a"]
+    assert follower.usage("a.test") == (80, 1)
+
+
+def test_late_worker_loads_state_without_deleted_keys(workers, tmp_path):
+    leader, follower = workers
+    leader.record("a", "a.test", 100)
+    leader.record("b", "a.test", 50)
+    leader.flush()
+    leader.remove("a")
+    leader.flush()
+
+    late = CacheIndex(tmp_path / "index.sqlite")
+    assert late.attach("leader")
+    assert late.keys() == ["b"]
+    late.close()
@@ -0,0 +1,123 @@
+"""
+客户端条件请求: 未命中和命中返回相同的缓存层 ETag，客户端据此得到 304
+"""
+
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from config import app_config
+from core import HybridHandler, ProxyHandler
+from tests.helpers import make_request, open_cache, read_response
+
+TARGET = "http://upstream.test"
+
+
+def content_etag(content: bytes) -> str:
+    """缓存层根据内容计算的 ETag"""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def run_requests(cache_dir, handler_class, upstream, requests):
+    """
+    依次发送请求，每个请求可以携带上一个响应的 ETag
+
+    Args:
+        requests: [(路径, 是否携带上一个响应的 ETag)]
+
+    Returns:
+        各请求的 (状态码, 响应头, 响应体)
+    """
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = handler_class(TARGET, manager)
+            client = handler.proxy_handler if isinstance(handler, HybridHandler) else handler
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+            results = []
+            for path, conditional in requests:
+                headers = []
+                if conditional:
+                    headers.append(("if-none-match", results[-1][1]["etag"]))
+                response = await handler.handle_request(
+                    make_request("GET", path, headers=headers), path
+                )
+                results.append(await read_response(response))
+                await manager.flush()
+            await handler.close()
+        return results
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("handler_class", [ProxyHandler, HybridHandler])
+def test_miss_and_hit_share_content_etag(cache_dir, handler_class):
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("if-none-match") == '"js1"':
+            return httpx.Response(304, headers={"etag": '"js1"'})
+        return httpx.Response(
+            200,
+            content=b"console.log(1)",
+            headers={"etag": '"js1"', "cache-control": "max-age=60"},
+        )
+
+    miss, hit, revalidated = run_requests(
+        cache_dir, handler_class, upstream, [("app.js", False), ("app.js", False), ("app.js", True)]
+    )
+    assert miss[1]["etag"] == hit[1]["etag"] == content_etag(b"console.log(1)")
+    assert revalidated[0] == 304
+    assert revalidated[2] == b""
+
+
+def test_miss_etag_matches_when_revalidating_after_miss(cache_dir):
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"page", headers={"etag": '"p1"'})
+
+    miss, revalidated = run_requests(
+        cache_dir, HybridHandler, upstream, [("page", False), ("page", True)]
+    )
+    assert miss[1]["etag"] == content_etag(b"page")
+    assert revalidated[0] == 304
+
+
+def test_upstream_not_modified_keeps_content_etag(cache_dir, monkeypatch):
+    # 每次都回源确认，上游返回 304 后用缓存的响应体响应
+    monkeypatch.setattr(app_config, "cache_default_ttl", 0)
+    monkeypatch.setattr(app_config, "cache_stale_while_revalidate", 0)
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"p1"':
+            return httpx.Response(304, headers={"etag": '"p1"'})
+        return httpx.Response(200, content=b"page", headers={"etag": '"p1"'})
+
+    first, refreshed = run_requests(
+        cache_dir, HybridHandler, upstream, [("page", False), ("page", False)]
+    )
+    assert calls == [None, '"p1"']
+    assert refreshed[0] == 200
+    assert refreshed[1]["etag"] == first[1]["etag"] == content_etag(b"page")
+
+
+def test_streamed_miss_does_not_forward_upstream_etag(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "stream_threshold", 64 * 1024)
+    payload = os.urandom(128 * 1024)
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=payload,
+            headers={"etag": '"big1"', "last-modified": "Tue, 14 Nov 2023 22:13:20 GMT"},
+        )
+
+    miss, hit = run_requests(
+        cache_dir, HybridHandler, upstream, [("big.bin", False), ("big.bin", False)]
+    )
+    assert miss[2] == hit[2] == payload
+    assert "etag" not in miss[1]
+    assert miss[1]["last-modified"] == hit[1]["last-modified"]
+    assert hit[1]["etag"] != '"big1"'
@@ -0,0 +1,108 @@
+"""
+编码检测: 声明的 charset、非文本类型跳过、前缀采样检测和按域名缓存结果
+"""
+
+import chardet
+import pytest
+
+from utils import EncodingUtil, constants
+
+GBK_TEXT = "缓存代理服务器，支持离线访问和镜像站点。" * 20
+SJIS_TEXT = "キャッシュプロキシサーバーはオフラインで動作します。" * 20
+
+
+@pytest.fixture(autouse=True)
+def clear_detected_encodings(monkeypatch):
+    """每个测试使用空的检测结果缓存"""
+    monkeypatch.setattr(EncodingUtil, "_detected_encodings", {})
+
+
+@pytest.fixture
+def chardet_calls(monkeypatch):
+    """记录 chardet 的调用及样本长度"""
+    calls = []
+    detect = chardet.detect
+
+    def counting_detect(sample):
+        calls.append(len(sample))
+        return detect(sample)
+
+    monkeypatch.setattr("utils.encoding_util.chardet.detect", counting_detect)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "content_type, expected",
+    [
+        (None, ("", None)),
+        ("text/html", ("text/html", None)),
+        ("Text/HTML; Charset=GBK", ("text/html", "GBK")),
+        ('application/json; q=1; charset="shift_jis"', ("application/json", "shift_jis")),
+    ],
+)
+def test_parse_content_type(content_type, expected):
+    assert EncodingUtil.parse_content_type(content_type) == expected
+
+
+def test_declared_charset_skips_detection(chardet_calls):
+    body = GBK_TEXT.encode("gbk")
+    assert EncodingUtil.detect_and_decode(body, "text/html; charset=gbk") == GBK_TEXT
+    assert EncodingUtil.detect_encoding(body, "text/plain; charset=GB2312") == "gb2312"
+    assert chardet_calls == []
+
+
+def test_unknown_declared_charset_falls_back_to_detection(chardet_calls):
+    body = GBK_TEXT.encode("gbk")
+    assert EncodingUtil.detect_and_decode(body, "text/plain; charset=x-bogus") == GBK_TEXT
+    assert len(chardet_calls) == 1
+
+
+def test_binary_mime_is_not_decoded(chardet_calls):
+    body = bytes(range(256)) * 100
+    assert EncodingUtil.detect_encoding(body, "image/png") is None
+    assert EncodingUtil.detect_and_decode(body, "application/octet-stream") is None
+    assert chardet_calls == []
+
+
+def test_utf8_skips_detection(chardet_calls):
+    text = "héllo wörld ✓"
+    assert EncodingUtil.detect_and_decode(text.encode(), "application/json") == text
+    assert chardet_calls == []
+
+
+def test_detection_uses_bounded_sample(chardet_calls):
+    body = SJIS_TEXT.encode("shift_jis") * 200
+    assert len(body) > constants.ENCODING_DETECT_SAMPLE_SIZE
+
+    assert EncodingUtil.detect_and_decode(body, "text/plain") == SJIS_TEXT * 200
+    assert chardet_calls == [constants.ENCODING_DETECT_SAMPLE_SIZE]
+
+
+def test_detected_encoding_is_cached_per_domain_and_mime(chardet_calls):
+    body = GBK_TEXT.encode("gbk")
+    for _ in range(3):
+        assert EncodingUtil.detect_and_decode(body, "text/plain", "a.test") == GBK_TEXT
+    assert len(chardet_calls) == 1
+
+    EncodingUtil.detect_and_decode(body, "text/plain", "b.test")
+    EncodingUtil.detect_and_decode(body, "text/html", "a.test")
+    assert len(chardet_calls) == 3
+
+
+def test_stale_cached_encoding_is_redetected(chardet_calls):
+    EncodingUtil.detect_and_decode(GBK_TEXT.encode("gbk"), "text/plain", "a.test")
+    cached = EncodingUtil._detected_encodings[("a.test", "text/plain")]
+
+    # 同一域名和类型下出现了缓存的编码无法解码的内容
+    body = "café déjà été naïve façade à côté. ".encode("cp1252") * 20
+    with pytest.raises(UnicodeDecodeError):
+        body.decode(cached)
+    EncodingUtil.detect_and_decode(body, "text/plain", "a.test")
+    assert len(chardet_calls) == 2
+    assert EncodingUtil._detected_encodings[("a.test", "text/plain")] != cached
+
+
+def test_undecodable_text_is_replaced():
+    assert EncodingUtil.detect_and_decode(b"") == ""
+    decoded = EncodingUtil.detect_and_decode(b"\xff\xfe\xfd", "text/plain; charset=utf-8")
+    assert decoded == "���"
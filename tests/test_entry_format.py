@@ -0,0 +1,105 @@
+"""
+条目格式: GET 带参数和 POST 请求的 .entry 文件 (启用去重时响应体单独保存在 .entry.body)
+原样往返响应体和响应头，升级前写入的旧版 JSON 条目仍然可以读取
+"""
+
+import json
+import os
+
+import pytest
+
+from config import app_config
+from core import CacheManager
+from utils import CacheEntryUtil, constants
+
+TARGET = "http://example.com"
+HEADERS = {"content-type": "application/octet-stream", "x-origin": "测试"}
+# 包含非 UTF-8 字节，旧版格式会把它们解码为文本而损坏
+PAYLOAD = bytes(range(256)) * 16
+
+REQUESTS = [
+    pytest.param(f"{TARGET}/api/list?page=2", "GET", None, id="get-query"),
+    pytest.param(f"{TARGET}/api/search", "POST", b'{"q": "x"}', id="post"),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["dedup", "inline-body"])
+def dedup(request, monkeypatch):
+    """启用或关闭去重 (决定响应体是否单独保存)"""
+    monkeypatch.setattr(app_config, "cache_dedup", request.param)
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+    return request.param
+
+
+def read_entry_header(cache_path) -> dict:
+    """读取条目文件的头部"""
+    with open(cache_path, "rb") as file:
+        parsed = CacheEntryUtil.read_header(file)
+    assert parsed is not None
+    return parsed[0]
+
+
+@pytest.mark.parametrize("url, method, body", REQUESTS)
+@pytest.mark.parametrize("threshold", [1 << 30, 1024], ids=["inline", "file"])
+def test_entry_round_trip(cache_dir, dedup, monkeypatch, url, method, body, threshold):
+    monkeypatch.setattr(app_config, "file_response_threshold", threshold)
+    manager = CacheManager(str(cache_dir))
+    manager.save_response(url, method, PAYLOAD, HEADERS, body=body)
+
+    cache_path = manager._get_cache_path(url, method, body)
+    assert cache_path.suffix == constants.CACHE_FILE_EXTENSION_ENTRY
+    body_path = cache_path.with_name(cache_path.name + constants.CACHE_FILE_EXTENSION_BODY)
+    assert body_path.exists() is dedup
+    header = read_entry_header(cache_path)
+    assert header["status_code"] == 200
+    assert header["headers"]["x-origin"] == "测试"
+    if dedup:
+        assert body_path.read_bytes() == PAYLOAD
+        assert header["body_size"] == len(PAYLOAD)
+    else:
+        assert cache_path.read_bytes().endswith(PAYLOAD)
+
+    # 新的实例 (例如重启后) 读取同一个条目
+    for reader in (manager, CacheManager(str(cache_dir))):
+        cached = reader.get_response(url, method, body)
+        assert cached["status_code"] == 200
+        assert cached["headers"]["x-origin"] == "测试"
+        assert cached["etag"] == header["etag"]
+        if "file_path" in cached:
+            assert threshold < len(PAYLOAD)
+            with open(cached["file_path"], "rb") as file:
+                file.seek(cached.get("offset", 0))
+                assert file.read(cached["length"]) == PAYLOAD
+        else:
+            assert cached["content"] == PAYLOAD
+
+
+def write_legacy_entry(manager: CacheManager, url: str, method: str, body, content: str):
+    """按升级前的布局 (未分层) 和格式 (响应体解码为文本) 写入旧版 JSON 条目"""
+    cache_path = manager._get_cache_path(url, method, body)
+    legacy_path = manager._legacy_path(manager._unsharded_path(cache_path) or cache_path)
+    legacy_path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"status_code": 201, "headers": {"content-type": "text/plain"}, "content": content}
+    legacy_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.utime(legacy_path, (1_700_000_000, 1_700_000_000))
+    return legacy_path
+
+
+@pytest.mark.parametrize("url, method, body", REQUESTS)
+def test_legacy_json_entry_is_still_served(cache_dir, dedup, url, method, body):
+    manager = CacheManager(str(cache_dir))
+    legacy_path = write_legacy_entry(manager, url, method, body, "旧版内容")
+
+    assert manager.has_cache(url, method, body)
+    cached = manager.get_response(url, method, body)
+    assert cached["content"] == "旧版内容".encode()
+    assert cached["status_code"] == 201
+    assert cached["headers"] == {"content-type": "text/plain"}
+    # 旧版条目没有保存 ETag 和获取时间，分别由文件状态和修改时间得出
+    assert cached["etag"].startswith('W/"')
+    assert cached["fetched_at"] == 1_700_000_000
+
+    # 重新缓存后写入新格式并删除旧版文件
+    manager.save_response(url, method, PAYLOAD, HEADERS, body=body)
+    assert not legacy_path.exists()
+    assert manager.get_response(url, method, body)["content"] == PAYLOAD
@@ -0,0 +1,228 @@
+"""
+缓存文件响应: 零拷贝 / 分块发送，以及查找后文件被替换时不发送错误的内容
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+import pytest
+
+from config import app_config
+from core import LocalHandler
+from core.file_response import ZEROCOPY_EXTENSION, CachedFileResponse
+from tests.helpers import make_request, open_cache, read_response
+
+TARGET = "http://example.com"
+ZEROCOPY = {ZEROCOPY_EXTENSION: {}}
+
+
+@pytest.fixture(autouse=True)
+def small_file_threshold(monkeypatch):
+    """小文件也走文件响应，关闭内存缓存以便每次从磁盘查找"""
+    monkeypatch.setattr(app_config, "file_response_threshold", 1024)
+    monkeypatch.setattr(app_config, "memory_cache_size", 0)
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+@pytest.mark.parametrize("extensions", [None, ZEROCOPY], ids=["chunks", "zerocopy"])
+@pytest.mark.parametrize("query", [b"", b"v=1"], ids=["raw", "entry"])
+def test_serves_file_entries(cache_dir, extensions, query):
+    payload = os.urandom(200 * 1024)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = f"{TARGET}/static/app.bin" + (f"?{query.decode()}" if query else "")
+            manager.save_response(
+                url, "GET", payload, {"content-type": "application/octet-stream"}
+            )
+            handler = LocalHandler(manager, TARGET)
+            response = await handler.handle_request(
+                make_request("GET", "static/app.bin", query), "static/app.bin"
+            )
+            assert isinstance(response, CachedFileResponse)
+            return await read_response(response, extensions)
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert body == payload
+    assert headers["content-length"] == str(len(payload))
+
+
+@pytest.mark.parametrize("extensions", [None, ZEROCOPY], ids=["chunks", "zerocopy"])
+@pytest.mark.parametrize("query", [b"", b"v=1"], ids=["raw", "entry"])
+def test_replaced_file_falls_back_to_new_version(cache_dir, extensions, query):
+    old = b"a" * 100 * 1024
+    new = b"b" * 150 * 1024
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = f"{TARGET}/static/app.bin" + (f"?{query.decode()}" if query else "")
+            manager.save_response(url, "GET", old)
+            handler = LocalHandler(manager, TARGET)
+            request = make_request("GET", "static/app.bin", query)
+            response = await handler.handle_request(request, "static/app.bin")
+            # 查找完成后、发送响应头前缓存被新版本替换
+            manager.save_response(url, "GET", new)
+            return await read_response(response, extensions)
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert body == new
+    assert headers["content-length"] == str(len(new))
+    assert headers["etag"] == f'"{hashlib.blake2b(new, digest_size=16).hexdigest()}"'
+
+
+def test_refreshed_entry_does_not_shift_offset(cache_dir, monkeypatch):
+    # 不去重时响应体内联在条目文件的头部之后
+    monkeypatch.setattr(app_config, "cache_dedup", False)
+    payload = os.urandom(100 * 1024)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = f"{TARGET}/api/data?id=1"
+            manager.save_response(url, "GET", payload, {"x-version": "1"})
+            handler = LocalHandler(manager, TARGET)
+            response = await handler.handle_request(
+                make_request("GET", "api/data", b"id=1"), "api/data"
+            )
+            # 304 刷新重写条目头部，响应体在文件中的偏移随之改变
+            manager.refresh_response(url, "GET", {"x-version": "2" * 500})
+            return await read_response(response)
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert body == payload
+    assert headers["x-version"] == "2" * 500
+
+
+def test_deleted_file_without_fallback_returns_503(cache_dir):
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = f"{TARGET}/static/app.bin"
+            manager.save_response(url, "GET", b"x" * 4096)
+            cached = manager.get_response(url)
+            response = LocalHandler(manager, TARGET).build_cached_response(cached, "static/app.bin")
+            manager.delete_entry(manager.get_cache_key(url, "GET"))
+            return await read_response(response)
+
+    status, headers, _ = asyncio.run(scenario())
+    assert status == 503
+    assert headers["retry-after"] == "1"
+
+
+@pytest.mark.parametrize("extensions", [None, ZEROCOPY], ids=["chunks", "zerocopy"])
+@pytest.mark.parametrize(
+    "query, dedup",
+    [(b"", True), (b"v=1", True), (b"v=1", False)],
+    ids=["raw", "entry", "inline"],
+)
+def test_concurrent_writes_never_serve_torn_body(cache_dir, monkeypatch, extensions, query, dedup):
+    monkeypatch.setattr(app_config, "cache_dedup", dedup)
+    # 各版本大小不同: 小于文件响应阈值的读入内存，其余走文件响应
+    versions = {v: bytes([v]) * size for v, size in ((1, 512), (2, 64 * 1024), (3, 200 * 1024))}
+    url = f"{TARGET}/static/app.bin" + (f"?{query.decode()}" if query else "")
+
+    def write(stop: threading.Event, manager, refresh: bool) -> None:
+        # 交替保存不同版本，或用不同长度的响应头刷新 (移动内联响应体的偏移)
+        n = 0
+        while not stop.is_set():
+            n += 1
+            if refresh:
+                manager.refresh_response(url, "GET", {"x-pad": "p" * (n % 7 * 100)})
+            else:
+                manager.save_response(url, "GET", versions[n % 3 + 1])
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            manager.save_response(url, "GET", versions[1])
+            handler = LocalHandler(manager, TARGET)
+            stop = threading.Event()
+            writers = [
+                threading.Thread(target=write, args=(stop, manager, refresh))
+                for refresh in (False, False, True)
+            ]
+            for thread in writers:
+                thread.start()
+            results = []
+            try:
+                deadline = time.monotonic() + 1.0
+                while time.monotonic() < deadline:
+                    response = await handler.handle_request(
+                        make_request("GET", "static/app.bin", query), "static/app.bin"
+                    )
+                    results.append(await read_response(response, extensions))
+                    await asyncio.sleep(0)
+            finally:
+                stop.set()
+                for thread in writers:
+                    thread.join()
+            return results
+
+    results = asyncio.run(scenario())
+    served = [(headers, body) for status, headers, body in results if status == 200]
+    assert all(status in (200, 503) for status, _, _ in results)
+    assert len(served) > len(results) // 2
+    for headers, body in served:
+        assert body in versions.values()
+        assert headers["content-length"] == str(len(body))
+        assert headers["etag"] == f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def serve_from_two_workers(cache_dir, query: bytes, payloads):
+    """
+    两个缓存管理器 (模拟两个 worker) 共享缓存目录: 第一个先读取一次 (载入内存缓存)，
+    第二个替换内容后第一个再次读取
+
+    Returns:
+        (第一个管理器的内存缓存是否启用, 两次读取的 (状态码, 响应体))
+    """
+    url = f"{TARGET}/static/app.bin" + (f"?{query.decode()}" if query else "")
+
+    async def fetch(handler):
+        response = await handler.handle_request(
+            make_request("GET", "static/app.bin", query), "static/app.bin"
+        )
+        status, _, body = await read_response(response)
+        return status, body
+
+    async def scenario():
+        async with open_cache(cache_dir) as first, open_cache(cache_dir) as second:
+            handler = LocalHandler(first, TARGET)
+            first.save_response(url, "GET", payloads[0])
+            before = await fetch(handler)
+            second.save_response(url, "GET", payloads[1])
+            after = await fetch(handler)
+            return first.memory_cache.enabled, [before, after]
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("query", [b"", b"v=1"], ids=["raw", "entry"])
+@pytest.mark.parametrize("size", [100, 100 * 1024], ids=["inline", "file"])
+def test_multiple_workers_without_index_do_not_serve_stale_memory(
+    cache_dir, monkeypatch, query, size
+):
+    monkeypatch.setattr(app_config, "workers", 2)
+    monkeypatch.setattr(app_config, "memory_cache_size", 64 * 1024 * 1024)
+    payloads = [b"a" * size, b"b" * size]
+
+    memory_enabled, results = serve_from_two_workers(cache_dir, query, payloads)
+    # 未启用索引时无法得知其他 worker 的替换，不使用内存缓存
+    assert not memory_enabled
+    assert results == [(200, payloads[0]), (200, payloads[1])]
+
+
+@pytest.mark.parametrize("query", [b"", b"v=1"], ids=["raw", "entry"])
+def test_file_replaced_by_other_worker_before_sync_is_served(cache_dir, monkeypatch, query):
+    monkeypatch.setattr(app_config, "workers", 2)
+    monkeypatch.setattr(app_config, "cache_index", True)
+    monkeypatch.setattr(app_config, "memory_cache_size", 64 * 1024 * 1024)
+    payloads = [b"a" * 100 * 1024, b"b" * 150 * 1024]
+
+    memory_enabled, results = serve_from_two_workers(cache_dir, query, payloads)
+    # 索引同步前内存缓存中仍是指向旧文件的条目: 回退时丢弃后重新读取磁盘，而不是返回 503
+    assert memory_enabled
+    assert results == [(200, payloads[0]), (200, payloads[1])]
@@ -0,0 +1,267 @@
+"""
+响应新鲜度: Cache-Control / Expires / Age 解析，要求确认的响应不使用过期内容，以及上游 304 后更新缓存条目
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from config import app_config
+from core import CacheManager, HybridHandler, ProxyHandler
+from utils import HttpUtil
+from tests.helpers import make_request, open_cache, read_response
+
+TARGET = "http://upstream.test"
+NOW = 1_700_000_000.0
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, (None, None, None)),
+        ({"cache-control": "max-age=60, stale-while-revalidate=30"}, (60, 30, None)),
+        ({"cache-control": "max-age=60, s-maxage=120, stale-if-error=300"}, (120, None, 300)),
+        ({"cache-control": "max-age=60", "age": "50"}, (10, None, None)),
+        ({"cache-control": "max-age=60", "age": "90"}, (0, None, None)),
+        ({"cache-control": "max-age=60", "age": "bogus"}, (60, None, None)),
+        (
+            {
+                "expires": "Tue, 14 Nov 2023 22:15:20 GMT",
+                "date": "Tue, 14 Nov 2023 22:13:20 GMT",
+                "age": "20",
+            },
+            (100, None, None),
+        ),
+        ({"cache-control": "no-cache, stale-while-revalidate=30"}, (0, 0, 0)),
+        ({"cache-control": "no-store"}, (0, 0, 0)),
+        ({"cache-control": "max-age=60, must-revalidate, stale-if-error=300"}, (60, 0, 0)),
+        ({"cache-control": "s-maxage=60, proxy-revalidate"}, (60, 0, 0)),
+    ],
+)
+def test_parse_freshness(headers, expected):
+    freshness = HttpUtil.parse_freshness(headers, NOW)
+    assert (
+        freshness["ttl"],
+        freshness["stale_while_revalidate"],
+        freshness["stale_if_error"],
+    ) == expected
+
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, {}),
+        ({"etag": '"v1"'}, {"if-none-match": '"v1"'}),
+        (
+            {"etag": 'W/"v1"', "last-modified": "Tue, 14 Nov 2023 22:13:20 GMT"},
+            {"if-none-match": 'W/"v1"', "if-modified-since": "Tue, 14 Nov 2023 22:13:20 GMT"},
+        ),
+    ],
+)
+def test_build_validators(headers, expected):
+    assert HttpUtil.build_validators(headers) == expected
+
+def run_hybrid(cache_dir, upstream, requests: int):
+    """依次发送相同的请求，返回 (各请求的结果, 半代理统计)"""
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = HybridHandler(TARGET, manager)
+            handler.proxy_handler.client = httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream)
+            )
+            results = []
+            for _ in range(requests):
+                response = await handler.handle_request(make_request("GET", "page"), "page")
+                results.append(await read_response(response))
+                await asyncio.sleep(0.01)
+            stats = handler.get_stats()
+            await handler.close()
+        return results, stats
+
+    return asyncio.run(scenario())
+
+
+def run_hybrid_with_breaker(cache_dir, upstream):
+    """缓存后熔断器打开时再次请求"""
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = HybridHandler(TARGET, manager)
+            handler.proxy_handler.client = httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream)
+            )
+            first = await read_response(
+                await handler.handle_request(make_request("GET", "page"), "page")
+            )
+            breaker = handler.proxy_handler.breaker
+            breaker.threshold = 1
+            breaker.record_failure()
+            second = await read_response(
+                await handler.handle_request(make_request("GET", "page"), "page")
+            )
+            await handler.close()
+        return [first, second]
+
+    return asyncio.run(scenario())
+
+
+def test_no_cache_revalidates_synchronously(cache_dir):
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("if-none-match"))
+        if len(calls) > 1:
+            return httpx.Response(304, headers={"etag": '"v1"', "cache-control": "no-cache"})
+        return httpx.Response(
+            200, content=b"page", headers={"etag": '"v1"', "cache-control": "no-cache"}
+        )
+
+    results, stats = run_hybrid(cache_dir, upstream, 3)
+    assert [(status, body) for status, _, body in results] == [(200, b"page")] * 3
+    # 每次命中都先同步发送条件请求，不在后台刷新
+    assert calls == [None, '"v1"', '"v1"']
+    assert stats["freshness"]["stale"] == 0
+    assert stats["freshness"]["revalidations"] == 0
+
+
+@pytest.mark.parametrize("error", ["connect", "breaker"])
+def test_no_cache_is_not_served_when_upstream_fails(cache_dir, error):
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) > 1:
+            raise httpx.ConnectError("upstream down")
+        return httpx.Response(200, content=b"page", headers={"cache-control": "no-cache"})
+
+    if error == "breaker":
+        results = run_hybrid_with_breaker(cache_dir, upstream)
+    else:
+        results, _ = run_hybrid(cache_dir, upstream, 2)
+    assert results[0][0] == 200
+    assert all(status >= 500 for status, _, _ in results[1:])
+
+
+def test_refresh_replaces_age_from_previous_response(cache_dir):
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) > 1:
+            return httpx.Response(304, headers={"cache-control": "max-age=60"})
+        # 上游缓存中已存在 60 秒，到达时已过期
+        return httpx.Response(
+            200,
+            content=b"page",
+            headers={
+                "etag": '"v1"',
+                "cache-control": "max-age=60, stale-while-revalidate=0",
+                "age": "60",
+            },
+        )
+
+    results, _ = run_hybrid(cache_dir, upstream, 4)
+    assert [body for _, _, body in results] == [b"page"] * 4
+    # 第二次请求同步确认后新鲜期重新计算，不再减去旧的 Age
+    assert len(calls) == 2
+    assert "age" not in results[-1][1]
+
+
+STORED_HEADERS = {
+    "content-type": "text/html",
+    "etag": '"v1"',
+    "cache-control": "max-age=60",
+    "age": "30",
+    "x-origin": "first",
+}
+NOT_MODIFIED_HEADERS = {"etag": '"v1"', "cache-control": "max-age=600", "x-served-by": "edge-2"}
+
+
+def cached_body(cached) -> bytes:
+    """缓存条目的响应体 (内存中或从缓存文件读取)"""
+    if "content" in cached:
+        return cached["content"]
+    with open(cached["file_path"], "rb") as file:
+        file.seek(cached.get("offset", 0))
+        return file.read(cached["length"])
+
+
+@pytest.fixture
+def file_threshold(monkeypatch):
+    """4KB 以上的响应体以文件形式返回"""
+    monkeypatch.setattr(app_config, "file_response_threshold", 4096)
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+@pytest.mark.parametrize("query", ["", "?lang=en"], ids=["raw", "entry"])
+@pytest.mark.parametrize("size", [100, 64 * 1024], ids=["inline", "file"])
+def test_refresh_response_keeps_body_and_resets_freshness(cache_dir, file_threshold, query, size):
+    url = f"{TARGET}/page.html{query}"
+    content = os.urandom(size)
+    manager = CacheManager(str(cache_dir))
+    manager.save_response(url, "GET", content, STORED_HEADERS, fetched_at=NOW)
+    before = manager.get_response(url)
+
+    # 调用方合并 304 响应头并去掉旧响应的 Age
+    merged = {**STORED_HEADERS, **NOT_MODIFIED_HEADERS}
+    del merged["age"]
+    refreshed = manager.refresh_response(url, "GET", merged, fetched_at=NOW + 3600)
+    # 已进入内存热缓存的旧条目失效，再次读取得到更新后的条目
+    after = manager.get_response(url)
+
+    for cached in (refreshed, after):
+        assert cached_body(cached) == content
+        assert cached["headers"]["x-origin"] == "first"
+        assert cached["headers"]["x-served-by"] == "edge-2"
+        assert cached["headers"]["cache-control"] == "max-age=600"
+        assert cached["fetched_at"] == NOW + 3600
+        assert cached["ttl"] == 600
+        assert cached["etag"] == before["etag"]
+    assert before["fetched_at"] == NOW and before["ttl"] == 30
+
+
+def test_refresh_response_of_missing_entry_returns_none(cache_dir, file_threshold):
+    manager = CacheManager(str(cache_dir))
+    assert manager.refresh_response(f"{TARGET}/gone.html", "GET", STORED_HEADERS) is None
+
+
+@pytest.mark.parametrize("size", [100, 64 * 1024], ids=["inline", "file"])
+def test_upstream_not_modified_refreshes_cached_entry(cache_dir, file_threshold, size):
+    content = os.urandom(size)
+    sent_validators = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        sent_validators.append(request.headers.get("if-none-match"))
+        return httpx.Response(304, headers=NOT_MODIFIED_HEADERS)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = f"{TARGET}/page.html"
+            manager.save_response(url, "GET", content, STORED_HEADERS, fetched_at=NOW)
+            cached = await manager.aget_response(url)
+            handler = ProxyHandler(TARGET, manager)
+            handler.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+            result = await handler.fetch(make_request("GET", "page.html"), "page.html", cached=cached)
+            stored = await manager.aget_response(url)
+            stats = handler.get_stats()["upstream"]
+            await handler.close()
+        return cached, result, stored, stats
+
+    cached, result, stored, stats = asyncio.run(scenario())
+    assert sent_validators == ['"v1"']
+    assert stats["not_modified"] == 1
+    for entry in (result, stored):
+        assert cached_body(entry) == content
+        # 304 响应头覆盖同名的缓存响应头，其余保留；旧响应的 Age 不再适用
+        assert entry["headers"]["content-type"] == "text/html"
+        assert entry["headers"]["x-origin"] == "first"
+        assert entry["headers"]["x-served-by"] == "edge-2"
+        assert entry["headers"]["cache-control"] == "max-age=600"
+        assert "age" not in entry["headers"]
+    assert stored["fetched_at"] > NOW
+    assert stored["ttl"] == 600
+    assert stored["etag"] == cached["etag"]
@@ -0,0 +1,148 @@
+"""
+半代理模式: 流式写入缓存的大响应被并发未命中请求共享，未声明长度的响应超过阈值后改为流式转发
+"""
+
+import asyncio
+import os
+
+import httpx
+
+from config import app_config
+from core import HybridHandler
+from tests.helpers import make_request, open_cache, read_response
+from utils import constants
+
+TARGET = "http://upstream.test"
+
+
+def make_handler(manager, handler_func) -> HybridHandler:
+    """创建上游替换为 MockTransport 的半代理处理器"""
+    handler = HybridHandler(TARGET, manager)
+    handler.proxy_handler.client = httpx.AsyncClient(transport=httpx.MockTransport(handler_func))
+    return handler
+
+
+def test_concurrent_streamed_misses_fetch_once(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "stream_threshold", 64 * 1024)
+    payload = os.urandom(512 * 1024)
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(
+            200, content=payload, headers={"content-type": "application/octet-stream"}
+        )
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = make_handler(manager, upstream)
+
+            async def get():
+                response = await handler.handle_request(make_request("GET", "big.bin"), "big.bin")
+                return await read_response(response)
+
+            results = await asyncio.gather(*(get() for _ in range(20)))
+            stats = handler.get_stats()["single_flight"]
+            await handler.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert calls == ["/big.bin"]
+    assert all(status == 200 and body == payload for status, _, body in results)
+    assert stats["flights"] == 1
+    assert stats["stream_waiters"] == 19
+
+
+def test_interrupted_stream_waiters_fetch_themselves(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "stream_threshold", 64 * 1024)
+    payload = os.urandom(256 * 1024)
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=payload)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = make_handler(manager, upstream)
+            leader = asyncio.create_task(
+                handler.handle_request(make_request("GET", "big.bin"), "big.bin")
+            )
+            waiter = asyncio.create_task(
+                handler.handle_request(make_request("GET", "big.bin"), "big.bin")
+            )
+            streaming = await leader
+            # 消费流的客户端在读完前断开，缓存写入被放弃
+            iterator = streaming.body_iterator.__aiter__()
+            await iterator.__anext__()
+            await iterator.aclose()
+            result = await read_response(await waiter)
+            await handler.close()
+        return result
+
+    status, _, body = asyncio.run(scenario())
+    assert status == 200 and body == payload
+    assert len(calls) == 2
+
+
+def chunked_upstream(payload: bytes, produced: list):
+    """返回分块传输 (不带 Content-Length) 的上游，并记录已经产生的字节数"""
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        async def chunks():
+            for offset in range(0, len(payload), 16 * 1024):
+                chunk = payload[offset : offset + 16 * 1024]
+                produced.append(len(chunk))
+                yield chunk
+
+        return httpx.Response(200, content=chunks(), headers={"content-type": "video/mp4"})
+
+    return upstream
+
+
+def test_chunked_response_switches_to_streaming_at_threshold(cache_dir, monkeypatch):
+    threshold = 64 * 1024
+    monkeypatch.setattr(app_config, "stream_threshold", threshold)
+    payload = os.urandom(1024 * 1024)
+    produced = []
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = make_handler(manager, chunked_upstream(payload, produced))
+            response = await handler.handle_request(make_request("GET", "live.mp4"), "live.mp4")
+            # 开始向客户端发送前最多缓冲阈值加一个数据块
+            buffered = sum(produced)
+            streamed = await read_response(response)
+            cached = await read_response(
+                await handler.handle_request(make_request("GET", "live.mp4"), "live.mp4")
+            )
+            await handler.close()
+        return buffered, streamed, cached
+
+    buffered, (status, headers, body), cached = asyncio.run(scenario())
+    assert buffered <= threshold + constants.STREAM_CHUNK_SIZE
+    assert status == 200 and body == payload
+    assert "content-length" not in headers
+    # 已缓冲的前缀和之后的数据一起写入缓存
+    assert sum(produced) == len(payload)
+    assert cached[0] == 200 and cached[2] == payload
+
+
+def test_small_chunked_response_is_buffered(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "stream_threshold", 64 * 1024)
+    payload = os.urandom(40 * 1024)
+    produced = []
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = make_handler(manager, chunked_upstream(payload, produced))
+            result = await handler.proxy_handler.fetch(make_request("GET", "clip.mp4"), "clip.mp4")
+            await handler.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert "stream" not in result
+    assert result["content"] == payload
+    assert result["etag"]
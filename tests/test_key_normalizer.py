@@ -0,0 +1,199 @@
+"""
+缓存键规范化: 参数排序、带通配符的忽略列表、JSON / 表单请求体规范化和按路径的规则，
+保存和查找经过同一次规范化，语义相同的请求命中同一个缓存条目
+"""
+
+import json
+
+import pytest
+
+from config import app_config
+from core import CacheKeyNormalizer, CacheManager
+from core.key_normalizer import CacheKeyRule
+
+TARGET = "http://api.test"
+HEADERS = {"content-type": "application/json"}
+
+
+def normalize_query(normalizer: CacheKeyNormalizer, query: str, path: str = "search") -> str:
+    """规范化 api.test 下指定路径的查询参数"""
+    return normalizer.normalize("api.test", path, query, None)[0]
+
+
+def normalize_body(normalizer: CacheKeyNormalizer, body: bytes, path: str = "search") -> bytes:
+    """规范化 api.test 下指定路径的请求体"""
+    return normalizer.normalize("api.test", path, "", body)[1]
+
+
+def test_disabled_normalizer_keeps_keys():
+    normalizer = CacheKeyNormalizer()
+    assert not normalizer.enabled
+    assert normalizer.normalize("api.test", "search", "b=2&a=1", b'{"b": 1}') == (
+        "b=2&a=1",
+        b'{"b": 1}',
+        False,
+    )
+
+
+def test_sort_params_is_stable_and_keeps_unchanged_query():
+    normalizer = CacheKeyNormalizer(sort_params=True)
+    assert normalize_query(normalizer, "b=2&a=1&b=1") == "a=1&b=2&b=1"
+    # 已有序的查询保持原始字符串 (包括编码方式)，已有缓存的键不变
+    assert normalize_query(normalizer, "a=%20x&b=") == "a=%20x&b="
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("q=1&utm_source=x&utm_medium=y", "q=1"),
+        ("q=1&_=1700000000", "q=1"),
+        ("utm_campaign=z", ""),
+        # 只有前缀匹配的名称不算
+        ("q=1&my_utm_id=3", "q=1&my_utm_id=3"),
+    ],
+)
+def test_ignore_params_with_wildcards(query, expected):
+    normalizer = CacheKeyNormalizer(ignore_params=["_", "utm_*", " "])
+    assert normalize_query(normalizer, query) == expected
+
+
+def test_canonical_json_body():
+    normalizer = CacheKeyNormalizer(canonical_body=True, ignore_params=["ts"])
+    a = normalize_body(normalizer, b'{"b": [1, 2], "a": {"y": 1, "x": "\xe4\xb8\xad"}, "ts": 1}')
+    b = normalize_body(normalizer, b'\n{"a":{"x":"\xe4\xb8\xad","y":1},"b":[1,2],"ts":2}')
+    assert a == b == '{"a":{"x":"中","y":1},"b":[1,2]}'.encode()
+    # 嵌套对象的键只排序，不按忽略列表过滤
+    assert normalize_body(normalizer, b'{"a": {"ts": 1}}') == b'{"a":{"ts":1}}'
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        (b"b=2&a=1&utm_id=3", b"a=1&b=2"),
+        (b"  a=1&b=  ", b"a=1&b="),
+        # 不是 JSON 或表单的请求体原样保留
+        (b"{not json", b"{not json"),
+        (b"plain text body", b"plain text body"),
+        (b"\xff\xfe=\x01", b"\xff\xfe=\x01"),
+    ],
+)
+def test_canonical_form_and_other_bodies(body, expected):
+    normalizer = CacheKeyNormalizer(canonical_body=True, ignore_params=["utm_*"])
+    assert normalize_body(normalizer, body) == expected
+
+
+def write_rules(tmp_path, rules) -> str:
+    """写入规则文件，返回路径"""
+    rules_file = tmp_path / "key_rules.json"
+    rules_file.write_text(json.dumps(rules))
+    return str(rules_file)
+
+
+def test_rules_file_match_and_precedence(tmp_path):
+    rules = CacheKeyNormalizer.load_rules(
+        write_rules(
+            tmp_path,
+            [
+                {
+                    "match": "api.test/search*",
+                    "keep_params": ["q", "page*"],
+                    "ignore_params": ["page_token"],
+                },
+                {"match": "api.test/*", "sort_params": False, "canonical_body": False},
+            ],
+        )
+    )
+    normalizer = CacheKeyNormalizer(
+        sort_params=True, ignore_params=["utm_*"], canonical_body=True, rules=rules
+    )
+
+    # 第一条匹配的规则生效: 只保留 q 和 page*，但 ignore_params 优先于 keep_params，全局忽略列表同样生效
+    assert normalize_query(normalizer, "session=1&page=2&q=x&page_token=t&page_utm=5") == (
+        "page=2&page_utm=5&q=x"
+    )
+    assert normalize_query(normalizer, "utm_page=1&q=x") == "q=x"
+    # 第二条规则关闭了排序和请求体规范化，但全局忽略列表仍然生效
+    assert normalize_query(normalizer, "b=2&a=1&utm_x=1", path="items") == "b=2&a=1"
+    assert normalize_body(normalizer, b'{"b": 1, "a": 2}', path="items") == b'{"b": 1, "a": 2}'
+    # 没有匹配的规则时使用全局配置
+    assert normalizer.normalize("other.test", "search", "b=2&a=1", None)[0] == "a=1&b=2"
+
+
+@pytest.mark.parametrize(
+    "content",
+    ['{"match": "x"}', '[{"ignore_params": ["a"]}]', '[{"match": "x", "unknown": 1}]', "not json"],
+)
+def test_invalid_rules_file_raises_value_error(tmp_path, content):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(content)
+    with pytest.raises(ValueError, match="Invalid cache key rules file"):
+        CacheKeyNormalizer.load_rules(str(rules_file))
+
+
+def test_rule_keep_params_applies_to_json_top_level_keys():
+    rule = CacheKeyRule("api.test/graphql", keep_params=["query", "variables"])
+    normalizer = CacheKeyNormalizer(canonical_body=True, rules=[rule])
+    body = b'{"variables": {"id": 1}, "operationName": "Q", "query": "{ a }", "extensions": {}}'
+    assert normalize_body(normalizer, body, path="graphql") == (
+        b'{"query":"{ a }","variables":{"id":1}}'
+    )
+
+
+@pytest.fixture
+def normalizing_config(monkeypatch, tmp_path):
+    """开启排序、忽略列表和请求体规范化，search 路径只保留 q 参数"""
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+    monkeypatch.setattr(app_config, "cache_key_sort_params", True)
+    monkeypatch.setattr(app_config, "cache_key_ignore_params", "_,utm_*")
+    monkeypatch.setattr(app_config, "cache_key_canonical_body", True)
+    monkeypatch.setattr(
+        app_config,
+        "cache_key_rules",
+        write_rules(tmp_path, [{"match": "api.test/search", "keep_params": ["q"]}]),
+    )
+
+
+@pytest.mark.parametrize(
+    "saved, looked_up, missed",
+    [
+        ("/list?b=2&a=1", "/list?a=1&b=2&_=1700000000", "/list?a=1&b=3"),
+        ("/page.html", "/page.html?utm_source=mail", "/page.html?v=2"),
+        ("/search?q=x&session=1", "/search?session=2&q=x&utm_id=9", "/search?q=y"),
+    ],
+    ids=["sorted", "ignored", "rule"],
+)
+def test_query_normalization_applies_to_save_and_lookup(
+    cache_dir, normalizing_config, saved, looked_up, missed
+):
+    manager = CacheManager(str(cache_dir))
+    manager.save_response(TARGET + saved, "GET", b"cached", HEADERS)
+
+    assert manager.get_response(TARGET + saved)["content"] == b"cached"
+    assert manager.get_response(TARGET + looked_up)["content"] == b"cached"
+    assert manager.get_response(TARGET + missed) is None
+    stats = manager.get_stats()["keys"]
+    assert stats["rules"] == 1
+    assert stats["lookups"] == 3 and stats["normalized_hits"] >= 1
+
+
+@pytest.mark.parametrize(
+    "saved, looked_up, missed",
+    [
+        (
+            b'{"a": 1, "b": [1, 2]}',
+            b'{"b":[1,2],\n "a":1, "utm_source": "x"}',
+            b'{"a": 2, "b": [1, 2]}',
+        ),
+        (b"b=2&a=1", b"a=1&b=2&_=3", b"a=1&b=3"),
+    ],
+    ids=["json", "form"],
+)
+def test_body_normalization_applies_to_save_and_lookup(
+    cache_dir, normalizing_config, saved, looked_up, missed
+):
+    manager = CacheManager(str(cache_dir))
+    url = f"{TARGET}/graphql"
+    manager.save_response(url, "POST", b"result", HEADERS, body=saved)
+
+    assert manager.get_response(url, "POST", looked_up)["content"] == b"result"
+    assert manager.get_response(url, "POST", missed) is None
@@ -0,0 +1,116 @@
+"""
+内存热缓存: 按字节预算的 LRU 淘汰、单条目大小上限、失效代数和命中统计
+"""
+
+import pytest
+
+from config import app_config
+from core import CacheManager, MemoryCache
+
+OVERHEAD = MemoryCache.ENTRY_OVERHEAD
+
+
+def entry(size: int) -> dict:
+    """估算大小恰好为 size 字节的条目"""
+    return {"content": b"x" * (size - OVERHEAD), "headers": {}, "status_code": 200}
+
+
+def test_estimate_size_counts_content_and_headers():
+    assert MemoryCache.estimate_size({"content": b"abc", "headers": {"etag": '"1"'}}) == (
+        OVERHEAD + 3 + len("etag") + len('"1"')
+    )
+    # 文件条目没有 content，只计固定开销和响应头
+    assert MemoryCache.estimate_size({"file_path": "/cache/a.bin", "headers": {}}) == OVERHEAD
+
+
+def test_lru_eviction_by_byte_budget():
+    cache = MemoryCache(max_bytes=3000, max_entry_bytes=3000)
+    for key in ("a", "b", "c"):
+        assert cache.put(key, entry(1000))
+    # 访问 a 之后 b 成为最久未使用的条目
+    assert cache.get("a") is not None
+
+    assert cache.put("d", entry(1000))
+    assert "b" not in cache
+    assert all(key in cache for key in ("a", "c", "d"))
+
+    # 一个大条目可能需要淘汰多个旧条目
+    assert cache.put("e", entry(2500))
+    assert [key for key in "acde" if key in cache] == ["e"]
+    stats = cache.get_stats()
+    assert (stats["evictions"], stats["entries"], stats["size_bytes"]) == (4, 1, 2500)
+
+
+def test_replacing_key_updates_size():
+    cache = MemoryCache(max_bytes=3000, max_entry_bytes=3000)
+    cache.put("a", entry(1000))
+    cache.put("a", entry(1500))
+    assert cache.get_stats()["size_bytes"] == 1500
+    assert cache.get_stats()["entries"] == 1
+    cache.invalidate("a")
+    assert cache.get_stats()["size_bytes"] == 0
+
+
+@pytest.mark.parametrize("size", [1025, 4001])
+def test_rejects_entries_over_size_limits(size):
+    cache = MemoryCache(max_bytes=4000, max_entry_bytes=1024)
+    cache.put("small", entry(1024))
+    assert not cache.put("big", entry(size))
+    assert "big" not in cache
+    # 被拒绝的条目不会挤掉已有条目
+    assert "small" in cache
+    assert cache.get_stats()["evictions"] == 0
+
+
+def test_generation_discards_reads_started_before_invalidation():
+    cache = MemoryCache(max_bytes=4000, max_entry_bytes=4000)
+    generation = cache.generation
+    # 读取磁盘期间其他请求写入了新版本 (失效任意键都会递增代数)
+    cache.invalidate("other")
+    assert cache.generation == generation + 1
+    assert not cache.put("a", entry(500), generation=generation)
+    assert "a" not in cache
+
+    assert cache.put("a", entry(500), generation=cache.generation)
+    assert cache.put("b", entry(500))
+
+
+def test_hit_and_miss_counters():
+    cache = MemoryCache(max_bytes=4000, max_entry_bytes=4000)
+    cache.put("a", entry(500))
+    assert cache.get("a")["status_code"] == 200
+    assert cache.get("a") is not None
+    assert cache.get("missing") is None
+    # 成员检查不计入统计
+    assert "a" in cache and "missing" not in cache
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = MemoryCache(max_bytes=0, max_entry_bytes=1024)
+    assert not cache.enabled
+    assert not cache.put("a", entry(500))
+    assert cache.get("a") is None
+    assert cache.get_stats()["misses"] == 0
+
+
+def test_cache_manager_serves_hits_from_memory_and_respects_entry_limit(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+    monkeypatch.setattr(app_config, "memory_cache_max_entry_size", 4096)
+    manager = CacheManager(str(cache_dir))
+    manager.save_response("http://example.com/small.js", "GET", b"a" * 100, {})
+    manager.save_response("http://example.com/large.js", "GET", b"b" * 8192, {})
+
+    for _ in range(3):
+        assert manager.get_response("http://example.com/small.js")["content"] == b"a" * 100
+        assert manager.get_response("http://example.com/large.js")["content"] == b"b" * 8192
+
+    stats = manager.memory_cache.get_stats()
+    # 小条目首次从磁盘读取后进入内存，大条目每次都从磁盘读取
+    assert stats["entries"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+
+    # 覆盖写入后内存中的旧条目失效
+    manager.save_response("http://example.com/small.js", "GET", b"c" * 100, {})
+    assert manager.get_response("http://example.com/small.js")["content"] == b"c" * 100
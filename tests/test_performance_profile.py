@@ -0,0 +1,116 @@
+"""
+性能配置: 事件循环、HTTP 解析器和元数据编解码器的选择，以及两种编解码器写入的缓存可以互相读取
+"""
+
+import importlib.util
+import logging
+
+import pytest
+
+import main
+from config import PerformanceProfile, app_config
+from core import CacheManager
+from utils import JsonUtil, json_util
+
+METADATA = {
+    "headers": {"content-type": "text/html; charset=utf-8", "x-title": "中文标题"},
+    "status_code": 200,
+    "fetched_at": 1_700_000_000.5,
+    "variants": None,
+}
+
+
+@pytest.fixture(autouse=True)
+def restore_codec(monkeypatch):
+    """测试结束后恢复编解码器选择"""
+    monkeypatch.setattr(JsonUtil, "fast", JsonUtil.fast)
+
+
+@pytest.mark.parametrize("fast", [False, True], ids=["json", "orjson"])
+def test_roundtrip(fast):
+    if fast and not JsonUtil.available():
+        pytest.skip("orjson is not installed")
+    assert JsonUtil.configure(fast) == ("orjson" if fast else "json")
+    assert JsonUtil.loads(JsonUtil.dumps(METADATA)) == METADATA
+    assert JsonUtil.loads(JsonUtil.dumps(METADATA, pretty=True)) == METADATA
+    assert JsonUtil.loads(JsonUtil.dumps(METADATA).decode()) == METADATA
+
+
+def test_stdlib_pretty_output_is_indented_and_readable():
+    JsonUtil.configure(False)
+    pretty = JsonUtil.dumps(METADATA, pretty=True)
+    assert b"\n  " in pretty
+    assert "中文标题".encode() in pretty
+    assert b"\n" not in JsonUtil.dumps(METADATA)
+
+
+def test_missing_orjson_falls_back_to_stdlib(monkeypatch):
+    monkeypatch.setattr(json_util, "orjson", None)
+    assert not JsonUtil.available()
+    assert JsonUtil.configure(True) == "json"
+    assert JsonUtil.loads(JsonUtil.dumps(METADATA)) == METADATA
+
+
+def test_invalid_json_raises_value_error():
+    for fast in (False, JsonUtil.available()):
+        JsonUtil.configure(fast)
+        with pytest.raises(ValueError):
+            JsonUtil.loads(b"{not json")
+
+
+@pytest.mark.skipif(not JsonUtil.available(), reason="orjson is not installed")
+@pytest.mark.parametrize(
+    "writer, reader",
+    [
+        (PerformanceProfile.FAST, PerformanceProfile.COMPAT),
+        (PerformanceProfile.COMPAT, PerformanceProfile.FAST),
+    ],
+)
+@pytest.mark.parametrize(
+    "url", ["http://example.com/page.html", "http://example.com/search?q=1"], ids=["raw", "entry"]
+)
+def test_cache_written_by_one_codec_is_read_by_the_other(
+    cache_dir, monkeypatch, writer, reader, url
+):
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+    monkeypatch.setattr(app_config, "performance_profile", writer)
+    CacheManager(str(cache_dir)).save_response(
+        url, "GET", b"<p>hi</p>", {"content-type": "text/html", "x-title": "中文标题"}
+    )
+
+    monkeypatch.setattr(app_config, "performance_profile", reader)
+    manager = CacheManager(str(cache_dir))
+    assert JsonUtil.codec_name() == ("orjson" if reader == PerformanceProfile.FAST else "json")
+    cached = manager.get_response(url)
+    assert cached["content"] == b"<p>hi</p>"
+    assert cached["headers"]["x-title"] == "中文标题"
+
+
+def test_compat_profile_uses_standard_implementations(monkeypatch):
+    monkeypatch.setattr(app_config, "performance_profile", PerformanceProfile.COMPAT)
+    assert main.select_accelerators() == {"loop": "asyncio", "http": "h11", "codec": "json"}
+
+
+@pytest.mark.parametrize("profile", [PerformanceProfile.AUTO, PerformanceProfile.FAST])
+def test_profiles_use_installed_accelerators(monkeypatch, profile):
+    monkeypatch.setattr(app_config, "performance_profile", profile)
+    installed = {
+        name: importlib.util.find_spec(name) is not None for name in ("uvloop", "httptools")
+    }
+    accelerators = main.select_accelerators()
+    assert accelerators["loop"] == ("uvloop" if installed["uvloop"] else "asyncio")
+    assert accelerators["http"] == ("httptools" if installed["httptools"] else "h11")
+    # auto 保持标准库编解码器，只有 fast 使用 orjson
+    fast_codec = profile == PerformanceProfile.FAST and JsonUtil.available()
+    assert accelerators["codec"] == ("orjson" if fast_codec else "json")
+
+
+def test_fast_profile_falls_back_when_packages_are_missing(monkeypatch, caplog):
+    monkeypatch.setattr(app_config, "performance_profile", PerformanceProfile.FAST)
+    monkeypatch.setattr(main.importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setattr(json_util, "orjson", None)
+
+    with caplog.at_level(logging.WARNING, logger="main"):
+        accelerators = main.select_accelerators()
+    assert accelerators == {"loop": "asyncio", "http": "h11", "codec": "json"}
+    assert "uvloop, httptools, orjson" in caplog.text
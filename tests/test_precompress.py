@@ -0,0 +1,126 @@
+"""
+预压缩变体: 按 Accept-Encoding 的 q 值选择编码 (q 值相同时按服务端优先顺序)，
+发送对应的变体文件并使用独立的 ETag
+"""
+
+import asyncio
+import gzip
+import types
+import zlib
+
+import pytest
+
+from config import app_config
+from core import LocalHandler
+from tests.helpers import make_request, open_cache, read_response
+from utils import HttpUtil, compression_util, constants
+
+TARGET = "http://example.com"
+PAYLOAD = b"<p>" + b"hello world " * 500 + b"</p>"
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, available, expected",
+    [
+        (None, ["gzip", "br"], None),
+        ("", ["gzip", "br"], None),
+        # q 值相同时按服务端优先顺序 (br > zstd > gzip)
+        ("gzip, br", ["gzip", "br"], "br"),
+        ("gzip, deflate, br, zstd", ["gzip", "zstd"], "zstd"),
+        # 客户端 q 值高的编码优先
+        ("gzip;q=1.0, br;q=0.5", ["gzip", "br"], "gzip"),
+        ("br;q=0.8, gzip;q=0.9", ["gzip", "br"], "gzip"),
+        ("GZIP; Q=0.5, br;q=0", ["gzip", "br"], "gzip"),
+        # q=0 表示不接受，无法解析的 q 值同样视为 0
+        ("br;q=0, gzip;q=0", ["gzip", "br"], None),
+        ("br;q=abc, gzip", ["gzip", "br"], "gzip"),
+        # 只拒绝未压缩内容时仍从可用变体中选择，没有可用变体时发送未压缩内容
+        ("identity;q=0, gzip", ["gzip", "br"], "gzip"),
+        ("identity;q=0", ["gzip", "br"], None),
+        # "*" 匹配未列出的编码，明确列出的编码使用自己的 q 值
+        ("*", ["gzip", "br"], "br"),
+        ("br;q=0, *", ["gzip", "br"], "gzip"),
+        ("*;q=0, gzip", ["gzip", "br"], "gzip"),
+        ("*;q=0.1, gzip;q=0.5", ["gzip", "br"], "gzip"),
+        ("deflate", ["gzip", "br"], None),
+        ("gzip", [], None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, available, expected):
+    assert (
+        HttpUtil.negotiate_encoding(accept_encoding, available, constants.PRECOMPRESS_ENCODINGS)
+        == expected
+    )
+
+
+class _StandInBrotliCompressor:
+    """测试用的 brotli 替身 (raw deflate)，只用于区分不同编码的变体文件"""
+
+    def __init__(self, quality: int):
+        self._compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+@pytest.fixture
+def gzip_and_br(monkeypatch):
+    """同时生成 gzip 和 br 变体 (未安装 brotli 时使用替身压缩器)"""
+    if compression_util.brotli is None:
+        monkeypatch.setattr(
+            compression_util, "brotli", types.SimpleNamespace(Compressor=_StandInBrotliCompressor)
+        )
+    monkeypatch.setattr(app_config, "precompress_encodings", "gzip,br")
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+def fetch_with_encoding(cache_dir, accept_encoding):
+    """缓存文本响应后带指定 Accept-Encoding 请求，返回 (状态码, 响应头, 响应体, 缓存层 ETag)"""
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            manager.save_response(
+                f"{TARGET}/page.html", "GET", PAYLOAD, {"content-type": "text/html"}
+            )
+            etag = manager.get_response(f"{TARGET}/page.html")["etag"]
+            handler = LocalHandler(manager, TARGET)
+            headers = [("accept-encoding", accept_encoding)] if accept_encoding else []
+            response = await handler.handle_request(
+                make_request("GET", "page.html", headers=headers), "page.html"
+            )
+            return (*await read_response(response), etag)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("br;q=0, *", "gzip"),
+        ("identity", None),
+        (None, None),
+    ],
+)
+def test_handler_sends_negotiated_variant(cache_dir, gzip_and_br, accept_encoding, expected):
+    status, headers, body, etag = fetch_with_encoding(cache_dir, accept_encoding)
+    assert status == 200
+    assert "accept-encoding" in headers["vary"].lower()
+    if expected is None:
+        assert body == PAYLOAD
+        assert "content-encoding" not in headers
+        assert headers["etag"] == etag
+        return
+    assert headers["content-encoding"] == expected
+    assert headers["etag"] == HttpUtil.variant_etag(etag, expected)
+    assert int(headers["content-length"]) == len(body) < len(PAYLOAD)
+    if expected == "gzip":
+        assert gzip.decompress(body) == PAYLOAD
+    elif isinstance(compression_util.brotli, types.SimpleNamespace):
+        assert zlib.decompress(body, -15) == PAYLOAD
+    else:
+        assert compression_util.brotli.decompress(body) == PAYLOAD
@@ -0,0 +1,102 @@
+"""
+上游 HTTP 客户端: 连接池、超时配置和启动时预热连接
+"""
+
+import asyncio
+
+from config import app_config
+from core import ProxyHandler
+from tests.helpers import open_cache
+
+
+async def start_upstream(connections: list):
+    """
+    启动支持 keep-alive 的最小 HTTP/1.1 上游，记录建立的连接
+
+    Args:
+        connections: 每个新连接追加一项
+
+    Returns:
+        (服务器, 目标 URL)
+    """
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(writer.get_extra_info("peername"))
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                body = b"" if head.startswith(b"HEAD ") else b"ok"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+def test_client_uses_configured_pool_and_timeouts(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "request_timeout", 30)
+    monkeypatch.setattr(app_config, "upstream_connect_timeout", 2.5)
+    monkeypatch.setattr(app_config, "upstream_max_connections", 7)
+    monkeypatch.setattr(app_config, "upstream_max_keepalive_connections", 3)
+    monkeypatch.setattr(app_config, "upstream_keepalive_expiry", 9.0)
+    # 未安装 h2 时回退到 HTTP/1.1，安装时启用
+    monkeypatch.setattr(app_config, "upstream_http2", True)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = ProxyHandler("http://upstream.test", manager)
+            client = handler.client
+            pool = client._transport._pool
+            await handler.close()
+            return client.timeout, pool
+
+    timeout, pool = asyncio.run(scenario())
+    assert (timeout.connect, timeout.read, timeout.write) == (2.5, 30, 30)
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 9.0
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        assert not pool._http2
+    else:
+        assert pool._http2
+
+
+def test_prewarm_opens_reusable_connections(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "upstream_max_keepalive_connections", 3)
+
+    async def scenario():
+        connections = []
+        server, target = await start_upstream(connections)
+        async with open_cache(cache_dir) as manager:
+            handler = ProxyHandler(target, manager)
+            # 预热数不超过 keep-alive 连接池大小
+            await handler.prewarm(5)
+            warmed = len(connections)
+            for _ in range(3):
+                response = await handler.client.get(f"{target}/")
+                assert response.text == "ok"
+            await handler.close()
+        server.close()
+        await server.wait_closed()
+        return warmed, len(connections)
+
+    warmed, total = asyncio.run(scenario())
+    assert warmed == 3
+    assert total == 3
+
+
+def test_prewarm_tolerates_unreachable_upstream(cache_dir):
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = ProxyHandler("http://127.0.0.1:9", manager)
+            await handler.prewarm(2)
+            await handler.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,143 @@
+"""
+Range 请求: 单个字节范围 (含后缀和开放范围) 返回 206，无法满足返回 416，
+多个范围或 If-Range 不成立时返回完整内容
+"""
+
+import asyncio
+
+import pytest
+
+from config import app_config
+from core import LocalHandler
+from tests.helpers import make_request, open_cache, read_response
+from utils import HttpUtil
+
+TARGET = "http://example.com"
+LAST_MODIFIED = "Tue, 14 Nov 2023 22:13:20 GMT"
+PAYLOAD = bytes(range(256)) * 40
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        # 后缀长于内容时返回全部内容
+        ("bytes=-5000", (0, 999)),
+        # 结束位置超出内容时截断到末尾
+        ("bytes=990-5000", (990, 999)),
+        (" Bytes = 10 - 19 ", (10, 19)),
+        # 多个范围、其他单位和无法识别的格式忽略 Range
+        ("bytes=0-9,20-29", None),
+        ("items=0-9", None),
+        ("bytes=9-0", None),
+        ("bytes=-", None),
+        ("bytes=a-9", None),
+        ("bytes=0", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert HttpUtil.parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header, size",
+    [("bytes=1000-", 1000), ("bytes=5000-6000", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)],
+)
+def test_unsatisfiable_range_raises(header, size):
+    with pytest.raises(ValueError):
+        HttpUtil.parse_range(header, size)
+
+
+@pytest.mark.parametrize(
+    "if_range, expected",
+    [
+        (None, True),
+        ('"abc"', True),
+        ('"other"', False),
+        # ETag 使用强比较，弱 ETag 不满足
+        ('W/"abc"', False),
+        (LAST_MODIFIED, True),
+        ("Tue, 14 Nov 2023 22:13:21 GMT", False),
+        ("not a date", False),
+    ],
+)
+def test_if_range_matches(if_range, expected):
+    assert HttpUtil.if_range_matches(if_range, '"abc"', LAST_MODIFIED) is expected
+
+
+def test_if_range_with_weak_etag_or_missing_last_modified():
+    assert not HttpUtil.if_range_matches('W/"abc"', 'W/"abc"', None)
+    assert not HttpUtil.if_range_matches(LAST_MODIFIED, '"abc"', None)
+
+
+@pytest.fixture(params=[1 << 30, 1024], ids=["inline", "file"])
+def file_threshold(request, monkeypatch):
+    """内容在内存中或以文件形式返回"""
+    monkeypatch.setattr(app_config, "file_response_threshold", request.param)
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+def get_range(cache_dir, headers):
+    """缓存 PAYLOAD 后带指定请求头请求，返回 (状态码, 响应头, 响应体)"""
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            manager.save_response(
+                f"{TARGET}/video.bin",
+                "GET",
+                PAYLOAD,
+                {"content-type": "application/octet-stream", "last-modified": LAST_MODIFIED},
+            )
+            handler = LocalHandler(manager, TARGET)
+            etag = manager.get_response(f"{TARGET}/video.bin")["etag"]
+            headers_with_etag = [(name, value.replace("{etag}", etag)) for name, value in headers]
+            response = await handler.handle_request(
+                make_request("GET", "video.bin", headers=headers_with_etag), "video.bin"
+            )
+            return await read_response(response)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "headers, start, end",
+    [
+        ([("range", "bytes=100-199")], 100, 199),
+        ([("range", "bytes=-256")], len(PAYLOAD) - 256, len(PAYLOAD) - 1),
+        ([("range", "bytes=10000-")], 10000, len(PAYLOAD) - 1),
+        ([("range", "bytes=0-9"), ("if-range", "{etag}")], 0, 9),
+        ([("range", "bytes=0-9"), ("if-range", LAST_MODIFIED)], 0, 9),
+    ],
+)
+def test_range_request_returns_partial_content(cache_dir, file_threshold, headers, start, end):
+    status, response_headers, body = get_range(cache_dir, headers)
+    assert status == 206
+    assert body == PAYLOAD[start : end + 1]
+    assert response_headers["content-range"] == f"bytes {start}-{end}/{len(PAYLOAD)}"
+    assert response_headers["content-length"] == str(end - start + 1)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        [("range", "bytes=0-9,20-29")],
+        [("range", "bytes=0-9"), ("if-range", '"stale"')],
+        [("range", "bytes=0-9"), ("if-range", "Wed, 15 Nov 2023 00:00:00 GMT")],
+    ],
+    ids=["multi-range", "etag-changed", "date-changed"],
+)
+def test_ignored_range_returns_full_content(cache_dir, file_threshold, headers):
+    status, response_headers, body = get_range(cache_dir, headers)
+    assert status == 200
+    assert body == PAYLOAD
+    assert response_headers["accept-ranges"] == "bytes"
+    assert "content-range" not in response_headers
+
+
+def test_unsatisfiable_range_returns_416(cache_dir, file_threshold):
+    status, response_headers, body = get_range(cache_dir, [("range", f"bytes={len(PAYLOAD)}-")])
+    assert status == 416
+    assert response_headers["content-range"] == f"bytes */{len(PAYLOAD)}"
+    assert body == b""
@@ -0,0 +1,130 @@
+"""
+缓存目录分层迁移: 条目连同 .body 和预压缩变体一起移动，重复运行不再移动，
+两种布局都有同一条目时保留分层布局中的版本，--dry-run 不修改目录
+"""
+
+import shutil
+import sys
+
+import pytest
+
+import reshard
+from config import app_config
+from core import CacheManager
+from utils import constants
+
+TARGET = "http://upstream.test"
+# (URL, 方法, 请求体): 带参数 GET 和 POST 以哈希命名并参与分层，无参数 GET 不参与
+ENTRIES = [
+    (f"{TARGET}/search?q=1", "GET", None),
+    (f"{TARGET}/api/items", "POST", b'{"page": 1}'),
+    (f"{TARGET}/page.html", "GET", None),
+]
+
+
+@pytest.fixture(autouse=True)
+def synchronous_writes(monkeypatch):
+    monkeypatch.setattr(app_config, "cache_write_queue_size", 0)
+
+
+def populate(cache_dir, depth: int, version: bytes) -> None:
+    """以指定分层深度写入全部条目 (文本响应体，会生成预压缩变体)"""
+    app_config.cache_shard_depth = depth
+    manager = CacheManager(str(cache_dir))
+    for url, method, body in ENTRIES:
+        manager.save_response(
+            url, method, version + url.encode() * 200, {"content-type": "text/plain"}, body=body
+        )
+
+
+def served(cache_dir, depth: int) -> dict:
+    """以指定分层深度读取全部条目的响应体"""
+    app_config.cache_shard_depth = depth
+    manager = CacheManager(str(cache_dir))
+    return {
+        url: manager.get_response(url, method, body)["content"][:3]
+        for url, method, body in ENTRIES
+    }
+
+
+def snapshot(cache_dir) -> dict:
+    """缓存目录中除锁文件外全部文件的内容"""
+    return {
+        str(path.relative_to(cache_dir)): path.read_bytes()
+        for path in cache_dir.rglob("*")
+        if path.is_file() and ".locks" not in path.parts
+    }
+
+
+def entry_files(cache_dir) -> list:
+    """以哈希命名的条目文件相对路径"""
+    return sorted(
+        str(path.relative_to(cache_dir))
+        for path in cache_dir.rglob(f"*{constants.CACHE_FILE_EXTENSION_ENTRY}*")
+    )
+
+
+def is_sharded(path: str) -> bool:
+    """条目文件是否位于 {哈希前两位}/{哈希三四位}/ 目录下"""
+    parts = path.split("/")
+    return parts[-3] == parts[-1][:2] and parts[-2] == parts[-1][2:4]
+
+
+def test_reshard_moves_entry_groups_and_rerun_is_idempotent(cache_dir):
+    populate(cache_dir, 0, b"v1:")
+    index_path = cache_dir / constants.CACHE_INDEX_FILE
+    index_path.write_bytes(b"stale")
+    flat = entry_files(cache_dir)
+
+    assert reshard.reshard(cache_dir, 2, workers=4) == {"moved": 2, "replaced": 0, "skipped": 0}
+    moved = entry_files(cache_dir)
+    # 同一条目的全部文件 (.entry、.entry.body、变体) 都移动到 {哈希前两位}/{哈希三四位}/ 下
+    assert len(moved) == len(flat)
+    assert all(is_sharded(path) for path in moved)
+    # 缓存键随路径变化，索引在下次启动时重建
+    assert not index_path.exists()
+    assert served(cache_dir, 2) == dict.fromkeys((url for url, _, _ in ENTRIES), b"v1:")
+
+    before = snapshot(cache_dir)
+    assert reshard.reshard(cache_dir, 2, workers=4) == {"moved": 0, "replaced": 0, "skipped": 2}
+    assert snapshot(cache_dir) == before
+
+
+def test_reshard_back_to_flat_removes_empty_shard_dirs(cache_dir):
+    populate(cache_dir, 2, b"v1:")
+
+    assert reshard.reshard(cache_dir, 0, workers=2)["moved"] == 2
+    assert not any(is_sharded(path) for path in entry_files(cache_dir))
+    search_params = cache_dir / "upstream.test" / "get" / "search" / "params"
+    assert not any(path.is_dir() for path in search_params.iterdir())
+    assert served(cache_dir, 0) == dict.fromkeys((url for url, _, _ in ENTRIES), b"v1:")
+
+
+def test_reshard_keeps_sharded_copy_when_both_layouts_hold_entry(cache_dir, tmp_path):
+    # 迁移前的旧版本留在不分层的位置，服务之后在分层布局中写入了新版本
+    populate(cache_dir, 0, b"v1:")
+    newer = tmp_path / "newer"
+    populate(newer, 2, b"v2:")
+    shutil.copytree(newer, cache_dir, dirs_exist_ok=True)
+    flat = [path for path in entry_files(cache_dir) if not is_sharded(path)]
+    assert flat
+
+    assert reshard.reshard(cache_dir, 2, workers=2) == {"moved": 0, "replaced": 2, "skipped": 2}
+    assert not any((cache_dir / path).exists() for path in flat)
+    assert served(cache_dir, 2) == dict.fromkeys((url for url, _, _ in ENTRIES), b"v2:")
+
+
+def test_dry_run_leaves_tree_untouched(cache_dir, monkeypatch, caplog):
+    populate(cache_dir, 0, b"v1:")
+    index_path = cache_dir / constants.CACHE_INDEX_FILE
+    index_path.write_bytes(b"index")
+    before = snapshot(cache_dir)
+
+    monkeypatch.setattr(
+        sys, "argv", ["reshard.py", "--cache-dir", str(cache_dir), "--depth", "2", "--dry-run"]
+    )
+    with caplog.at_level("INFO", logger="reshard"):
+        reshard.main()
+
+    assert snapshot(cache_dir) == before
+    assert "[dry run]" in caplog.text and "2 moved" in caplog.text
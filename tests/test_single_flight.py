@@ -0,0 +1,105 @@
+"""
+请求合并 (single-flight): 相同缓存键的并发未命中只向上游发起一次请求
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from config import app_config
+from core import HybridHandler
+from core.single_flight import SingleFlight
+from tests.helpers import make_request, open_cache, read_response
+
+TARGET = "http://upstream.test"
+CONCURRENCY = 500
+
+
+def run_misses(cache_dir, payload: bytes, concurrency: int):
+    """向本地替身上游并发发送相同的未命中请求，返回 (上游请求次数, 各请求的结果, 合并统计)"""
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, content=payload, headers={"content-type": "text/plain"})
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            handler = HybridHandler(TARGET, manager)
+            handler.proxy_handler.client = httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream)
+            )
+
+            async def get():
+                response = await handler.handle_request(make_request("GET", "popular"), "popular")
+                return await read_response(response)
+
+            results = await asyncio.gather(*(get() for _ in range(concurrency)))
+            stats = handler.get_stats()["single_flight"]
+            await handler.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    return len(calls), results, stats
+
+
+def test_buffered_misses_coalesce(cache_dir):
+    payload = b"hello " * 100
+    upstream_calls, results, stats = run_misses(cache_dir, payload, CONCURRENCY)
+    assert upstream_calls == 1
+    assert all(status == 200 and body == payload for status, _, body in results)
+    assert stats["flights"] == 1
+    assert stats["coalesced"] == CONCURRENCY - 1
+
+
+def test_streamed_misses_coalesce(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "stream_threshold", 64 * 1024)
+    payload = os.urandom(300 * 1024)
+    upstream_calls, results, stats = run_misses(cache_dir, payload, CONCURRENCY)
+    assert upstream_calls == 1
+    assert all(status == 200 and body == payload for status, _, body in results)
+    assert stats["flights"] == 1
+    assert stats["stream_waiters"] == CONCURRENCY - 1
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do("key", failing) for _ in range(10)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.in_flight == 0
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("key", slow))
+        second = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,187 @@
+"""
+上游保护: 熔断器的状态转换 (打开、冷却后半开、单个探测请求) 和并发限制器的有界等待队列
+"""
+
+import asyncio
+import types
+
+import pytest
+
+from core import upstream_guard
+from core.upstream_guard import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimiter,
+    UpstreamOverloaded,
+)
+from utils import constants
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换熔断器使用的 time.monotonic，测试中手动推进时间"""
+    now = [1000.0]
+    monkeypatch.setattr(upstream_guard, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+
+    def advance(seconds: float) -> None:
+        now[0] += seconds
+
+    return advance
+
+
+def open_breaker(threshold: int = 3, cooldown: float = 30.0) -> CircuitBreaker:
+    """连续失败 threshold 次后已打开的熔断器"""
+    breaker = CircuitBreaker(threshold, cooldown)
+    for _ in range(threshold):
+        breaker.before_request()
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(3, 30.0)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == constants.BREAKER_STATE_CLOSED
+
+    # 成功请求清零连续失败次数
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.before_request()
+    assert breaker.state == constants.BREAKER_STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == constants.BREAKER_STATE_OPEN
+    assert breaker.opened == 1
+    clock(10)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_request()
+    assert error.value.retry_after == pytest.approx(20.0)
+    assert breaker.get_stats()["rejected"] == 1
+    assert breaker.get_stats()["retry_after"] == 20.0
+
+
+def test_breaker_half_opens_after_cooldown_with_single_probe(clock):
+    breaker = open_breaker()
+    clock(29.9)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    clock(0.1)
+    breaker.before_request()
+    assert breaker.state == constants.BREAKER_STATE_HALF_OPEN
+    # 探测请求结束前其他请求仍然快速失败
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_request()
+    assert error.value.retry_after == constants.UPSTREAM_OVERLOAD_RETRY_AFTER
+
+    breaker.record_success()
+    assert breaker.state == constants.BREAKER_STATE_CLOSED
+    assert breaker.failures == 0
+    breaker.before_request()
+    breaker.before_request()
+
+
+def test_failed_probe_reopens_for_full_cooldown(clock):
+    breaker = open_breaker()
+    clock(30)
+    breaker.before_request()
+    breaker.record_failure()
+
+    assert breaker.state == constants.BREAKER_STATE_OPEN
+    assert breaker.opened == 2
+    assert breaker.retry_after() == pytest.approx(30.0)
+    clock(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_aborted_probe_releases_half_open_slot(clock):
+    breaker = open_breaker()
+    clock(30)
+    breaker.before_request()
+    # 探测请求被取消: 不计入成功或失败，下一个请求成为新的探测请求
+    breaker.record_aborted()
+    assert breaker.state == constants.BREAKER_STATE_HALF_OPEN
+    breaker.before_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_disabled_breaker_never_opens(clock):
+    breaker = CircuitBreaker(0, 30.0)
+    for _ in range(10):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == constants.BREAKER_STATE_CLOSED
+    assert breaker.failures == 10
+
+
+def test_limiter_rejects_when_queue_is_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, max_queue=1, queue_timeout=5)
+        release = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        with pytest.raises(UpstreamOverloaded) as error:
+            await limiter.acquire()
+
+        release()
+        (await waiter)()
+        return limiter.get_stats(), error.value.retry_after
+
+    stats, retry_after = asyncio.run(scenario())
+    assert retry_after == constants.UPSTREAM_OVERLOAD_RETRY_AFTER
+    assert stats["rejected"] == 1
+    assert stats["peak_queued"] == 1
+    assert (stats["active"], stats["queued"], stats["timeouts"]) == (0, 0, 0)
+
+
+def test_limiter_times_out_waiting_for_slot():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, max_queue=5, queue_timeout=0.05)
+        release = await limiter.acquire()
+        with pytest.raises(UpstreamOverloaded, match="Timed out"):
+            await limiter.acquire()
+        release()
+        # 超时的等待不占用名额
+        (await asyncio.wait_for(limiter.acquire(), 1))()
+        return limiter.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timeouts"] == 1
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (0, 0, 0)
+
+
+def test_limiter_release_is_idempotent():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, max_queue=1, queue_timeout=0.05)
+        release = await limiter.acquire()
+        release()
+        release()
+        assert limiter.active == 0
+        # 重复释放没有多出名额: 第二个并发请求仍需等待
+        await limiter.acquire()
+        with pytest.raises(UpstreamOverloaded):
+            await limiter.acquire()
+        return limiter.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["active"], stats["timeouts"]) == (1, 1)
+
+
+def test_unlimited_limiter_never_waits():
+    async def scenario():
+        limiter = ConcurrencyLimiter(0, max_queue=0, queue_timeout=0)
+        releases = [await limiter.acquire() for _ in range(100)]
+        active = limiter.active
+        for release in releases:
+            release()
+        return active, limiter.get_stats()
+
+    active, stats = asyncio.run(scenario())
+    assert active == 100
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (0, 0, 0)
@@ -0,0 +1,98 @@
+"""
+后台写入队列: 同一缓存键的写入顺序，以及队列已满时的处理策略
+"""
+
+import asyncio
+
+from config import CacheWritePolicy, app_config
+from core.write_queue import CacheWriteQueue
+from tests.helpers import open_cache
+
+
+def test_writes_to_same_key_apply_in_order():
+    writes = []
+
+    async def write(url: str, version: int) -> None:
+        # 先提交的版本写得更慢，多个写入任务并行时会被后提交的超过
+        await asyncio.sleep(0.001 * (20 - version % 20))
+        writes.append((url, version))
+
+    async def scenario():
+        queue = CacheWriteQueue(write, max_size=100, workers=4, policy=CacheWritePolicy.BLOCK)
+        for version in range(40):
+            for key in ("a", "b", "c"):
+                await queue.submit(key, {"version": version}, url=key, version=version)
+        await queue.close()
+
+    asyncio.run(scenario())
+    assert len(writes) == 120
+    for key in ("a", "b", "c"):
+        assert [version for k, version in writes if k == key] == list(range(40))
+
+
+def test_dropped_write_keeps_queued_entry_pending():
+    release = asyncio.Event()
+
+    async def write(**kwargs) -> None:
+        await release.wait()
+
+    async def scenario():
+        queue = CacheWriteQueue(write, max_size=1, workers=1, policy=CacheWritePolicy.DROP)
+        first, second, third = {"version": 1}, {"version": 2}, {"version": 3}
+        await queue.submit("k", first)
+        await asyncio.sleep(0)  # 写入任务取走第一个条目并阻塞
+        await queue.submit("k", second)
+        await queue.submit("k", third)  # 队列已满，被丢弃
+        pending = queue.get_pending("k")
+        stats = queue.get_stats()
+        release.set()
+        await queue.close()
+        return pending is second, stats, queue.get_pending("k")
+
+    is_second, stats, after = asyncio.run(scenario())
+    assert is_second
+    assert stats["dropped"] == 1
+    assert after is None
+
+
+def test_spill_waits_behind_queued_write_for_same_key():
+    release = asyncio.Event()
+    writes = []
+
+    async def write(version: int) -> None:
+        if version == 1:
+            await release.wait()
+        writes.append(version)
+
+    async def scenario():
+        queue = CacheWriteQueue(write, max_size=1, workers=1, policy=CacheWritePolicy.SPILL)
+        await queue.submit("k", {}, version=1)
+        await asyncio.sleep(0)
+        await queue.submit("k", {}, version=2)
+        # 队列已满: 其他缓存键直接写入，同一缓存键排在已有写入之后
+        await queue.submit("other", {}, version=10)
+        spill = asyncio.create_task(queue.submit("k", {}, version=3))
+        await asyncio.sleep(0.01)
+        release.set()
+        await spill
+        await queue.close()
+        return queue.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert writes == [10, 1, 2, 3]
+    assert stats["spilled"] == 1
+
+
+def test_latest_save_wins_on_disk(cache_dir, monkeypatch):
+    monkeypatch.setattr(app_config, "cache_write_workers", 4)
+
+    async def scenario():
+        async with open_cache(cache_dir) as manager:
+            url = "http://example.com/api/data?id=1"
+            for version in range(50):
+                await manager.asave_response(url, "GET", f"v{version}".encode())
+            await manager.flush()
+            manager.memory_cache.invalidate(manager.get_cache_key(url, "GET"))
+            return manager.get_response(url)["content"]
+
+    assert asyncio.run(scenario()) == b"v49"
@@ -1,6 +1,19 @@
 from .encoding_util import EncodingUtil
 from .http_util import HttpUtil
 from .cache_util import CachePathUtil
+from .entry_util import CacheEntryUtil
+from .lock_util import LockUtil
+from .compression_util import CompressionUtil
+from .json_util import JsonUtil
 from . import constants
 
-__all__ = ["EncodingUtil", "HttpUtil", "CachePathUtil", "constants"]
\ No newline at end of file
+__all__ = [
+    "EncodingUtil",
+    "HttpUtil",
+    "CachePathUtil",
+    "CacheEntryUtil",
+    "LockUtil",
+    "CompressionUtil",
+    "JsonUtil",
+    "constants",
+]
\ No newline at end of file
@@ -43,9 +43,49 @@ class CachePathUtil:
         query = parsed.query
         return domain, path, query
 
+    @staticmethod
+    def shard_dir(base_dir: Path, file_hash: str, depth: int) -> Path:
+        """
+        按哈希前缀分层的子目录 (如 depth=2 时为 {base_dir}/ab/cd)，避免单个目录文件过多
+
+        Args:
+            base_dir: 所在目录
+            file_hash: 文件名中的十六进制哈希
+            depth: 分层深度 (0 表示不分层)
+
+        Returns:
+            分层后的目录
+        """
+        for level in range(depth):
+            base_dir = base_dir / file_hash[level * 2 : level * 2 + 2]
+        return base_dir
+
+    @staticmethod
+    def sharded_depth(file_path: Path) -> int:
+        """
+        判断文件当前所在的分层深度 (上级目录名依次为文件名哈希的前缀)
+
+        Args:
+            file_path: 以十六进制哈希命名的文件路径 (如 {hash}.entry)
+
+        Returns:
+            分层深度，不是哈希文件名或未分层时返回 0
+        """
+        file_hash = file_path.name.split(".", 1)[0]
+        if len(file_hash) != 32 or any(char not in "0123456789abcdef" for char in file_hash):
+            return 0
+        parents = file_path.parents
+        for depth in range(constants.CACHE_SHARD_MAX_DEPTH, 0, -1):
+            if len(parents) > depth and all(
+                parents[depth - 1 - level].name == file_hash[level * 2 : level * 2 + 2]
+                for level in range(depth)
+            ):
+                return depth
+        return 0
+
     @staticmethod
     def build_get_cache_path(
-        cache_dir: Path, domain: str, path: str, query: str
+        cache_dir: Path, domain: str, path: str, query: str, shard_depth: int = 0
     ) -> Path:
         """
         构建 GET 请求的缓存路径
@@ -55,27 +95,29 @@ class CachePathUtil:
             domain: 域名
             path: URL 路径
             query: 查询参数字符串
+            shard_depth: 带参数条目按哈希前缀分层的深度 (0 表示不分层)
 
         Returns:
             缓存文件路径
         """
         base_dir = cache_dir / domain / constants.CACHE_DIR_GET
 
-        # 如果有查询参数，使用 MD5 哈希值作为文件名
+        # 如果有查询参数，使用 MD5 哈希值作为文件名 (按哈希前缀分层)
         if query:
             query_hash = CachePathUtil.compute_hash(
                 query.encode(constants.ENCODING_UTF8)
             )
 
             if not path:
-                # 根路径带参数: ./cache/{domain}/get/params/{md5}
+                # 根路径带参数: ./cache/{domain}/get/params/{ab}/{cd}/{md5}
                 cache_path = (
-                    base_dir
-                    / constants.CACHE_DIR_PARAMS
-                    / f"{query_hash}{constants.CACHE_FILE_EXTENSION_JSON}"
+                    CachePathUtil.shard_dir(
+                        base_dir / constants.CACHE_DIR_PARAMS, query_hash, shard_depth
+                    )
+                    / f"{query_hash}{constants.CACHE_FILE_EXTENSION_ENTRY}"
                 )
             else:
-                # 带路径和参数: ./cache/{domain}/get/path/to/resource/params/{md5}
+                # 带路径和参数: ./cache/{domain}/get/path/to/resource/params/{ab}/{cd}/{md5}
                 # 需要去掉文件名，只保留目录路径
                 path_obj = Path(path)
                 if "." in path_obj.name and not path.endswith("/"):
@@ -86,10 +128,10 @@ class CachePathUtil:
                     dir_path = path_obj
                 
                 cache_path = (
-                    base_dir
-                    / dir_path
-                    / constants.CACHE_DIR_PARAMS
-                    / f"{query_hash}{constants.CACHE_FILE_EXTENSION_JSON}"
+                    CachePathUtil.shard_dir(
+                        base_dir / dir_path / constants.CACHE_DIR_PARAMS, query_hash, shard_depth
+                    )
+                    / f"{query_hash}{constants.CACHE_FILE_EXTENSION_ENTRY}"
                 )
         else:
             # GET 请求无参数: ./cache/{domain}/get/path/to/resource/index.html
@@ -112,7 +154,7 @@ class CachePathUtil:
 
     @staticmethod
     def build_post_cache_path(
-        cache_dir: Path, domain: str, path: str, body: Optional[bytes]
+        cache_dir: Path, domain: str, path: str, body: Optional[bytes], shard_depth: int = 0
     ) -> Path:
         """
         构建 POST 请求的缓存路径
@@ -122,6 +164,7 @@ class CachePathUtil:
             domain: 域名
             path: URL 路径
             body: 请求体字节数据
+            shard_depth: 按哈希前缀分层的深度 (0 表示不分层)
 
         Returns:
             缓存文件路径
@@ -132,16 +175,14 @@ class CachePathUtil:
         body_hash = CachePathUtil.compute_hash(body or b"")
 
         if not path:
-            # 根路径: ./cache/{domain}/post/root/{md5}
-            cache_path = (
-                base_dir
-                / constants.CACHE_DIR_ROOT
-                / f"{body_hash}{constants.CACHE_FILE_EXTENSION_JSON}"
-            )
+            # 根路径: ./cache/{domain}/post/root/{ab}/{cd}/{md5}
+            entry_dir = base_dir / constants.CACHE_DIR_ROOT
         else:
-            # 带路径: ./cache/{domain}/post/path/to/endpoint/{md5}
-            cache_path = (
-                base_dir / path / f"{body_hash}{constants.CACHE_FILE_EXTENSION_JSON}"
-            )
+            # 带路径: ./cache/{domain}/post/path/to/endpoint/{ab}/{cd}/{md5}
+            entry_dir = base_dir / path
+        cache_path = (
+            CachePathUtil.shard_dir(entry_dir, body_hash, shard_depth)
+            / f"{body_hash}{constants.CACHE_FILE_EXTENSION_ENTRY}"
+        )
 
         return cache_path
@@ -0,0 +1,120 @@
+"""
+响应体预压缩工具
+缓存写入时压缩一次，之后按 Accept-Encoding 直接发送压缩后的字节
+"""
+
+import zlib
+from typing import BinaryIO, Iterable, Optional
+
+from . import constants
+from .encoding_util import EncodingUtil
+
+try:
+    import brotli
+except ImportError:  # 可选依赖: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖: pip install zstandard
+    zstandard = None
+
+
+class _BrotliCompressor:
+    """将 brotli.Compressor 适配为 compress / flush 接口"""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=constants.PRECOMPRESS_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionUtil:
+    """预压缩工具类"""
+
+    @staticmethod
+    def available_encodings(configured: str) -> tuple[str, ...]:
+        """
+        过滤出配置中已安装依赖的编码
+
+        Args:
+            configured: 逗号分隔的编码列表 (如 "gzip,br,zstd")
+
+        Returns:
+            可用的编码元组，按配置顺序
+        """
+        installed = {
+            constants.ENCODING_GZIP: True,
+            constants.ENCODING_BROTLI: brotli is not None,
+            constants.ENCODING_ZSTD: zstandard is not None,
+        }
+        encodings = (name.strip().lower() for name in configured.split(","))
+        return tuple(name for name in encodings if installed.get(name))
+
+    @staticmethod
+    def is_compressible(content_type: Optional[str]) -> bool:
+        """
+        判断响应是否值得压缩 (文本类内容)
+
+        Args:
+            content_type: Content-Type 头的值
+
+        Returns:
+            是否压缩
+        """
+        mime, _ = EncodingUtil.parse_content_type(content_type)
+        return EncodingUtil.is_text_mime(mime) or mime in constants.COMPRESSIBLE_MIME_TYPES
+
+    @staticmethod
+    def _new_compressor(encoding: str):
+        """创建指定编码的增量压缩器 (compress / flush 接口)"""
+        if encoding == constants.ENCODING_GZIP:
+            # wbits=31 生成带 gzip 头部的数据
+            return zlib.compressobj(constants.PRECOMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+        if encoding == constants.ENCODING_BROTLI:
+            return _BrotliCompressor()
+        if encoding == constants.ENCODING_ZSTD:
+            return zstandard.ZstdCompressor(level=constants.PRECOMPRESS_ZSTD_LEVEL).compressobj()
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+    @staticmethod
+    def compress(data: bytes, encoding: str) -> bytes:
+        """
+        压缩字节数据
+
+        Args:
+            data: 原始数据
+            encoding: 编码名称 (gzip / br / zstd)
+
+        Returns:
+            压缩后的数据
+        """
+        compressor = CompressionUtil._new_compressor(encoding)
+        return compressor.compress(data) + compressor.flush()
+
+    @staticmethod
+    def compress_stream(chunks: Iterable[bytes], output: BinaryIO, encoding: str) -> int:
+        """
+        分块压缩并写入文件 (内存占用与响应体大小无关)
+
+        Args:
+            chunks: 原始数据块
+            output: 以二进制模式打开的输出文件
+            encoding: 编码名称
+
+        Returns:
+            写入的压缩数据字节数
+        """
+        compressor = CompressionUtil._new_compressor(encoding)
+        size = 0
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            output.write(data)
+            size += len(data)
+        data = compressor.flush()
+        output.write(data)
+        return size + len(data)
@@ -16,6 +16,17 @@ HTTP_METHOD_OPTIONS: Final[str] = "OPTIONS"
 # 支持缓存的 HTTP 方法
 CACHEABLE_METHODS: Final[tuple[str, ...]] = (HTTP_METHOD_GET, HTTP_METHOD_POST)
 
+# 镜像 (catch-all 路由) 处理的 HTTP 方法
+MIRROR_METHODS: Final[tuple[str, ...]] = (
+    HTTP_METHOD_GET,
+    HTTP_METHOD_POST,
+    HTTP_METHOD_PUT,
+    HTTP_METHOD_DELETE,
+    HTTP_METHOD_PATCH,
+    HTTP_METHOD_HEAD,
+    HTTP_METHOD_OPTIONS,
+)
+
 # 缓存相关常量
 CACHE_DIR_GET: Final[str] = "get"
 CACHE_DIR_POST: Final[str] = "post"
@@ -23,7 +34,107 @@ CACHE_DIR_PARAMS: Final[str] = "params"
 CACHE_DIR_ROOT: Final[str] = "root"
 CACHE_FILE_INDEX: Final[str] = "index.html"
 CACHE_FILE_EXTENSION_META: Final[str] = ".meta"
-CACHE_FILE_EXTENSION_JSON: Final[str] = ".json"
+CACHE_FILE_EXTENSION_JSON: Final[str] = ".json"  # 旧版 JSON 条目格式，仅用于兼容读取
+CACHE_FILE_EXTENSION_ENTRY: Final[str] = ".entry"
+CACHE_FILE_EXTENSION_TEMP: Final[str] = ".tmp"
+CACHE_FILE_EXTENSION_LOCK: Final[str] = ".lock"
+CACHE_FILE_EXTENSION_VARIANT: Final[str] = ".enc"  # 预压缩变体: {缓存文件}.{编码}.enc
+CACHE_FILE_EXTENSION_BODY: Final[str] = ".body"  # 启用去重时条目格式单独保存的响应体: {条目文件}.body
+
+# 写锁: 锁文件目录 (位于缓存根目录下) 和分片数量
+CACHE_DIR_LOCKS: Final[str] = ".locks"
+CACHE_LOCK_STRIPES: Final[int] = 256
+
+# 多 worker 协调 (锁文件位于写锁目录下):
+# 主 worker 锁 (持有者负责索引载入、缓存淘汰和内容回收)，未当选的 worker 检查主 worker 是否退出的间隔 (秒)
+CACHE_LEADER_LOCK: Final[str] = "leader.lock"
+CACHE_FOLLOWER_POLL: Final[float] = 0.5
+# 跨进程合并回源的填充锁: 分片数量和等待其他 worker 回源时的轮询间隔 (秒)
+CACHE_FILL_LOCK_PREFIX: Final[str] = "fill-"
+CACHE_FILL_LOCK_STRIPES: Final[int] = 4096
+CACHE_FILL_LOCK_POLL: Final[float] = 0.05
+# 各 worker 定期写入的统计快照目录 (位于缓存根目录下)
+CACHE_DIR_WORKERS: Final[str] = ".workers"
+
+# 带参数 GET 和 POST 条目按哈希前缀分层的最大深度 (每层 2 个十六进制字符)
+CACHE_SHARD_MAX_DEPTH: Final[int] = 4
+
+# 内容寻址存储: 目录 (位于缓存根目录下) 和垃圾回收间隔 (秒)
+CACHE_DIR_BLOBS: Final[str] = ".blobs"
+CACHE_BLOB_GC_INTERVAL: Final[float] = 600.0
+
+# 持久化缓存索引: SQLite 文件名 (位于缓存根目录下，以 "." 开头不会被当作缓存条目)、
+# 表结构版本、内存变更写入 SQLite (以及多 worker 时同步其他 worker 的变更) 的间隔 (秒)
+# 和已删除条目的记录保留时间 (秒，供其他 worker 同步删除)
+CACHE_INDEX_FILE: Final[str] = ".index.sqlite"
+CACHE_INDEX_SCHEMA_VERSION: Final[int] = 2
+CACHE_INDEX_FLUSH_INTERVAL: Final[float] = 5.0
+CACHE_INDEX_TOMBSTONE_TTL: Final[float] = 3600.0
+
+# 布隆过滤器达到预计容量时的误判率
+BLOOM_FILTER_ERROR_RATE: Final[float] = 0.01
+
+# 磁盘缓存淘汰: 超出配额后淘汰到配额的该比例，每轮最多淘汰的条目数，
+# 一轮满额后继续下一轮前的间隔 (秒)，以及最近该秒数内访问过的条目不淘汰 (可能正在发送)
+CACHE_EVICT_LOW_WATERMARK: Final[float] = 0.9
+CACHE_EVICT_BATCH: Final[int] = 1000
+CACHE_EVICT_BATCH_PAUSE: Final[float] = 0.05
+CACHE_EVICT_MIN_IDLE: Final[float] = 10.0
+
+# 读取到不一致的缓存条目时的最大尝试次数
+CACHE_READ_ATTEMPTS: Final[int] = 2
+
+# 条件请求头 (由缓存层处理，不直接转发给上游)
+CONDITIONAL_REQUEST_HEADERS: Final[tuple[str, ...]] = ("if-none-match", "if-modified-since")
+
+# 304 响应中保留的响应头
+NOT_MODIFIED_HEADERS: Final[tuple[str, ...]] = (
+    "etag",
+    "cache-control",
+    "expires",
+    "last-modified",
+    "vary",
+    "content-location",
+    "date",
+)
+
+# 过期后必须先向上游确认的 Cache-Control 指令 (不允许 stale-while-revalidate 和 stale-if-error)
+CACHE_CONTROL_MUST_REVALIDATE: Final[tuple[str, ...]] = (
+    "no-store",
+    "no-cache",
+    "must-revalidate",
+    "proxy-revalidate",
+)
+
+# 缓存新鲜度状态
+CACHE_STATE_FRESH: Final[str] = "fresh"  # 新鲜期内，直接使用
+CACHE_STATE_STALE: Final[str] = "stale"  # 已过期但在 stale-while-revalidate 窗口内，使用并后台刷新
+CACHE_STATE_EXPIRED: Final[str] = "expired"  # 超出窗口，需要同步回源
+
+# 预压缩编码 (按协商时的优先顺序) 和压缩级别
+ENCODING_BROTLI: Final[str] = "br"
+ENCODING_ZSTD: Final[str] = "zstd"
+ENCODING_GZIP: Final[str] = "gzip"
+PRECOMPRESS_ENCODINGS: Final[tuple[str, ...]] = (ENCODING_BROTLI, ENCODING_ZSTD, ENCODING_GZIP)
+PRECOMPRESS_GZIP_LEVEL: Final[int] = 9
+PRECOMPRESS_BROTLI_QUALITY: Final[int] = 9
+PRECOMPRESS_ZSTD_LEVEL: Final[int] = 12
+
+# 压缩后大小超过原始大小的该比例时不保存变体
+PRECOMPRESS_MAX_RATIO: Final[float] = 0.9
+
+# 文本类型之外值得压缩的 MIME 类型
+COMPRESSIBLE_MIME_TYPES: Final[tuple[str, ...]] = (
+    "application/wasm",
+    "application/vnd.ms-fontobject",
+    "font/ttf",
+    "font/otf",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+)
+
+# 流式传输的分块大小
+STREAM_CHUNK_SIZE: Final[int] = 64 * 1024
 
 # 默认 MIME 类型
 DEFAULT_MIME_TYPE: Final[str] = "application/octet-stream"
@@ -32,13 +143,42 @@ MIME_TYPE_JSON: Final[str] = "application/json"
 
 # HTTP 状态码
 HTTP_STATUS_OK: Final[int] = 200
+HTTP_STATUS_PARTIAL_CONTENT: Final[int] = 206
 HTTP_STATUS_NOT_MODIFIED: Final[int] = 304
 HTTP_STATUS_NOT_FOUND: Final[int] = 404
+HTTP_STATUS_RANGE_NOT_SATISFIABLE: Final[int] = 416
 HTTP_STATUS_INTERNAL_ERROR: Final[int] = 500
+HTTP_STATUS_SERVICE_UNAVAILABLE: Final[int] = 503
 HTTP_STATUS_GATEWAY_TIMEOUT: Final[int] = 504
 
+# 上游熔断器状态
+BREAKER_STATE_CLOSED: Final[str] = "closed"  # 正常发送请求
+BREAKER_STATE_OPEN: Final[str] = "open"  # 连续失败后快速失败
+BREAKER_STATE_HALF_OPEN: Final[str] = "half_open"  # 冷却结束，放行一个探测请求
+
+# 计入熔断器失败次数的上游状态码 (网关类错误，其他 5xx 通常只与单个资源有关)
+UPSTREAM_BREAKER_FAILURE_STATUSES: Final[tuple[int, ...]] = (502, 503, 504)
+
+# 上游并发已满时建议客户端重试前等待的最短秒数 (Retry-After)
+UPSTREAM_OVERLOAD_RETRY_AFTER: Final[float] = 1.0
+
 # 日志相关
 LOG_PREVIEW_LENGTH: Final[int] = 100
 
 # 编码
 ENCODING_UTF8: Final[str] = "utf-8"
+
+# 编码检测: chardet 仅检测前缀样本，检测结果按 (域名, MIME 类型) 缓存
+ENCODING_DETECT_SAMPLE_SIZE: Final[int] = 64 * 1024
+ENCODING_CACHE_MAX_ENTRIES: Final[int] = 1024
+
+# 需要按文本解码的 MIME 类型
+TEXT_MIME_PREFIX: Final[str] = "text/"
+TEXT_MIME_TYPES: Final[tuple[str, ...]] = (
+    "application/json",
+    "application/javascript",
+    "application/x-javascript",
+    "application/xml",
+    "application/x-www-form-urlencoded",
+)
+TEXT_MIME_SUFFIXES: Final[tuple[str, ...]] = ("+json", "+xml")
@@ -2,35 +2,148 @@
 编码检测和转换工具
 """
 
+import codecs
+from typing import Dict, Optional
+
 import chardet
 
+from . import constants
+
 
 class EncodingUtil:
     """编码工具类"""
 
+    # 检测结果缓存: (域名, MIME 类型) -> 编码
+    _detected_encodings: Dict[tuple[str, str], str] = {}
+
+    @staticmethod
+    def parse_content_type(content_type: Optional[str]) -> tuple[str, Optional[str]]:
+        """
+        解析 Content-Type 中的 MIME 类型和 charset 参数
+
+        Args:
+            content_type: Content-Type 头的值
+
+        Returns:
+            (小写 MIME 类型, charset) 元组，charset 不存在时为 None
+        """
+        if not content_type:
+            return "", None
+
+        mime, _, params = content_type.partition(";")
+        charset = None
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "charset" and value.strip():
+                charset = value.strip().strip("\"'")
+        return mime.strip().lower(), charset
+
     @staticmethod
-    def detect_and_decode(content: bytes) -> str:
+    def is_text_mime(mime: str) -> bool:
         """
-        检测内容编码并解码为 UTF-8 字符串
+        判断 MIME 类型是否为文本内容
+
+        Args:
+            mime: 小写 MIME 类型
+
+        Returns:
+            是否为文本类型
+        """
+        return (
+            mime.startswith(constants.TEXT_MIME_PREFIX)
+            or mime in constants.TEXT_MIME_TYPES
+            or mime.endswith(constants.TEXT_MIME_SUFFIXES)
+        )
+
+    @staticmethod
+    def detect_encoding(
+        content: bytes, content_type: Optional[str] = None, domain: str = ""
+    ) -> Optional[str]:
+        """
+        检测内容编码
+
+        检测顺序:
+        1. 信任 Content-Type 中声明的 charset
+        2. 非文本 MIME 类型直接跳过
+        3. 尝试 UTF-8
+        4. 使用同一域名和 MIME 类型之前的检测结果
+        5. 对前缀样本运行 chardet
 
         Args:
             content: 原始字节内容
+            content_type: Content-Type 头的值（可选）
+            domain: 内容所属域名，用于缓存检测结果（可选）
 
         Returns:
-            UTF-8 编码的字符串
+            编码名称，非文本内容返回 None
         """
-        if not content:
-            return ""
+        mime, charset = EncodingUtil.parse_content_type(content_type)
+
+        if charset:
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                pass
+
+        if mime and not EncodingUtil.is_text_mime(mime):
+            return None
 
-        # 先尝试 UTF-8
         try:
-            return content.decode("utf-8")
+            content.decode(constants.ENCODING_UTF8)
+            return constants.ENCODING_UTF8
         except UnicodeDecodeError:
             pass
 
-        # 使用 chardet 检测编码
-        detected = chardet.detect(content)
-        encoding = detected.get("encoding")
+        cache_key = (domain, mime)
+        cached = EncodingUtil._detected_encodings.get(cache_key)
+        if cached:
+            try:
+                content.decode(cached)
+                return cached
+            except UnicodeDecodeError:
+                pass
+
+        sample = content[: constants.ENCODING_DETECT_SAMPLE_SIZE]
+        encoding = chardet.detect(sample).get("encoding")
+        if encoding:
+            try:
+                encoding = codecs.lookup(encoding).name
+            except LookupError:
+                return None
+            if len(EncodingUtil._detected_encodings) >= constants.ENCODING_CACHE_MAX_ENTRIES:
+                EncodingUtil._detected_encodings.clear()
+            EncodingUtil._detected_encodings[cache_key] = encoding
+        return encoding
+
+    @staticmethod
+    def detect_and_decode(
+        content: bytes, content_type: Optional[str] = None, domain: str = ""
+    ) -> Optional[str]:
+        """
+        检测内容编码并解码为字符串
+
+        Args:
+            content: 原始字节内容
+            content_type: Content-Type 头的值（可选，用于读取声明的 charset 和跳过二进制内容）
+            domain: 内容所属域名，用于缓存检测结果（可选）
+
+        Returns:
+            解码后的字符串，非文本 MIME 类型返回 None
+        """
+        if not content:
+            return ""
+
+        mime, charset = EncodingUtil.parse_content_type(content_type)
+        if not charset and (not mime or EncodingUtil.is_text_mime(mime)):
+            # 大多数文本是 UTF-8，直接解码避免检测后再解码一次
+            try:
+                return content.decode(constants.ENCODING_UTF8)
+            except UnicodeDecodeError:
+                pass
+
+        encoding = EncodingUtil.detect_encoding(content, content_type, domain)
+        if encoding is None and mime and not EncodingUtil.is_text_mime(mime):
+            return None
 
         if encoding:
             try:
@@ -39,7 +152,7 @@ class EncodingUtil:
                 pass
 
         # 如果都失败，使用 errors='replace' 处理
-        return content.decode("utf-8", errors="replace")
+        return content.decode(constants.ENCODING_UTF8, errors="replace")
 
     @staticmethod
     def encode_to_utf8(text: str) -> bytes:
@@ -0,0 +1,61 @@
+"""
+缓存条目文件格式工具
+GET 带参数和 POST 请求的缓存使用二进制条目格式:
+
+    | 魔数 4B | 版本 1B | 头部长度 4B (大端) | 头部 JSON | 原始响应体 |
+
+头部保存状态码、响应头和请求指纹，响应体按原始字节保存，读取时无需解码
+"""
+
+import struct
+from typing import Any, BinaryIO, Dict, Optional
+
+from .json_util import JsonUtil
+
+_PREFIX = struct.Struct(">4sBI")
+
+
+class CacheEntryUtil:
+    """缓存条目格式工具类"""
+
+    MAGIC = b"FMCE"
+    VERSION = 1
+
+    @staticmethod
+    def encode_header(header: Dict[str, Any]) -> bytes:
+        """
+        编码条目头部 (包括魔数、版本和长度前缀)
+
+        Args:
+            header: 头部字典
+
+        Returns:
+            写在响应体之前的头部字节
+        """
+        data = JsonUtil.dumps(header)
+        return _PREFIX.pack(CacheEntryUtil.MAGIC, CacheEntryUtil.VERSION, len(data)) + data
+
+    @staticmethod
+    def read_header(file: BinaryIO) -> Optional[tuple[Dict[str, Any], int]]:
+        """
+        从文件开头读取条目头部，文件位置停在响应体起始处
+
+        Args:
+            file: 以二进制模式打开的条目文件
+
+        Returns:
+            (头部字典, 响应体偏移量) 元组，格式不匹配时返回 None
+        """
+        prefix = file.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            return None
+
+        magic, version, length = _PREFIX.unpack(prefix)
+        if magic != CacheEntryUtil.MAGIC or version != CacheEntryUtil.VERSION:
+            return None
+
+        data = file.read(length)
+        if len(data) < length:
+            return None
+
+        return JsonUtil.loads(data), _PREFIX.size + length
@@ -2,9 +2,12 @@
 HTTP 相关工具函数
 """
 
-from typing import Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
 from urllib.parse import urlparse
 
+from . import constants
+
 
 class HttpUtil:
     """HTTP 工具类"""
@@ -54,6 +57,28 @@ class HttpUtil:
         """
         return HttpUtil.clean_headers(headers, ["host", "connection"])
 
+    @staticmethod
+    def clean_raw_request_headers(raw_headers: Iterable[tuple[bytes, bytes]]) -> Dict[str, str]:
+        """
+        由 ASGI 原始请求头直接构建代理请求头 (同名请求头取第一个值)，移除不应该转发的 headers
+
+        一次遍历完成，不经过 Headers 对象和中间字典
+
+        Args:
+            raw_headers: ASGI scope 中的请求头列表 (名称已小写)
+
+        Returns:
+            清理后的 headers
+        """
+        headers: Dict[str, str] = {}
+        for name, value in raw_headers:
+            if name == b"host" or name == b"connection":
+                continue
+            key = name.decode("latin-1")
+            if key not in headers:
+                headers[key] = value.decode("latin-1")
+        return headers
+
     @staticmethod
     def clean_response_headers(headers: Dict[str, str]) -> Dict[str, str]:
         """
@@ -128,3 +153,274 @@ class HttpUtil:
         """
         parsed = urlparse(url)
         return parsed.netloc
+
+    @staticmethod
+    def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+        """
+        解析 Cache-Control 头
+
+        Args:
+            value: Cache-Control 头的值
+
+        Returns:
+            指令字典 (小写指令名 -> 参数值，无参数的指令值为 None)
+        """
+        directives: Dict[str, Optional[str]] = {}
+        for part in (value or "").split(","):
+            name, sep, arg = part.partition("=")
+            name = name.strip().lower()
+            if name:
+                directives[name] = arg.strip().strip('"') if sep else None
+        return directives
+
+    @staticmethod
+    def parse_http_date(value: Optional[str]) -> Optional[float]:
+        """
+        解析 HTTP 日期 (如 Expires、Date、Last-Modified)
+
+        Args:
+            value: HTTP 日期字符串
+
+        Returns:
+            Unix 时间戳，无法解析时返回 None
+        """
+        if not value:
+            return None
+        try:
+            return parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def parse_freshness(
+        headers: Dict[str, str], fetched_at: float
+    ) -> Dict[str, Optional[int]]:
+        """
+        根据 Cache-Control、Expires 和 Age 计算响应的剩余新鲜期
+
+        优先级: no-store/no-cache > s-maxage > max-age > Expires；
+        新鲜期减去响应在上游缓存中已经存在的时间 (Age)。
+        no-store/no-cache/must-revalidate/proxy-revalidate 的响应过期后必须先向上游确认，
+        不允许 stale-while-revalidate 和 stale-if-error
+
+        Args:
+            headers: 响应头 (小写键)
+            fetched_at: 获取响应的时间戳
+
+        Returns:
+            {"ttl": 新鲜期秒数, "stale_while_revalidate": 秒数, "stale_if_error": 秒数}，
+            响应未声明的项为 None
+        """
+        directives = HttpUtil.parse_cache_control(headers.get("cache-control"))
+
+        def _seconds(name: str) -> Optional[int]:
+            arg = directives.get(name)
+            return int(arg) if arg is not None and arg.isdigit() else None
+
+        ttl: Optional[int] = None
+        if "no-store" in directives or "no-cache" in directives:
+            ttl = 0
+        elif _seconds("s-maxage") is not None:
+            ttl = _seconds("s-maxage")
+        elif _seconds("max-age") is not None:
+            ttl = _seconds("max-age")
+        elif "expires" in headers:
+            # 无法解析的 Expires 视为已过期
+            expires = HttpUtil.parse_http_date(headers["expires"])
+            date = HttpUtil.parse_http_date(headers.get("date")) or fetched_at
+            ttl = max(0, int(expires - date)) if expires is not None else 0
+
+        age = headers.get("age", "").strip()
+        if ttl and age.isdigit():
+            ttl = max(0, ttl - int(age))
+
+        if any(name in directives for name in constants.CACHE_CONTROL_MUST_REVALIDATE):
+            return {"ttl": ttl, "stale_while_revalidate": 0, "stale_if_error": 0}
+        return {
+            "ttl": ttl,
+            "stale_while_revalidate": _seconds("stale-while-revalidate"),
+            "stale_if_error": _seconds("stale-if-error"),
+        }
+
+    @staticmethod
+    def build_validators(headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        根据缓存的响应头构建条件请求头
+
+        Args:
+            headers: 缓存的响应头 (小写键)
+
+        Returns:
+            包含 if-none-match / if-modified-since 的请求头字典
+        """
+        validators = {}
+        if headers.get("etag"):
+            validators["if-none-match"] = headers["etag"]
+        if headers.get("last-modified"):
+            validators["if-modified-since"] = headers["last-modified"]
+        return validators
+
+    @staticmethod
+    def etag_matches(if_none_match: str, etag: Optional[str]) -> bool:
+        """
+        判断 If-None-Match 是否匹配 ETag (弱比较)
+
+        Args:
+            if_none_match: If-None-Match 请求头的值
+            etag: 当前响应的 ETag
+
+        Returns:
+            是否匹配
+        """
+        if not etag:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        target = etag.removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == target for tag in if_none_match.split(",")
+        )
+
+    @staticmethod
+    def negotiate_encoding(
+        accept_encoding: Optional[str], available: Iterable[str], preference: Iterable[str]
+    ) -> Optional[str]:
+        """
+        根据 Accept-Encoding 从可用编码中选择响应编码
+
+        选择客户端 q 值最高的编码 (未列出的编码使用 "*" 的 q 值)，q 值相同时按服务端优先顺序
+
+        Args:
+            accept_encoding: Accept-Encoding 请求头的值
+            available: 缓存中已有的编码
+            preference: 服务端的编码优先顺序
+
+        Returns:
+            选中的编码，客户端不接受任何可用编码时返回 None (发送未压缩内容)
+        """
+        if not accept_encoding:
+            return None
+
+        qualities: Dict[str, float] = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[name.strip().lower()] = quality
+
+        available = set(available)
+        selected, selected_quality = None, 0.0
+        for encoding in preference:
+            if encoding not in available:
+                continue
+            quality = qualities.get(encoding, qualities.get("*", 0.0))
+            if quality > selected_quality:
+                selected, selected_quality = encoding, quality
+        return selected
+
+    @staticmethod
+    def add_vary(vary: Optional[str], name: str) -> str:
+        """
+        向 Vary 响应头追加字段 (已存在时不重复添加)
+
+        Args:
+            vary: 原 Vary 头的值
+            name: 要追加的字段名
+
+        Returns:
+            新的 Vary 头的值
+        """
+        if not vary:
+            return name
+        fields = [field.strip().lower() for field in vary.split(",")]
+        if name.lower() in fields or "*" in fields:
+            return vary
+        return f"{vary}, {name}"
+
+    @staticmethod
+    def variant_etag(etag: str, encoding: str) -> str:
+        """
+        为压缩变体生成独立的 ETag (在原 ETag 引号内追加编码后缀)
+
+        Args:
+            etag: 未压缩内容的 ETag
+            encoding: 压缩编码
+
+        Returns:
+            变体的 ETag
+        """
+        if etag.endswith('"'):
+            return f'{etag[:-1]}-{encoding}"'
+        return f"{etag}-{encoding}"
+
+    @staticmethod
+    def parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+        """
+        解析单个字节范围的 Range 请求头
+
+        多个范围或格式无法识别时忽略 Range，返回完整内容
+
+        Args:
+            range_header: Range 请求头的值 (如 "bytes=0-1023"、"bytes=1024-"、"bytes=-500")
+            size: 内容总长度
+
+        Returns:
+            (起始位置, 结束位置) 闭区间，应忽略 Range 时返回 None
+
+        Raises:
+            ValueError: 范围无法满足 (应返回 416)
+        """
+        unit, _, spec = range_header.partition("=")
+        if unit.strip().lower() != "bytes" or "," in spec:
+            return None
+
+        first, sep, last = (part.strip() for part in spec.partition("-"))
+        if not sep or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+
+        if not first:
+            # 后缀范围: 最后 N 个字节
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                raise ValueError("Range not satisfiable")
+            return max(0, size - suffix), size - 1
+
+        start = int(first)
+        if last and start > int(last):
+            return None
+        if start >= size:
+            raise ValueError("Range not satisfiable")
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+
+    @staticmethod
+    def if_range_matches(
+        if_range: Optional[str], etag: Optional[str], last_modified: Optional[str]
+    ) -> bool:
+        """
+        判断 If-Range 条件是否成立 (不成立时忽略 Range，返回完整内容)
+
+        Args:
+            if_range: If-Range 请求头的值
+            etag: 当前响应的 ETag
+            last_modified: 当前响应的 Last-Modified
+
+        Returns:
+            是否按 Range 返回部分内容
+        """
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            # ETag 需要强比较
+            return bool(etag) and not etag.startswith("W/") and if_range == etag
+        since = HttpUtil.parse_http_date(if_range)
+        return since is not None and since == HttpUtil.parse_http_date(last_modified)
@@ -0,0 +1,83 @@
+"""
+JSON 编解码工具
+缓存元数据和条目头部的序列化，可选使用 orjson (输出仍是标准 JSON，两种编解码器写入的文件可以互相读取)
+"""
+
+import json
+from typing import Any
+
+from . import constants
+
+try:
+    import orjson
+except ImportError:  # 可选依赖: pip install orjson
+    orjson = None
+
+
+class JsonUtil:
+    """JSON 编解码工具类"""
+
+    # 是否使用 orjson (启动时由 configure 设置)
+    fast = False
+
+    @staticmethod
+    def available() -> bool:
+        """是否已安装 orjson"""
+        return orjson is not None
+
+    @classmethod
+    def configure(cls, fast: bool) -> str:
+        """
+        选择编解码器，未安装 orjson 时使用标准库
+
+        Args:
+            fast: 是否使用 orjson
+
+        Returns:
+            实际使用的编解码器名称
+        """
+        cls.fast = fast and orjson is not None
+        return cls.codec_name()
+
+    @classmethod
+    def codec_name(cls) -> str:
+        """当前使用的编解码器名称"""
+        return "orjson" if cls.fast else "json"
+
+    @classmethod
+    def dumps(cls, data: Any, pretty: bool = False) -> bytes:
+        """
+        序列化为 UTF-8 编码的 JSON
+
+        Args:
+            data: 要序列化的对象
+            pretty: 是否缩进 (标准库编解码器下用于便于查看的元数据文件，orjson 始终输出紧凑格式)
+
+        Returns:
+            JSON 字节
+        """
+        if cls.fast:
+            return orjson.dumps(data)
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode(constants.ENCODING_UTF8)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
+            constants.ENCODING_UTF8
+        )
+
+    @classmethod
+    def loads(cls, data: bytes | str) -> Any:
+        """
+        解析 JSON
+
+        Args:
+            data: JSON 字节或字符串
+
+        Returns:
+            解析得到的对象
+
+        Raises:
+            ValueError: 不是合法的 JSON
+        """
+        if cls.fast:
+            return orjson.loads(data)
+        return json.loads(data)
@@ -0,0 +1,76 @@
+"""
+跨进程文件锁工具
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持 flock，退化为无锁
+    fcntl = None
+
+
+class LockUtil:
+    """文件锁工具类"""
+
+    @staticmethod
+    @contextmanager
+    def file_lock(lock_path: Path, shared: bool = False) -> Iterator[None]:
+        """
+        基于 flock 的文件锁，同时适用于多线程和多进程 (多个 uvicorn worker)
+
+        每次加锁都会打开独立的文件描述符，因此同一进程内的不同线程也会互斥
+
+        Args:
+            lock_path: 锁文件路径
+            shared: 是否为共享锁 (默认排他锁)
+        """
+        if fcntl is None:
+            yield
+            return
+
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def try_file_lock(lock_path: Path) -> Optional[int]:
+        """
+        非阻塞地获取排他文件锁，锁一直持有到调用 release_file_lock (或进程退出)
+
+        Args:
+            lock_path: 锁文件路径
+
+        Returns:
+            持有锁的文件描述符，锁已被占用时返回 None (不支持 flock 时总是成功，返回 -1)
+        """
+        if fcntl is None:
+            return -1
+
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @staticmethod
+    def release_file_lock(fd: int) -> None:
+        """
+        释放 try_file_lock 获取的锁
+
+        Args:
+            fd: try_file_lock 返回的文件描述符
+        """
+        if fd >= 0:
+            os.close(fd)